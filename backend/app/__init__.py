@@ -1,7 +1,7 @@
-from flask import Flask, send_from_directory
+from flask import Flask, send_from_directory, jsonify, request, Response
 from flask_cors import CORS
 from .config import Config
-from .services import ingest_resumes_from_disk
+from .services import ingest_resumes_from_disk, warmup_embedding_model
 import os
 
 def create_app():
@@ -24,6 +24,27 @@ def create_app():
     from .routes import main_bp
     app.register_blueprint(main_bp, url_prefix='/api')
     
+    # Per-stage timings for every request; a request ends when its response (or stream) is closed
+    from . import metrics
+    
+    @app.before_request
+    def start_request_trace():
+        request.environ['resume.trace'] = metrics.start_request()
+    
+    @app.after_request
+    def finish_request_trace(response):
+        trace = request.environ.get('resume.trace')
+        if trace is not None:
+            method, path = request.method, request.path
+            endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+            status = response.status_code
+            response.call_on_close(lambda: metrics.finish_request(trace, method, endpoint, status, path))
+        return response
+    
+    @app.route('/metrics')
+    def prometheus_metrics():
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+    
     # Serve React frontend
     @app.route('/')
     def index():
@@ -49,6 +70,22 @@ def create_app():
         
         return jsonify({"error": "Frontend not built"}), 404
     
+    # Load the embedding model up front instead of on the first query or ingest.
+    # Read-only routes answer meanwhile; /api/health reports readiness.
+    if Config.EMBEDDING_WARMUP == "sync":
+        warmup_embedding_model()
+    elif Config.EMBEDDING_WARMUP == "preload":
+        # gunicorn --preload: load once in the master, workers share the weights copy-on-write
+        warmup_embedding_model(encode=False)
+    elif Config.EMBEDDING_WARMUP == "background":
+        warmup_embedding_model(background=True)
+
+    # Under gunicorn --preload the watcher is started per worker in post_fork,
+    # since its threads would not survive the fork
+    if Config.EMBEDDING_WARMUP != "preload":
+        from .watcher import start_watcher
+        start_watcher()
+    
     # Auto-ingest resumes on startup - REMOVED to avoid issues and respect manual sync
     # with app.app_context():
     #     print("Checking for resumes to ingest...")
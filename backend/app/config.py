@@ -12,6 +12,20 @@ class Config:
     BASE_DIR = BASE_DIR
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     HUGGINGFACE_API_KEY = os.getenv("HUGGINGFACE_API_KEY")
+    # Optional OpenAI-compatible endpoint (e.g. a local stub server) used instead of the HF router
+    HF_INFERENCE_URL = os.getenv("HF_INFERENCE_URL") or None
+    LLM_MODEL = os.getenv("LLM_MODEL") or "mistralai/Mistral-7B-Instruct-v0.2"
+    
+    # LLM analysis: calls in flight per request, per-call deadline and whole-request deadline (seconds).
+    # ANALYZE_TIMEOUT must stay below gunicorn's --timeout.
+    LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY") or 5)
+    LLM_CALL_TIMEOUT = float(os.getenv("LLM_CALL_TIMEOUT") or 45)
+    ANALYZE_TIMEOUT = float(os.getenv("ANALYZE_TIMEOUT") or 90)
+    # /api/analyze/batch: max job descriptions per request, and the deadline shared by all its LLM calls
+    ANALYZE_BATCH_MAX = int(os.getenv("ANALYZE_BATCH_MAX") or 20)
+    ANALYZE_BATCH_TIMEOUT = float(os.getenv("ANALYZE_BATCH_TIMEOUT") or 110)
+    # Log requests slower than this many seconds with their per-stage breakdown (0 = off)
+    SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_SECONDS") or 0)
     DATA_DIR = os.path.join(BASE_DIR, 'data')
     
     # Resume folder - can be set via environment variable or runtime
@@ -20,7 +34,100 @@ class Config:
     _resumes_dir = _env_resumes_path if _env_resumes_path else os.path.join(DATA_DIR, 'resumes')
     
     CHROMA_DB_DIR = os.path.join(DATA_DIR, 'chroma_db')
-    
+
+    # Path/size/mtime/content-hash record of ingested files, kept with the vectors it describes
+    MANIFEST_PATH = os.path.join(CHROMA_DB_DIR, 'ingest_manifest.sqlite3')
+
+    # BM25 inverted index over resume text, fused with vector results by reciprocal rank
+    LEXICAL_INDEX_PATH = os.path.join(CHROMA_DB_DIR, 'lexical_index.sqlite3')
+    HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() in ("1", "true", "yes")
+    # Candidates taken from each retriever before fusion, and the RRF rank constant
+    RETRIEVAL_CANDIDATES = int(os.getenv("RETRIEVAL_CANDIDATES") or 30)
+    RRF_K = int(os.getenv("RRF_K") or 60)
+
+    # Section-aware passages: resumes are also split at their section headings into passages of
+    # at most PASSAGE_WORDS words (inside MiniLM's 256-token window), embedded in their own
+    # collection. Retrieval fuses in a by-passage ranking, and resumes that do not fit the prompt
+    # (LLM_PROMPT_TOKENS, or PASSAGE_PROMPT_CHARS with PROMPT_BUILDER=legacy) reach the LLM as
+    # their best-matching passages
+    PASSAGE_INDEX = os.getenv("PASSAGE_INDEX", "true").lower() in ("1", "true", "yes")
+    PASSAGE_WORDS = int(os.getenv("PASSAGE_WORDS") or 120)
+    PASSAGE_OVERLAP_WORDS = int(os.getenv("PASSAGE_OVERLAP_WORDS") or 20)
+    PASSAGE_PROMPT_CHARS = int(os.getenv("PASSAGE_PROMPT_CHARS") or 2400)
+
+    # Near-duplicate resumes: MinHash/LSH sketches built at ingest. /api/analyze keeps only the
+    # best-ranked resume of each group whose estimated text similarity reaches the threshold
+    DUPLICATE_INDEX_PATH = os.path.join(CHROMA_DB_DIR, 'duplicate_index.sqlite3')
+    NEAR_DUPLICATES = os.getenv("NEAR_DUPLICATES", "true").lower() in ("1", "true", "yes")
+    NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD") or 0.8)
+
+    # Vector search engine: "chroma" (default, the collection's HNSW index) or "numpy"
+    # (exact search over a memory-mapped copy of the embeddings, shared by all workers).
+    # float16 halves the matrix's memory but is several times slower to search.
+    VECTOR_ENGINE = (os.getenv("VECTOR_ENGINE") or "chroma").lower()
+    VECTOR_INDEX_PATH = os.path.join(CHROMA_DB_DIR, 'vector_index.sqlite3')
+    VECTOR_INDEX_DTYPE = (os.getenv("VECTOR_INDEX_DTYPE") or "float32").lower()
+
+    # Local pre-ranking before the LLM: overlap (default), cross-encoder or off.
+    # RERANK_CANDIDATES resumes are retrieved and scored locally; the best LLM_TOP_K are analyzed
+    RERANK_BACKEND = (os.getenv("RERANK_BACKEND") or "overlap").lower()
+    RERANK_MODEL = os.getenv("RERANK_MODEL") or "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES") or 50)
+    LLM_TOP_K = int(os.getenv("LLM_TOP_K") or 10)
+
+    # Analysis prompts: "budget" (default) fills LLM_PROMPT_TOKENS, counted with PROMPT_TOKENIZER
+    # (default the LLM's own, "estimate" to skip loading it), from the de-noised resume digest
+    # built at ingest, with at most LLM_JD_TOKENS of job description (resumes over budget are
+    # cut to their best passages, packed in rank order); "legacy" sends the first 3000/500
+    # characters of raw text. LLM_MAX_TOKENS caps the length of the answer
+    PROMPT_BUILDER = (os.getenv("PROMPT_BUILDER") or "budget").lower()
+    PROMPT_TOKENIZER = os.getenv("PROMPT_TOKENIZER") or LLM_MODEL
+    LLM_PROMPT_TOKENS = int(os.getenv("LLM_PROMPT_TOKENS") or 768)
+    LLM_JD_TOKENS = int(os.getenv("LLM_JD_TOKENS") or 160)
+    LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS") or 800)
+    DIGEST_INDEX_PATH = os.path.join(CHROMA_DB_DIR, 'resume_digests.sqlite3')
+
+    # Cache of LLM analyses (resume hash, JD hash, model, prompt version), LRU-bounded with a TTL
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    LLM_CACHE_PATH = os.path.join(CHROMA_DB_DIR, 'llm_cache.sqlite3')
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES") or 20000)
+    LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL") or 7 * 24 * 3600)
+
+    # Number of processes used to extract PDF text during ingestion (1 = in-process)
+    INGEST_WORKERS = int(os.getenv("INGEST_WORKERS") or max(1, (os.cpu_count() or 2) - 1))
+
+    # Embedding backend: "torch" (full-precision PyTorch) or "onnx" (int8-quantized ONNX export
+    # of the same MiniLM, needs sentence-transformers[onnx]). Falls back to torch if ONNX can't load.
+    EMBEDDING_BACKEND = (os.getenv("EMBEDDING_BACKEND") or "torch").lower()
+    EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE") or "onnx/model_quint8_avx2.onnx"
+
+    # Embedding model warmup at startup: "background" (default), "sync", "off" (load on first use)
+    # or "preload" (load weights only; set by gunicorn.conf.py when the app is preloaded)
+    EMBEDDING_WARMUP = (os.getenv("EMBEDDING_WARMUP") or "background").lower()
+
+    # Background ingest jobs: state/event log, heartbeat age after which a job counts as
+    # interrupted, how long one progress stream stays open (keep below gunicorn's --timeout)
+    # and how long finished jobs keep their event log
+    JOBS_PATH = os.path.join(CHROMA_DB_DIR, 'ingest_jobs.sqlite3')
+    INGEST_JOB_STALE_SECONDS = float(os.getenv("INGEST_JOB_STALE_SECONDS") or 60)
+    INGEST_STREAM_SECONDS = float(os.getenv("INGEST_STREAM_SECONDS") or 100)
+    INGEST_JOB_RETENTION_SECONDS = 7 * 24 * 3600
+
+    # /api/resumes paging
+    RESUMES_PAGE_SIZE = int(os.getenv("RESUMES_PAGE_SIZE") or 100)
+    RESUMES_MAX_PAGE_SIZE = 1000
+
+    # Extracted resumes are embedded and written in micro-batches bounded by size and age
+    INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE") or 32)
+    INGEST_BATCH_SECONDS = float(os.getenv("INGEST_BATCH_SECONDS") or 2.0)
+
+    # Resumes folder watcher: off (default), auto (inotify, falling back to polling) or poll
+    WATCH_RESUMES = (os.getenv("WATCH_RESUMES") or "off").lower()
+    # Quiet period before changed files are synced, and the longest a change waits during a burst
+    WATCH_DEBOUNCE_SECONDS = float(os.getenv("WATCH_DEBOUNCE_SECONDS") or 2.0)
+    WATCH_MAX_WAIT_SECONDS = float(os.getenv("WATCH_MAX_WAIT_SECONDS") or 10.0)
+    WATCH_POLL_SECONDS = float(os.getenv("WATCH_POLL_SECONDS") or 5.0)
+
     os.makedirs(CHROMA_DB_DIR, exist_ok=True)
     
     # Create default resumes directory if no custom path is set
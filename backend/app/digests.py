@@ -0,0 +1,141 @@
+import re
+import sqlite3
+from contextlib import contextmanager
+import unicodedata
+from collections import Counter
+from .config import Config
+
+# Normalized, de-noised resume text for the LLM prompt, computed at ingest and
+# kept next to the ChromaDB collection that holds the raw text. Text extracted
+# from template PDFs is full of layout noise that costs prompt tokens and
+# carries nothing: runs of spaces used for alignment, separator rules, page
+# numbers, the header or footer repeated on every page, ligatures and words
+# hyphenated across lines. The raw text stays what is embedded and searched.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS digests (
+    doc_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+"""
+
+# Bump when normalize changes; older digests are rebuilt on the next sync
+DIGEST_VERSION = 1
+
+_INVISIBLE_RE = re.compile("[\u00ad\u200b\u200c\u200d\u2060\ufeff]")
+# "experi-\nence" -> "experience"; only between lowercase letters, so "full-\nStack" keeps its hyphen
+_WRAPPED_WORD_RE = re.compile(r"([a-z])-\n[ \t]*([a-z])")
+_SPACE_RE = re.compile("[ \t\u00a0\u2000-\u200a\u202f\u205f\u3000]+")
+_BULLET_RE = re.compile("^[\u2022\u25cf\u25aa\u25a0\u25e6\u2023\u2219\u00b7\u27a2\u2713\u2714*\u2013\u2014-]+\\s*")
+_PAGE_RE = re.compile(r"^(page\s*)?\d{1,3}(\s*(of|/)\s*\d{1,3})?$", re.IGNORECASE)
+# Lines with no letters or digits: rules, bullet rows, stray table borders
+_NOISE_RE = re.compile(r"^[\W_]*$")
+# Repeated lines at least this long are page headers/footers (name, contact line), kept once
+_REPEAT_MIN_CHARS = 20
+
+
+@contextmanager
+def _connect():
+    conn = sqlite3.connect(Config.DIGEST_INDEX_PATH, timeout=30)
+    try:
+        conn.executescript(_SCHEMA)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _chunks(values, size=500):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def normalize(text):
+    """
+    Digest of a resume's extracted text: one cleaned line per source line,
+    without blank lines, layout whitespace, separators, page numbers or
+    repeated page headers and footers.
+    """
+    text = unicodedata.normalize("NFKC", text or "")
+    text = _INVISIBLE_RE.sub("", text).replace("\r\n", "\n").replace("\r", "\n")
+    text = _WRAPPED_WORD_RE.sub(r"\1\2", text)
+
+    lines = []
+    for line in text.split("\n"):
+        line = _SPACE_RE.sub(" ", line).strip()
+        if not line or _NOISE_RE.match(line) or _PAGE_RE.match(line):
+            continue
+        bullet = _BULLET_RE.match(line)
+        if bullet:
+            line = "- " + line[bullet.end():]
+            if len(line) == 2:
+                continue
+        lines.append(line)
+
+    counts = Counter(line.lower() for line in lines if len(line) >= _REPEAT_MIN_CHARS)
+    seen = set()
+    kept = []
+    for line in lines:
+        key = line.lower()
+        if counts.get(key, 0) > 1:
+            if key in seen:
+                continue
+            seen.add(key)
+        kept.append(line)
+    return "\n".join(kept)
+
+
+def add(documents):
+    """
+    Store the digest of [(doc_id, text)], replacing any previous one.
+    """
+    if not documents:
+        return
+    with _connect() as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO digests (doc_id, version, digest) VALUES (?, ?, ?)",
+            [(doc_id, DIGEST_VERSION, normalize(text)) for doc_id, text in documents]
+        )
+
+
+def get(doc_ids):
+    """
+    {doc_id: digest} for the given ids that have a current digest.
+    """
+    digests = {}
+    with _connect() as conn:
+        for chunk in _chunks(doc_ids):
+            marks = ",".join("?" * len(chunk))
+            digests.update(conn.execute(
+                f"SELECT doc_id, digest FROM digests WHERE version = ? AND doc_id IN ({marks})", (DIGEST_VERSION, *chunk)
+            ))
+    return digests
+
+
+def remove(doc_ids):
+    if not doc_ids:
+        return
+    with _connect() as conn:
+        for chunk in _chunks(doc_ids):
+            marks = ",".join("?" * len(chunk))
+            conn.execute(f"DELETE FROM digests WHERE doc_id IN ({marks})", chunk)
+
+
+def indexed_ids():
+    """
+    Ids with a digest of the current DIGEST_VERSION.
+    """
+    with _connect() as conn:
+        return {row[0] for row in conn.execute("SELECT doc_id FROM digests WHERE version = ?", (DIGEST_VERSION,))}
+
+
+def count():
+    with _connect() as conn:
+        return conn.execute("SELECT COUNT(*) FROM digests WHERE version = ?", (DIGEST_VERSION,)).fetchone()[0]
+
+
+def clear():
+    with _connect() as conn:
+        conn.execute("DELETE FROM digests")
@@ -0,0 +1,271 @@
+import zlib
+import sqlite3
+from contextlib import contextmanager
+import hashlib
+from .config import Config
+from . import lexical
+from . import metrics
+
+# Near-duplicate resumes (re-applications with a few lines edited, the same CV
+# exported twice) found with MinHash and locality-sensitive hashing. Exact
+# copies already share one vector through the ingest manifest; this catches
+# files whose bytes differ but whose text is nearly the same.
+#
+# Each resume's text is cut into overlapping word shingles and summarised by a
+# NUM_PERM-value MinHash signature: the share of equal values between two
+# signatures estimates the Jaccard similarity of their shingle sets. The
+# signature is split into BANDS bands and every band is hashed into a bucket;
+# resumes sharing any bucket are candidates, and only candidates have their
+# signatures compared. With 32 bands of 4 values, pairs at 0.8 similarity are
+# found >99.9% of the time and pairs below 0.3 rarely collide.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sketches (
+    doc_id TEXT PRIMARY KEY,
+    signature BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS buckets (
+    bucket INTEGER NOT NULL,
+    doc_id TEXT NOT NULL,
+    PRIMARY KEY (bucket, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS buckets_doc_id ON buckets (doc_id);
+"""
+
+NUM_PERM = 128
+BANDS = 32
+SHINGLE_WORDS = 3
+# Buckets shared by more resumes than this (boilerplate templates) are not used to find candidates
+_MAX_BUCKET = 500
+
+_MERSENNE = (1 << 61) - 1
+_permutations = None
+
+
+def enabled():
+    return Config.NEAR_DUPLICATES
+
+
+@contextmanager
+def _connect():
+    conn = sqlite3.connect(Config.DUPLICATE_INDEX_PATH, timeout=30)
+    try:
+        conn.executescript(_SCHEMA)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _chunks(values, size=500):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _get_permutations():
+    global _permutations
+    if _permutations is None:
+        import numpy as np
+        # Fixed seed: stored signatures are only comparable under the same permutations
+        rng = np.random.default_rng(20240601)
+        a = rng.integers(1, 1 << 32, NUM_PERM, dtype=np.uint64)
+        b = rng.integers(0, 1 << 32, NUM_PERM, dtype=np.uint64)
+        _permutations = (a[:, None], b[:, None])
+    return _permutations
+
+
+def signature(text):
+    """
+    MinHash signature (NUM_PERM uint32 values) of a text's word shingles, or None if it has no words.
+    """
+    import numpy as np
+
+    tokens = lexical.tokenize(text or "")
+    if not tokens:
+        return None
+    shingles = {" ".join(tokens[i:i + SHINGLE_WORDS]) for i in range(max(1, len(tokens) - SHINGLE_WORDS + 1))}
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+    a, b = _get_permutations()
+    # (a * x + b) mod p with 32-bit a, b and x never overflows 64 bits
+    return (((a * hashes + b) % _MERSENNE) & 0xFFFFFFFF).min(axis=1).astype(np.uint32)
+
+
+def _buckets(sig):
+    rows = NUM_PERM // BANDS
+    return [
+        int.from_bytes(hashlib.blake2b(bytes([band]) + sig[band * rows:(band + 1) * rows].tobytes(), digest_size=8).digest(),
+                       "big", signed=True)
+        for band in range(BANDS)
+    ]
+
+
+def similarity(sig_a, sig_b):
+    """
+    Estimated Jaccard similarity of two signatures.
+    """
+    return float((sig_a == sig_b).mean())
+
+
+def _load(conn, doc_ids):
+    import numpy as np
+
+    signatures = {}
+    for chunk in _chunks(doc_ids):
+        marks = ",".join("?" * len(chunk))
+        for doc_id, blob in conn.execute(f"SELECT doc_id, signature FROM sketches WHERE doc_id IN ({marks})", chunk):
+            signatures[doc_id] = np.frombuffer(blob, dtype=np.uint32)
+    return signatures
+
+
+def _delete(conn, doc_ids):
+    for chunk in _chunks(doc_ids):
+        marks = ",".join("?" * len(chunk))
+        conn.execute(f"DELETE FROM buckets WHERE doc_id IN ({marks})", chunk)
+        conn.execute(f"DELETE FROM sketches WHERE doc_id IN ({marks})", chunk)
+
+
+def _candidates(conn, doc_id, buckets):
+    marks = ",".join("?" * len(buckets))
+    cursor = conn.execute(
+        f"SELECT doc_id FROM buckets WHERE bucket IN ({marks}) AND doc_id != ? AND bucket NOT IN "
+        f"(SELECT bucket FROM buckets WHERE bucket IN ({marks}) GROUP BY bucket HAVING COUNT(*) > ?)",
+        (*buckets, doc_id, *buckets, _MAX_BUCKET)
+    )
+    return {row[0] for row in cursor}
+
+
+def add(documents, threshold=None):
+    """
+    Sketch [(doc_id, text)], replacing any previous sketch for the same ids.
+    Returns {doc_id: [(other doc_id, similarity)]}, best first, for the added
+    resumes that are near-duplicates (>= threshold) of an indexed one,
+    including one added in the same call.
+    """
+    threshold = Config.NEAR_DUPLICATE_THRESHOLD if threshold is None else threshold
+    if not documents:
+        return {}
+    with metrics.timer("sketch_add"):
+        sketches = [(doc_id, signature(text)) for doc_id, text in documents]
+        sketches = [(doc_id, sig, _buckets(sig)) for doc_id, sig in sketches if sig is not None]
+        matches = {}
+        with _connect() as conn:
+            _delete(conn, [doc_id for doc_id, _ in documents])
+            for doc_id, sig, buckets in sketches:
+                conn.execute("INSERT INTO sketches (doc_id, signature) VALUES (?, ?)", (doc_id, sig.tobytes()))
+                conn.executemany("INSERT OR IGNORE INTO buckets (bucket, doc_id) VALUES (?, ?)",
+                                 [(bucket, doc_id) for bucket in buckets])
+            for doc_id, sig, buckets in sketches:
+                candidates = _load(conn, _candidates(conn, doc_id, buckets))
+                found = [(other, similarity(sig, other_sig)) for other, other_sig in candidates.items()]
+                found = sorted((pair for pair in found if pair[1] >= threshold), key=lambda pair: (-pair[1], pair[0]))
+                if found:
+                    matches[doc_id] = found
+    return matches
+
+
+def remove(doc_ids):
+    if not doc_ids:
+        return
+    with _connect() as conn:
+        _delete(conn, doc_ids)
+
+
+def indexed_ids():
+    with _connect() as conn:
+        return {row[0] for row in conn.execute("SELECT doc_id FROM sketches")}
+
+
+def count():
+    with _connect() as conn:
+        return conn.execute("SELECT COUNT(*) FROM sketches").fetchone()[0]
+
+
+def clear():
+    with _connect() as conn:
+        conn.execute("DELETE FROM buckets")
+        conn.execute("DELETE FROM sketches")
+
+
+def collapse(doc_ids, threshold=None):
+    """
+    Group a ranked list of resumes by near-duplication. A resume joins the
+    group of the first earlier-ranked kept resume it is a near-duplicate of,
+    so every group is represented by its best-ranked member and every folded
+    resume is within threshold of that member (never only of another folded one).
+    Returns (kept, duplicates): indexes into doc_ids to keep, in order, and
+    {kept doc_id: [(doc_id, similarity to the kept resume)]} for the resumes
+    folded into it. Resumes without a sketch are always kept.
+    """
+    threshold = Config.NEAR_DUPLICATE_THRESHOLD if threshold is None else threshold
+    with metrics.timer("dedup"):
+        with _connect() as conn:
+            signatures = _load(conn, sorted(set(doc_ids)))
+        kept, duplicates = [], {}
+        seen = set()
+        representatives = []
+        for i, doc_id in enumerate(doc_ids):
+            if doc_id in seen:
+                continue
+            seen.add(doc_id)
+            sig = signatures.get(doc_id)
+            match = None
+            if sig is not None:
+                for representative in representatives:
+                    score = similarity(sig, signatures[representative])
+                    if score >= threshold:
+                        match = (representative, score)
+                        break
+            if match is None:
+                kept.append(i)
+                if sig is not None:
+                    representatives.append(doc_id)
+            else:
+                duplicates.setdefault(match[0], []).append((doc_id, round(match[1], 3)))
+    return kept, duplicates
+
+
+def groups(threshold=None, limit=None):
+    """
+    Every group of near-duplicate resumes in the index, largest first:
+    [{"ids": [...], "pairs": [(doc_id, doc_id, similarity)]}]. Groups are
+    connected through verified pairs, found via shared LSH buckets.
+    """
+    threshold = Config.NEAR_DUPLICATE_THRESHOLD if threshold is None else threshold
+    with _connect() as conn:
+        shared = {}
+        cursor = conn.execute(
+            "SELECT bucket, doc_id FROM buckets WHERE bucket IN "
+            "(SELECT bucket FROM buckets GROUP BY bucket HAVING COUNT(*) BETWEEN 2 AND ?)",
+            (_MAX_BUCKET,)
+        )
+        for bucket, doc_id in cursor:
+            shared.setdefault(bucket, []).append(doc_id)
+        candidates = {tuple(sorted((a, b))) for members in shared.values()
+                      for i, a in enumerate(members) for b in members[i + 1:]}
+        signatures = _load(conn, sorted({doc_id for pair in candidates for doc_id in pair}))
+
+    parent = {}
+
+    def find(doc_id):
+        while parent.get(doc_id, doc_id) != doc_id:
+            doc_id = parent[doc_id]
+        return doc_id
+
+    pairs = []
+    for a, b in sorted(candidates):
+        score = similarity(signatures[a], signatures[b])
+        if score >= threshold:
+            pairs.append((a, b, round(score, 3)))
+            parent[find(b)] = find(a)
+
+    grouped = {}
+    for a, b, score in pairs:
+        group = grouped.setdefault(find(a), {"ids": set(), "pairs": []})
+        group["ids"].update((a, b))
+        group["pairs"].append((a, b, score))
+    result = sorted(
+        ({"ids": sorted(group["ids"]), "pairs": group["pairs"]} for group in grouped.values()),
+        key=lambda group: (-len(group["ids"]), group["ids"][0])
+    )
+    return result[:limit] if limit else result
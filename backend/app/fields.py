@@ -0,0 +1,282 @@
+import re
+import math
+import datetime
+from . import passages
+
+# Deterministic structured fields pulled from resume text at ingest and stored
+# as ChromaDB metadata, so /api/analyze can push filters down into the vector
+# query as `where` clauses instead of leaving them to the LLM.
+#
+# Metadata values must be scalars, so skills are stored both as a display
+# string ("skills") and as one boolean flag per skill ("skill_python": True)
+# that a where clause can match on.
+
+# Bump when extraction changes; resumes with an older version are re-extracted on the next sync
+FIELDS_VERSION = 3
+
+# canonical skill -> aliases as they appear in resumes (lowercase). Every canonical
+# name is its own first alias: a filter on a skill is a where clause on its flag,
+# so a spelling missing here would drop resumes that use it.
+SKILLS = {
+    "python": ["python"], "java": ["java"], "javascript": ["javascript", "js", "ecmascript"],
+    "typescript": ["typescript"], "c++": ["c++", "cpp"], "c#": ["c#", "csharp"], "go": ["go", "golang"],
+    "rust": ["rust"], "ruby": ["ruby"], "php": ["php"], "scala": ["scala"], "kotlin": ["kotlin"],
+    "swift": ["swift"], "r": ["r", "rstudio"], "sql": ["sql"], "bash": ["bash", "shell scripting"],
+    "matlab": ["matlab"], "perl": ["perl"], "dart": ["dart"], "elixir": ["elixir"],
+    "react": ["react", "react.js", "reactjs"], "angular": ["angular", "angularjs"], "vue": ["vue", "vue.js", "vuejs"],
+    "node.js": ["node.js", "nodejs"], "django": ["django"], "flask": ["flask"], "fastapi": ["fastapi"],
+    "spring": ["spring", "spring boot", "spring framework"], ".net": [".net", "dotnet", "asp.net"], "rails": ["rails", "ruby on rails"],
+    "html": ["html", "html5"], "css": ["css", "css3", "sass", "scss"], "graphql": ["graphql"], "rest": ["restful", "rest api", "rest apis"],
+    "postgresql": ["postgresql", "postgres"], "mysql": ["mysql"], "mongodb": ["mongodb", "mongo"], "redis": ["redis"],
+    "elasticsearch": ["elasticsearch"], "cassandra": ["cassandra"], "dynamodb": ["dynamodb"], "oracle": ["oracle"],
+    "snowflake": ["snowflake"], "bigquery": ["bigquery"], "kafka": ["kafka"], "rabbitmq": ["rabbitmq"],
+    "spark": ["spark", "apache spark"], "pyspark": ["pyspark"], "hadoop": ["hadoop"], "airflow": ["airflow"],
+    "dbt": ["dbt"], "pandas": ["pandas"], "numpy": ["numpy"], "tableau": ["tableau"], "power bi": ["power bi", "powerbi"],
+    "excel": ["excel", "ms excel", "microsoft excel"], "machine learning": ["machine learning", "ml"], "deep learning": ["deep learning"],
+    "nlp": ["nlp", "natural language processing"], "computer vision": ["computer vision"],
+    "tensorflow": ["tensorflow"], "pytorch": ["pytorch"], "scikit-learn": ["scikit-learn", "sklearn"],
+    "llm": ["llm", "llms", "large language models"], "aws": ["aws", "amazon web services"], "azure": ["azure"],
+    "gcp": ["gcp", "google cloud"], "docker": ["docker"], "kubernetes": ["kubernetes", "k8s"],
+    "terraform": ["terraform"], "ansible": ["ansible"], "jenkins": ["jenkins"], "ci/cd": ["ci/cd", "cicd"],
+    "git": ["git"], "linux": ["linux"], "microservices": ["microservices"], "agile": ["agile", "scrum"],
+    "figma": ["figma"], "salesforce": ["salesforce"], "sap": ["sap"], "jira": ["jira"],
+}
+
+CITIES = [
+    "berlin", "munich", "hamburg", "frankfurt", "cologne", "london", "manchester", "dublin", "amsterdam",
+    "paris", "madrid", "barcelona", "lisbon", "milan", "rome", "zurich", "vienna", "prague", "warsaw",
+    "stockholm", "copenhagen", "oslo", "helsinki", "brussels", "new york", "san francisco", "seattle",
+    "austin", "boston", "chicago", "los angeles", "denver", "atlanta", "toronto", "vancouver", "montreal",
+    "bangalore", "bengaluru", "hyderabad", "pune", "chennai", "mumbai", "delhi", "noida", "gurgaon",
+    "singapore", "sydney", "melbourne", "tokyo", "dubai", "tel aviv", "remote",
+]
+
+_EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+_MONTH = r"(?:(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+)?"
+_RANGE_RE = re.compile(
+    _MONTH + r"((?:19|20)\d{2})\s*(?:-|–|—|to|until)\s*" + _MONTH + r"((?:19|20)\d{2}|present|current|now|today)",
+    re.IGNORECASE
+)
+_STATED_RE = re.compile(
+    r"(\d{1,2})\s*\+?\s*(?:years|yrs)\.?\s+(?:of\s+)?(?:[a-z-]+\s+){0,3}?experience", re.IGNORECASE
+)
+_TITLE_RE = re.compile(
+    r"\b((?:(?:senior|junior|lead|principal|staff|chief|head of)[ \t]+)?(?:[a-z]+[ \t]+){0,2}?"
+    r"(?:engineer|developer|scientist|analyst|manager|architect|designer|consultant|administrator|director))\b",
+    re.IGNORECASE
+)
+_LOCATION_RE = re.compile(r"^\s*(?:location|address|based in)\s*[:\-]?\s*(.{2,60})$", re.IGNORECASE | re.MULTILINE)
+# Sections whose date ranges are not jobs
+_NOT_EMPLOYMENT = {"education", "certifications", "projects"}
+_MONTHS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+
+_ALIASES = {alias: canonical for canonical, aliases in SKILLS.items() for alias in aliases}
+# One pass over the text; longest aliases first so "apache spark" wins over "spark".
+# Aliases only match as whole words, so "go" is not found in "google" nor "r" in "r&d"
+_SKILL_RE = re.compile(
+    r"(?<![a-z0-9+#.&])(" + "|".join(re.escape(a) for a in sorted(_ALIASES, key=len, reverse=True)) + r")(?![a-z0-9+#&]|\.[a-z0-9])"
+)
+_CITY_PATTERNS = [(city, re.compile(r"\b" + re.escape(city) + r"\b")) for city in CITIES]
+
+
+def skill_key(skill):
+    """
+    Metadata key flagging a skill, e.g. "c++" -> "skill_cpp", "node.js" -> "skill_node_js".
+    """
+    name = skill.lower().replace("++", "pp").replace("#", "sharp")
+    return "skill_" + re.sub(r"[^a-z0-9]+", "_", name).strip("_")
+
+
+def canonical_skill(skill):
+    """
+    Map a user-supplied skill to its canonical name, or None if it is not in SKILLS.
+    """
+    skill = skill.strip().lower()
+    for canonical, aliases in SKILLS.items():
+        if skill == canonical or skill in aliases:
+            return canonical
+    return None
+
+
+def extract_skills(text):
+    return sorted({_ALIASES[alias] for alias in _SKILL_RE.findall(text.lower())})
+
+
+def _month_index(month, year):
+    return int(year) * 12 + (_MONTHS.index(month.lower()[:3]) if month else 0)
+
+
+def _employment_text(text):
+    """
+    The parts of a resume whose date ranges are jobs: its experience sections,
+    or without one every section but education, certifications and projects.
+    """
+    sections = passages.split_sections(text)
+    experience = [body for section, body in sections if section == "experience"]
+    if not experience:
+        experience = [body for section, body in sections if section not in _NOT_EMPLOYMENT]
+    return "\n".join(experience)
+
+
+def extract_years_experience(text):
+    """
+    Years of experience: the larger of a stated "N+ years of experience" and the
+    total span of employment date ranges (overlaps merged). Ranges under
+    education and similar headings are not employment. None if neither is found.
+    """
+    now = datetime.date.today()
+    current = now.year * 12 + now.month - 1
+
+    intervals = []
+    for start_month, start_year, end_month, end_year in _RANGE_RE.findall(_employment_text(text)):
+        start = _month_index(start_month, start_year)
+        end = current if not end_year[:1].isdigit() else _month_index(end_month, end_year)
+        if start <= end <= current:
+            intervals.append((start, end))
+
+    months = 0
+    last_end = None
+    for start, end in sorted(intervals):
+        if last_end is not None and start <= last_end:
+            if end > last_end:
+                months += end - last_end
+                last_end = end
+            continue
+        months += end - start
+        last_end = end
+
+    stated = [int(n) for n in _STATED_RE.findall(text)]
+    candidates = stated + ([months // 12] if intervals else [])
+    return min(max(candidates), 50) if candidates else None
+
+
+def extract_titles(text, limit=5):
+    titles = []
+    for match in _TITLE_RE.findall(text):
+        title = " ".join(match.lower().split())
+        if title not in titles:
+            titles.append(title)
+        if len(titles) >= limit:
+            break
+    return titles
+
+
+def extract_location(text):
+    """
+    Returns (city, location): a known city from the resume header, and the raw
+    value of a "Location:" style line. Either may be None.
+    """
+    header = text[:1500].lower()
+    city = next((city for city, pattern in _CITY_PATTERNS if pattern.search(header)), None)
+    match = _LOCATION_RE.search(text[:3000])
+    location = match.group(1).strip() if match else None
+    return city, location
+
+
+def extract(text):
+    """
+    Structured fields for a resume as a flat, ChromaDB-compatible metadata dict.
+    """
+    metadata = {"fields_version": FIELDS_VERSION}
+    if not text:
+        return metadata
+
+    email = _EMAIL_RE.search(text)
+    if email:
+        metadata["email"] = email.group(0).lower()
+        metadata["has_email"] = True
+
+    years = extract_years_experience(text)
+    if years is not None:
+        metadata["years_experience"] = years
+
+    skills = extract_skills(text)
+    if skills:
+        metadata["skills"] = ", ".join(skills)
+        for skill in skills:
+            metadata[skill_key(skill)] = True
+
+    titles = extract_titles(text)
+    if titles:
+        metadata["titles"] = ", ".join(titles)
+
+    city, location = extract_location(text)
+    if city:
+        metadata["city"] = city
+    if location:
+        metadata["location"] = location
+    return metadata
+
+
+def _parse_bool(value, key):
+    if value is None or isinstance(value, bool):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in ("1", "true", "yes", "0", "false", "no", ""):
+        return value.strip().lower() in ("1", "true", "yes")
+    raise ValueError(f"{key} must be true or false")
+
+
+def build_filters(filters):
+    """
+    Turn analyze filters into (where, where_document) for a ChromaDB query.
+
+    Supported keys: min_years, max_years, skills (all required), location, has_email.
+    Skills outside SKILLS and unknown locations fall back to a document text match.
+    Raises ValueError for malformed filters: years must be numbers, skills a
+    list of strings (or one comma-separated string), location a string and
+    has_email a boolean.
+    """
+    if not filters:
+        return None, None
+    if not isinstance(filters, dict):
+        raise ValueError("filters must be an object")
+
+    unknown = set(filters) - {"min_years", "max_years", "skills", "location", "has_email"}
+    if unknown:
+        raise ValueError(f"Unsupported filters: {', '.join(sorted(unknown))}")
+
+    clauses = []
+    document_clauses = []
+    # years_experience is whole years, so round the bound inwards: min_years 4.5 means at least 5
+    for key, op, whole in (("min_years", "$gte", math.ceil), ("max_years", "$lte", math.floor)):
+        value = filters.get(key)
+        if value is None:
+            continue
+        try:
+            if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+                raise ValueError
+            value = float(value)
+            if not math.isfinite(value):
+                raise ValueError
+        except (ValueError, OverflowError):
+            raise ValueError(f"{key} must be a number")
+        clauses.append({"years_experience": {op: whole(value)}})
+
+    skills = filters.get("skills") or []
+    if isinstance(skills, str):
+        skills = [s for s in skills.split(",") if s.strip()]
+    if not isinstance(skills, list) or not all(isinstance(s, str) for s in skills):
+        raise ValueError("skills must be a list of strings")
+    for skill in skills:
+        canonical = canonical_skill(skill)
+        if canonical:
+            clauses.append({skill_key(canonical): True})
+        else:
+            document_clauses.append({"$contains": skill.strip()})
+
+    location = filters.get("location") or ""
+    if not isinstance(location, str):
+        raise ValueError("location must be a string")
+    location = location.strip()
+    if location:
+        if location.lower() in CITIES:
+            clauses.append({"city": location.lower()})
+        else:
+            document_clauses.append({"$contains": location})
+
+    if _parse_bool(filters.get("has_email"), "has_email"):
+        clauses.append({"has_email": True})
+
+    where = clauses[0] if len(clauses) == 1 else ({"$and": clauses} if clauses else None)
+    where_document = document_clauses[0] if len(document_clauses) == 1 else ({"$and": document_clauses} if document_clauses else None)
+    return where, where_document
@@ -0,0 +1,287 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from .config import Config
+
+# Background ingestion jobs. Job state and every progress event are kept in
+# SQLite so any gunicorn worker can report on a job, a client can reconnect and
+# replay from the last event it saw, and a job whose worker died can be resumed.
+# Resuming is just running ingest again: the manifest only records committed
+# files, so the rerun starts at the first file that was not committed.
+#
+# Each job has a kind. Only a full folder sync ("sync") can be rerun from
+# scratch, so only it is resumed automatically; an upload ("upload"), watcher
+# subset ("watch") or snapshot import ("import") always gets a fresh job.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    collection TEXT NOT NULL,
+    status TEXT NOT NULL,
+    owner TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    heartbeat REAL NOT NULL,
+    runs INTEGER NOT NULL DEFAULT 1,
+    last_event TEXT,
+    kind TEXT NOT NULL DEFAULT 'sync'
+);
+CREATE INDEX IF NOT EXISTS jobs_collection ON jobs (collection, status);
+CREATE TABLE IF NOT EXISTS job_events (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    event TEXT NOT NULL,
+    PRIMARY KEY (job_id, seq)
+);
+"""
+
+ACTIVE = ("queued", "running")
+TERMINAL = ("complete", "error")
+RESUMABLE = ("sync",)
+
+_initialized = False
+
+
+def _connect():
+    global _initialized
+    conn = sqlite3.connect(Config.JOBS_PATH, timeout=30, isolation_level=None)
+    if not _initialized:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        # Job stores created before jobs had a kind
+        if "kind" not in {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}:
+            conn.execute("ALTER TABLE jobs ADD COLUMN kind TEXT NOT NULL DEFAULT 'sync'")
+        _initialized = True
+    return conn
+
+
+def _owner():
+    return f"{os.getpid()}:{threading.get_ident()}"
+
+
+def _row_to_job(row):
+    if not row:
+        return None
+    job_id, collection, status, owner, created, updated, heartbeat, runs, last_event, kind = row
+    last = json.loads(last_event) if last_event else None
+    job = {
+        "id": job_id,
+        "collection": collection,
+        "kind": kind,
+        "status": status,
+        "created": created,
+        "updated": updated,
+        "runs": runs,
+        "last_event": last,
+    }
+    if status in ACTIVE and time.time() - heartbeat > Config.INGEST_JOB_STALE_SECONDS:
+        # Owner stopped heartbeating: its worker was killed or restarted
+        job["status"] = "interrupted"
+    if last:
+        job["percent"] = 100 if status == "complete" else last.get("percent")
+    return job
+
+
+def get_job(job_id):
+    conn = _connect()
+    try:
+        row = conn.execute(
+            "SELECT id, collection, status, owner, created, updated, heartbeat, runs, last_event, kind FROM jobs WHERE id = ?",
+            (job_id,)
+        ).fetchone()
+    finally:
+        conn.close()
+    return _row_to_job(row)
+
+
+def list_jobs(limit=20):
+    conn = _connect()
+    try:
+        rows = conn.execute(
+            "SELECT id, collection, status, owner, created, updated, heartbeat, runs, last_event, kind FROM jobs ORDER BY created DESC LIMIT ?",
+            (limit,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return [_row_to_job(row) for row in rows]
+
+
+def claim_job(collection, kind="sync", resume_job_id=None):
+    """
+    Claim the single ingest slot for a collection for a job of the given kind.
+
+    Returns (job, started). started is False when another live job already
+    holds the slot; that job is returned instead. resume_job_id, if it is
+    interrupted, is resumed under its own id; so is an interrupted job of the
+    same kind when that kind is RESUMABLE. Any other interrupted job is
+    superseded by a new one.
+    """
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        rows = conn.execute(
+            "SELECT id, heartbeat, kind FROM jobs WHERE collection = ? AND status IN ('queued', 'running', 'interrupted') ORDER BY created",
+            (collection,)
+        ).fetchall()
+
+        live = [job_id for job_id, heartbeat, _ in rows if now - heartbeat <= Config.INGEST_JOB_STALE_SECONDS]
+        if live:
+            conn.execute("COMMIT")
+            return get_job(live[0]), False
+
+        stale = [job_id for job_id, _, _ in rows]
+        same_kind = [job_id for job_id, _, job_kind in rows if job_kind == kind and kind in RESUMABLE]
+        job_id = resume_job_id if resume_job_id in stale else (same_kind[0] if same_kind else None)
+        if job_id:
+            conn.execute(
+                "UPDATE jobs SET status = 'running', owner = ?, updated = ?, heartbeat = ?, runs = runs + 1 WHERE id = ?",
+                (_owner(), now, now, job_id)
+            )
+        else:
+            # Old finished jobs keep their status row but not their event log
+            conn.execute(
+                "DELETE FROM job_events WHERE job_id IN (SELECT id FROM jobs WHERE status IN ('complete', 'error') AND updated < ?)",
+                (now - Config.INGEST_JOB_RETENTION_SECONDS,)
+            )
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, collection, kind, status, owner, created, updated, heartbeat) VALUES (?, ?, ?, 'running', ?, ?, ?, ?)",
+                (job_id, collection, kind, _owner(), now, now, now)
+            )
+        # Any other stale jobs for the collection are superseded by this one
+        conn.executemany(
+            "UPDATE jobs SET status = 'error', last_event = ? WHERE id = ?",
+            [(json.dumps({"status": "error", "message": f"Superseded by job {job_id}"}), other) for other in stale if other != job_id]
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return get_job(job_id), True
+
+
+def append_event(job_id, event):
+    """
+    Store a progress event and refresh the job's heartbeat. Returns the event's sequence number.
+    """
+    now = time.time()
+    payload = json.dumps(event)
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        seq = conn.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM job_events WHERE job_id = ?", (job_id,)).fetchone()[0]
+        conn.execute("INSERT INTO job_events (job_id, seq, event) VALUES (?, ?, ?)", (job_id, seq, payload))
+        conn.execute(
+            "UPDATE jobs SET updated = ?, heartbeat = ?, last_event = ? WHERE id = ?",
+            (now, now, payload, job_id)
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return seq
+
+
+def heartbeat(job_id):
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute("UPDATE jobs SET heartbeat = ? WHERE id = ? AND status = 'running'", (now, job_id))
+    finally:
+        conn.close()
+
+
+def finish_job(job_id, status):
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute("UPDATE jobs SET status = ?, updated = ?, heartbeat = ? WHERE id = ?", (status, now, now, job_id))
+    finally:
+        conn.close()
+
+
+def events_after(job_id, after=0, limit=500):
+    """
+    Return [(seq, event)] for events newer than after.
+    """
+    conn = _connect()
+    try:
+        rows = conn.execute(
+            "SELECT seq, event FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+            (job_id, after, limit)
+        ).fetchall()
+    finally:
+        conn.close()
+    return [(seq, json.loads(event)) for seq, event in rows]
+
+
+def start_background(collection, work, kind="sync", resume_job_id=None):
+    """
+    Run work() (a generator of progress events) as the collection's ingest job
+    of the given kind in a daemon thread. Returns (job, started) like claim_job.
+    """
+    job, started = claim_job(collection, kind, resume_job_id)
+    if not started:
+        return job, False
+
+    job_id = job["id"]
+    resumed = job["runs"] > 1
+
+    def run():
+        stop = threading.Event()
+
+        def beat():
+            # Keeps the job alive through long single-file stages with no events
+            while not stop.wait(Config.INGEST_JOB_STALE_SECONDS / 4):
+                heartbeat(job_id)
+
+        threading.Thread(target=beat, name=f"ingest-heartbeat-{job_id[:8]}", daemon=True).start()
+        status = "complete"
+        try:
+            if resumed:
+                append_event(job_id, {"status": "resumed", "message": "Resuming from the last committed file", "job_id": job_id})
+            for event in work():
+                append_event(job_id, event)
+                if event.get("status") == "error" and "file" not in event:
+                    status = "error"
+        except Exception as e:
+            print(f"Error during ingestion job {job_id}: {e}")
+            import traceback
+            traceback.print_exc()
+            append_event(job_id, {"status": "error", "message": str(e)})
+            status = "error"
+        finally:
+            stop.set()
+            finish_job(job_id, status)
+
+    threading.Thread(target=run, name=f"ingest-job-{job_id[:8]}", daemon=True).start()
+    return job, True
+
+
+def stream_events(job_id, after=0, max_seconds=None):
+    """
+    Yield (seq, event) as they are recorded until the job ends or max_seconds pass.
+    """
+    deadline = time.monotonic() + (max_seconds or Config.INGEST_STREAM_SECONDS)
+    while True:
+        batch = events_after(job_id, after)
+        for seq, event in batch:
+            after = seq
+            yield seq, event
+        if batch:
+            continue
+
+        job = get_job(job_id)
+        if not job or job["status"] in TERMINAL or job["status"] == "interrupted":
+            return
+        if time.monotonic() >= deadline:
+            return
+        time.sleep(0.25)
@@ -0,0 +1,176 @@
+import re
+import math
+import sqlite3
+from contextlib import contextmanager
+from collections import Counter
+from .config import Config
+
+# BM25 inverted index over resume text, kept next to the ChromaDB collection and
+# updated whenever vectors are added or removed. It catches exact skill tokens
+# ("Kubernetes", "PySpark", "C++") that MiniLM embeddings blur or truncate away.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    doc_id TEXT PRIMARY KEY,
+    length INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc_id TEXT NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc_id ON postings (doc_id);
+"""
+
+# BM25 parameters (Robertson/Sparck Jones defaults)
+K1 = 1.2
+B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+
+_STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the to was were will with
+we you your our they their this those these who what which can must should would may about into
+over per than then also etc all any us
+""".split())
+
+
+@contextmanager
+def _connect():
+    conn = sqlite3.connect(Config.LEXICAL_INDEX_PATH, timeout=30)
+    try:
+        conn.executescript(_SCHEMA)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def tokenize(text):
+    """
+    Lowercased word tokens without stopwords, keeping skills like c++, c# and node.js intact.
+    """
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def _chunks(values, size=500):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _delete(conn, doc_ids):
+    for chunk in _chunks(doc_ids):
+        marks = ",".join("?" * len(chunk))
+        conn.execute(f"DELETE FROM postings WHERE doc_id IN ({marks})", chunk)
+        conn.execute(f"DELETE FROM docs WHERE doc_id IN ({marks})", chunk)
+
+
+def _doc_freq(conn, terms):
+    doc_freq = {}
+    for chunk in _chunks(terms):
+        marks = ",".join("?" * len(chunk))
+        doc_freq.update(conn.execute(
+            f"SELECT term, COUNT(*) FROM postings WHERE term IN ({marks}) GROUP BY term", chunk
+        ))
+    return doc_freq
+
+
+def add_documents(documents):
+    """
+    Index [(doc_id, text)], replacing any previous entry for the same ids.
+    """
+    if not documents:
+        return
+    with _connect() as conn:
+        _delete(conn, [doc_id for doc_id, _ in documents])
+        for doc_id, text in documents:
+            counts = Counter(tokenize(text or ""))
+            conn.execute("INSERT INTO docs (doc_id, length) VALUES (?, ?)", (doc_id, sum(counts.values())))
+            conn.executemany(
+                "INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+                [(term, doc_id, tf) for term, tf in counts.items()]
+            )
+
+
+def remove_documents(doc_ids):
+    if not doc_ids:
+        return
+    with _connect() as conn:
+        _delete(conn, doc_ids)
+
+
+def indexed_ids():
+    with _connect() as conn:
+        return {row[0] for row in conn.execute("SELECT doc_id FROM docs")}
+
+
+def count():
+    with _connect() as conn:
+        return conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+
+def clear():
+    with _connect() as conn:
+        conn.execute("DELETE FROM postings")
+        conn.execute("DELETE FROM docs")
+
+
+def search(query, limit=30, max_terms=64):
+    """
+    BM25-rank indexed documents against query. Returns [(doc_id, score)], best first.
+    Only the max_terms rarest query terms are scored: long job descriptions are
+    mostly common words whose posting lists are large and barely move the ranking.
+    """
+    terms = sorted(set(tokenize(query)))
+    if not terms:
+        return []
+
+    with _connect() as conn:
+        total, avg_length = conn.execute("SELECT COUNT(*), AVG(length) FROM docs").fetchone()
+        if not total:
+            return []
+        avg_length = avg_length or 1.0
+
+        doc_freq = _doc_freq(conn, terms)
+        idf = {
+            term: math.log(1 + (total - df + 0.5) / (df + 0.5))
+            for term, df in sorted(doc_freq.items(), key=lambda item: item[1])[:max_terms]
+        }
+
+        scores = {}
+        marks = ",".join("?" * len(idf))
+        cursor = conn.execute(
+            f"SELECT p.term, p.doc_id, p.tf, d.length FROM postings p JOIN docs d ON d.doc_id = p.doc_id WHERE p.term IN ({marks})",
+            list(idf)
+        ) if idf else ()
+        for term, doc_id, tf, length in cursor:
+            norm = tf + K1 * (1 - B + B * length / avg_length)
+            scores[doc_id] = scores.get(doc_id, 0.0) + idf[term] * tf * (K1 + 1) / norm
+
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+def idf_weights(terms):
+    """
+    BM25 idf of each term over the indexed resumes. Terms no resume contains are left out.
+    """
+    terms = sorted(set(terms))
+    with _connect() as conn:
+        total = conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+        doc_freq = _doc_freq(conn, terms)
+    return {term: math.log(1 + (total - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+
+
+def reciprocal_rank_fusion(rankings, k=60, limit=None):
+    """
+    Fuse several best-first lists of ids: score(id) = sum of 1 / (k + rank).
+    Returns ids, best first.
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    ordered = sorted(fused, key=lambda doc_id: fused[doc_id], reverse=True)
+    return ordered[:limit] if limit else ordered
@@ -0,0 +1,132 @@
+import re
+import json
+import time
+import hashlib
+import sqlite3
+from contextlib import contextmanager
+import threading
+from .config import Config
+from . import metrics
+
+# On-disk cache of LLM analyses keyed by resume content, normalized job
+# description, model and prompt version. Entries expire after a TTL and the
+# least recently used ones are evicted once the cache is over its size limit.
+# Only successful analyses are ever stored; callers must not put fallbacks.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS analyses_accessed ON analyses (accessed);
+"""
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expired": 0}
+
+
+@contextmanager
+def _connect():
+    conn = sqlite3.connect(Config.LLM_CACHE_PATH, timeout=30)
+    try:
+        conn.executescript(_SCHEMA)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _count(name, n=1):
+    with _stats_lock:
+        _stats[name] += n
+    metrics.inc("llm_cache", n, result=name)
+
+
+def normalize_job_description(job_description):
+    """
+    Case- and whitespace-insensitive form of a job description.
+    """
+    return re.sub(r'\s+', ' ', job_description).strip().lower()
+
+
+def make_key(resume_text, job_description, model, prompt_version):
+    resume_hash = hashlib.sha256(resume_text.encode('utf-8')).hexdigest()
+    jd_hash = hashlib.sha256(normalize_job_description(job_description).encode('utf-8')).hexdigest()
+    return f"{resume_hash}:{jd_hash}:{model}:{prompt_version}"
+
+
+def get(key):
+    """
+    Return the cached analysis for key, or None on a miss or expired entry.
+    """
+    if not Config.LLM_CACHE_ENABLED:
+        return None
+    now = time.time()
+    try:
+        with _connect() as conn:
+            row = conn.execute("SELECT value, created FROM analyses WHERE key = ?", (key,)).fetchone()
+            if row and now - row[1] > Config.LLM_CACHE_TTL:
+                conn.execute("DELETE FROM analyses WHERE key = ?", (key,))
+                _count("expired")
+                row = None
+            if row:
+                conn.execute("UPDATE analyses SET accessed = ? WHERE key = ?", (now, key))
+    except sqlite3.Error as e:
+        print(f"[WARN] LLM cache read failed: {e}")
+        row = None
+
+    if row:
+        _count("hits")
+        return json.loads(row[0])
+    _count("misses")
+    return None
+
+
+def put(key, analysis):
+    """
+    Store a successful analysis and evict least recently used entries over the size limit.
+    """
+    if not Config.LLM_CACHE_ENABLED:
+        return
+    now = time.time()
+    try:
+        with _connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO analyses (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(analysis), now, now)
+            )
+            total = conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+            overflow = total - Config.LLM_CACHE_MAX_ENTRIES
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM analyses WHERE key IN (SELECT key FROM analyses ORDER BY accessed LIMIT ?)",
+                    (overflow,)
+                )
+                _count("evictions", overflow)
+        _count("stores")
+    except sqlite3.Error as e:
+        print(f"[WARN] LLM cache write failed: {e}")
+
+
+def stats():
+    """
+    Process-local hit/miss counters plus the current number of cached entries.
+    """
+    with _stats_lock:
+        result = dict(_stats)
+    lookups = result["hits"] + result["misses"]
+    result["hit_rate"] = round(result["hits"] / lookups, 3) if lookups else 0.0
+    result["enabled"] = Config.LLM_CACHE_ENABLED
+    try:
+        with _connect() as conn:
+            result["entries"] = conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+    except sqlite3.Error:
+        result["entries"] = None
+    return result
+
+
+def clear():
+    with _connect() as conn:
+        conn.execute("DELETE FROM analyses")
@@ -0,0 +1,303 @@
+import os
+import hashlib
+import sqlite3
+from contextlib import contextmanager
+from .config import Config
+
+# Persistent record of every ingested file: where it lives, what it looked like
+# on disk, what it contained and which ChromaDB document holds its vector.
+# Identical files share one document, so doc_id may point at another file.
+# The state table holds markers for syncs that would otherwise have to list
+# the whole collection to find out there is nothing to do.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    root TEXT NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    doc_id TEXT NOT NULL,
+    PRIMARY KEY (root, name)
+);
+CREATE INDEX IF NOT EXISTS files_doc_id ON files (doc_id);
+CREATE INDEX IF NOT EXISTS files_sha256 ON files (sha256);
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+@contextmanager
+def _connect():
+    """
+    Connection for one transaction: committed (or rolled back) and closed on exit.
+    """
+    conn = sqlite3.connect(Config.MANIFEST_PATH, timeout=30)
+    try:
+        conn.executescript(_SCHEMA)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def hash_file(file_path):
+    """
+    SHA-256 of a file's contents.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _chunks(values, size=500):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _rows_where(conn, clause, params):
+    cursor = conn.execute(f"SELECT name, size, mtime_ns, sha256, doc_id FROM files WHERE {clause}", params)
+    return {
+        name: {"name": name, "size": size, "mtime_ns": mtime_ns, "sha256": sha256, "doc_id": doc_id}
+        for name, size, mtime_ns, sha256, doc_id in cursor
+    }
+
+
+def load_rows(root, names=None):
+    """
+    Return {name: row dict} for every file recorded under root, or only for names.
+    """
+    with _connect() as conn:
+        if names is None:
+            return _rows_where(conn, "root = ?", (root,))
+        rows = {}
+        for chunk in _chunks(names):
+            marks = ",".join("?" * len(chunk))
+            rows.update(_rows_where(conn, f"root = ? AND name IN ({marks})", (root, *chunk)))
+        return rows
+
+
+def load_aliases(root, doc_ids):
+    """
+    Return {name: row dict} for files under root that share one of doc_ids' vectors.
+    """
+    rows = {}
+    with _connect() as conn:
+        for chunk in _chunks(doc_ids):
+            marks = ",".join("?" * len(chunk))
+            rows.update(_rows_where(conn, f"root = ? AND doc_id IN ({marks}) AND name != doc_id", (root, *chunk)))
+    return rows
+
+
+def load_hash_index(hashes):
+    """
+    Return {sha256: doc_id} for the given hashes that already have a vector.
+    """
+    index = {}
+    with _connect() as conn:
+        for chunk in _chunks(hashes):
+            marks = ",".join("?" * len(chunk))
+            cursor = conn.execute(
+                f"SELECT sha256, doc_id FROM files WHERE name = doc_id AND sha256 IN ({marks})", chunk
+            )
+            index.update(cursor)
+    return index
+
+
+def is_empty():
+    with _connect() as conn:
+        return conn.execute("SELECT 1 FROM files LIMIT 1").fetchone() is None
+
+
+def record(root, rows):
+    """
+    Insert or update manifest rows (dicts with name, size, mtime_ns, sha256, doc_id).
+    """
+    if not rows:
+        return
+    with _connect() as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO files (root, name, size, mtime_ns, sha256, doc_id) VALUES (?, ?, ?, ?, ?, ?)",
+            [(root, r["name"], r["size"], r["mtime_ns"], r["sha256"], r["doc_id"]) for r in rows]
+        )
+
+
+def remove(root, names):
+    if not names:
+        return
+    with _connect() as conn:
+        conn.executemany("DELETE FROM files WHERE root = ? AND name = ?", [(root, n) for n in names])
+
+
+def forget_docs(doc_ids):
+    """
+    Drop every file pointing at the given documents, so the next sync re-ingests them.
+    Used when resumes are deleted from the database but kept on disk.
+    """
+    if not doc_ids:
+        return
+    with _connect() as conn:
+        conn.executemany("DELETE FROM files WHERE doc_id = ?", [(d,) for d in doc_ids])
+
+
+def get_state(key):
+    with _connect() as conn:
+        row = conn.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+
+def set_state(key, value):
+    """
+    Store a sync marker; None removes it.
+    """
+    with _connect() as conn:
+        if value is None:
+            conn.execute("DELETE FROM state WHERE key = ?", (key,))
+        else:
+            conn.execute("INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)", (key, str(value)))
+
+
+def clear():
+    """
+    Forget every file and sync marker, e.g. after the collection has been recreated.
+    """
+    with _connect() as conn:
+        conn.execute("DELETE FROM files")
+        conn.execute("DELETE FROM state")
+
+
+def plan_sync(root, known_ids=None, names=None):
+    """
+    Compare the resumes folder against the manifest.
+
+    Files whose size and mtime match the manifest are skipped without being
+    read. Everything else is hashed to tell real edits from touches and to
+    spot content that is already indexed under another name.
+
+    known_ids: ids already in ChromaDB, only needed to adopt existing vectors
+    when the manifest is empty (first run on an old database).
+    names: only look at these files (e.g. from the folder watcher) instead of
+    scanning the whole folder. A listed file missing from disk counts as deleted.
+
+    Returns a dict with:
+        unchanged  - names of files skipped on the stat check
+        record     - rows whose vector already exists (touches, duplicates, adoptions)
+        to_embed   - rows needing a new vector, each with an "aliases" list of
+                     identical files to record once it lands
+        deleted    - names gone from disk
+        stale_docs - doc ids whose owning file was deleted or changed
+        rehome     - {stale doc id: identical surviving file to move its vector to}
+    """
+    # Pass 1: stat only
+    on_disk = {}
+    if names is None:
+        rows = load_rows(root)
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if entry.name.lower().endswith(".pdf") and entry.is_file():
+                    st = entry.stat()
+                    on_disk[entry.name] = (st.st_size, st.st_mtime_ns)
+    else:
+        names = [name for name in set(names) if name.lower().endswith(".pdf")]
+        rows = load_rows(root, names)
+        for name in names:
+            try:
+                st = os.stat(os.path.join(root, name))
+            except FileNotFoundError:
+                continue
+            on_disk[name] = (st.st_size, st.st_mtime_ns)
+
+    deleted = [name for name in rows if name not in on_disk]
+    deleted_set = set(deleted)
+    changed = []
+    unchanged = []
+    for name, (size, mtime_ns) in on_disk.items():
+        row = rows.get(name)
+        if row and row["size"] == size and row["mtime_ns"] == mtime_ns:
+            unchanged.append(name)
+        else:
+            changed.append((name, size, mtime_ns))
+
+    # Pass 2: hash only what the stat check could not rule out
+    hashed = []
+    for name, size, mtime_ns in changed:
+        try:
+            digest = hash_file(os.path.join(root, name))
+        except OSError as e:
+            print(f"[WARN] Could not read {name}: {e}")
+            continue
+        hashed.append({"name": name, "size": size, "mtime_ns": mtime_ns, "sha256": digest})
+
+    if not hashed and not deleted:
+        return {"unchanged": unchanged, "record": [], "to_embed": [], "deleted": [], "stale_docs": [], "rehome": {}}
+
+    modified = set()
+    touched = {}
+    for entry in hashed:
+        row = rows.get(entry["name"])
+        if row and row["sha256"] == entry["sha256"]:
+            touched[entry["name"]] = dict(entry, doc_id=row["doc_id"])
+        else:
+            modified.add(entry["name"])
+
+    # A document goes stale when the file that owns it is deleted or edited
+    stale_docs = {name for name in deleted if rows[name]["doc_id"] == name}
+    stale_docs.update(name for name in modified if name in rows and rows[name]["doc_id"] == name)
+
+    # Identical files that survive keep the stale document's vector under their own name
+    survivors = {}
+    alias_rows = load_aliases(root, stale_docs) if stale_docs else {}
+    for name, row in alias_rows.items():
+        if name in modified or name in deleted_set:
+            continue
+        # Outside a full scan, aliases we were not told about are checked on disk
+        if name not in on_disk and (names is None or not os.path.isfile(os.path.join(root, name))):
+            continue
+        survivors.setdefault(row["doc_id"], []).append(name)
+    rows.update({name: row for name, row in alias_rows.items() if name not in rows})
+
+    hash_index = load_hash_index({entry["sha256"] for entry in hashed} | {rows[doc]["sha256"] for doc in survivors})
+
+    to_record = list(touched.values())
+    rehome = {}
+    for doc_id, alias_names in survivors.items():
+        new_owner = sorted(alias_names)[0]
+        rehome[doc_id] = new_owner
+        hash_index[rows[doc_id]["sha256"]] = new_owner
+        for name in alias_names:
+            to_record.append(dict(touched.get(name, rows[name]), doc_id=new_owner))
+
+    to_embed = []
+    pending = {}
+    known_ids = set(known_ids or ())
+    for entry in hashed:
+        name, digest = entry["name"], entry["sha256"]
+        if name not in modified:
+            continue
+
+        canonical = hash_index.get(digest)
+        if canonical and canonical not in stale_docs:
+            to_record.append(dict(entry, doc_id=canonical))
+        elif digest in pending:
+            pending[digest]["aliases"].append(dict(entry, doc_id=pending[digest]["name"]))
+        elif name not in rows and name in known_ids:
+            # Indexed before the manifest existed
+            to_record.append(dict(entry, doc_id=name))
+            hash_index[digest] = name
+        else:
+            pending[digest] = dict(entry, doc_id=name, aliases=[])
+            to_embed.append(pending[digest])
+
+    return {
+        "unchanged": unchanged,
+        "record": to_record,
+        "to_embed": to_embed,
+        "deleted": deleted,
+        "stale_docs": sorted(stale_docs),
+        "rehome": rehome,
+    }
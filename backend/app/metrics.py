@@ -0,0 +1,161 @@
+import os
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from .config import Config
+
+# Per-stage timers and counters, exposed in Prometheus text format on /metrics.
+# Stdlib only: every process keeps its own registry, so under gunicorn each
+# scrape reports the worker that answered it (identified by the pid label on
+# resume_app_info).
+#
+# Stages timed: pdf_read, embed, chroma_add, passage_add, sketch_add,
+# chroma_query, chroma_get, vector_search, passage_query, bm25_search, dedup,
+# rerank, prompt_build, llm_call, json_repair. passage_add and chroma_add include the time to embed what they
+# store (chroma_add not with VECTOR_ENGINE=numpy, which embeds beforehand);
+# queries are embedded separately.
+#
+# Stage times are also collected per HTTP request; requests slower than
+# SLOW_REQUEST_SECONDS are logged with that breakdown.
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_lock = threading.Lock()
+_histograms = {}   # (name, labels) -> [bucket counts..., sum, count]
+_counters = {}     # (name, labels) -> value
+_help = {
+    "resume_stage_seconds": ("histogram", "Time spent in each processing stage."),
+    "resume_request_seconds": ("histogram", "HTTP request duration, until the response is fully sent."),
+    "resume_events_total": ("counter", "Fallbacks, cache results and other notable events."),
+}
+
+_current_trace = contextvars.ContextVar("resume_request_trace", default=None)
+
+
+class RequestTrace:
+    """
+    Stage totals for one HTTP request. Shared with the threads it fans out to.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            total, count = self.stages.get(stage, (0.0, 0))
+            self.stages[stage] = (total + seconds, count + 1)
+
+    def breakdown(self):
+        with self._lock:
+            return " ".join(
+                f"{stage}={total:.3f}s({count})"
+                for stage, (total, count) in sorted(self.stages.items(), key=lambda item: -item[1][0])
+            )
+
+
+def _labels(labels):
+    return tuple(sorted((labels or {}).items()))
+
+
+def _observe(name, labels, seconds):
+    key = (name, _labels(labels))
+    with _lock:
+        values = _histograms.get(key)
+        if values is None:
+            values = _histograms[key] = [0] * len(STAGE_BUCKETS) + [0.0, 0]
+        for i, bound in enumerate(STAGE_BUCKETS):
+            if seconds <= bound:
+                values[i] += 1
+        values[-2] += seconds
+        values[-1] += 1
+
+
+def observe(stage, seconds):
+    """
+    Record seconds spent in a stage, globally and on the current request's trace.
+    """
+    _observe("resume_stage_seconds", {"stage": stage}, seconds)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(stage, seconds)
+
+
+@contextmanager
+def timer(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start)
+
+
+def inc(event, n=1, **labels):
+    """
+    Count an event, e.g. inc("llm_fallback", reason="timeout") or inc("llm_cache", result="hit").
+    """
+    key = ("resume_events_total", _labels(dict(labels, event=event)))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + n
+
+
+def start_request():
+    trace = RequestTrace()
+    _current_trace.set(trace)
+    return trace
+
+
+def finish_request(trace, method, endpoint, status, path):
+    seconds = time.perf_counter() - trace.started
+    _observe("resume_request_seconds", {"method": method, "endpoint": endpoint, "status": str(status)}, seconds)
+    if Config.SLOW_REQUEST_SECONDS and seconds >= Config.SLOW_REQUEST_SECONDS:
+        print(f"[WARN] Slow request {method} {path} {seconds:.2f}s status={status} stages: {trace.breakdown() or 'none'}")
+
+
+def propagate(fn):
+    """
+    Wrap fn so it runs with the caller's request trace, e.g. in a thread pool.
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs)
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join(f'{key}="{str(value)}"'.replace("\n", " ") for key, value in pairs)
+    return "{" + body + "}"
+
+
+def render():
+    """
+    Prometheus text exposition of every metric recorded by this process.
+    """
+    with _lock:
+        histograms = {key: list(values) for key, values in _histograms.items()}
+        counters = dict(_counters)
+
+    lines = [
+        "# HELP resume_app_info Process serving this scrape.",
+        "# TYPE resume_app_info gauge",
+        f'resume_app_info{{pid="{os.getpid()}"}} 1',
+    ]
+    for name, (kind, text) in _help.items():
+        lines.append(f"# HELP {name} {text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "histogram":
+            for (metric, labels), values in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                for bound, count in zip(STAGE_BUCKETS, values):
+                    lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {count}")
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {values[-1]}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {values[-2]:.6f}")
+                lines.append(f"{name}_count{_format_labels(labels)} {values[-1]}")
+        else:
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
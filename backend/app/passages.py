@@ -0,0 +1,107 @@
+import re
+from .config import Config
+
+# Section-aware passages. Resumes are split at their section headings
+# (experience, skills, education, ...) and long sections into overlapping word
+# windows that fit MiniLM's 256-token input, so text deep in a resume is
+# embedded too. Passages live in their own collection with the resume id as
+# "parent"; retrieval ranks resumes by their best passages and the LLM prompt
+# is packed from the passages that match the job description.
+
+# Bump when splitting changes; resumes with an older version are re-split on the next sync
+PASSAGES_VERSION = 1
+
+# Passages fetched per resume wanted when ranking resumes by passage
+QUERY_PASSAGES_PER_RESUME = 4
+
+SECTIONS = {
+    "summary": ["summary", "profile", "professional summary", "objective", "about me", "career objective"],
+    "experience": ["experience", "work experience", "professional experience", "employment", "employment history",
+                   "work history", "career history", "relevant experience"],
+    "skills": ["skills", "technical skills", "core skills", "key skills", "competencies", "core competencies",
+               "technologies", "tech stack", "tools"],
+    "education": ["education", "academic background", "qualifications", "academic qualifications"],
+    "projects": ["projects", "personal projects", "key projects", "selected projects"],
+    "certifications": ["certifications", "certificates", "licenses", "courses", "training"],
+    "other": ["publications", "awards", "achievements", "languages", "interests", "volunteering", "references"],
+}
+
+_HEADING = {alias: section for section, aliases in SECTIONS.items() for alias in aliases}
+# A heading is a short line that is only the section name, optionally with a trailing colon
+_HEADING_RE = re.compile(
+    r"^[ \t]*(" + "|".join(re.escape(a) for a in sorted(_HEADING, key=len, reverse=True)) + r")[ \t]*:?[ \t]*$",
+    re.IGNORECASE | re.MULTILINE
+)
+_WORD_RE = re.compile(r"\S+\s*")
+
+
+def split_sections(text):
+    """
+    [(section, text)] in document order. Text before the first heading (name,
+    contact details, headline) is the "header" section.
+    """
+    sections = []
+    last_section, last_end = "header", 0
+    for match in _HEADING_RE.finditer(text):
+        body = text[last_end:match.start()].strip()
+        if body:
+            sections.append((last_section, body))
+        last_section, last_end = _HEADING[match.group(1).lower()], match.end()
+    body = text[last_end:].strip()
+    if body:
+        sections.append((last_section, body))
+    return sections
+
+
+def split(text, words=None, overlap=None):
+    """
+    Passages of at most `words` words, never crossing a section boundary.
+    Returns [{"section", "position", "text"}] in document order.
+    """
+    words = words or Config.PASSAGE_WORDS
+    overlap = min(words // 2, Config.PASSAGE_OVERLAP_WORDS if overlap is None else overlap)
+    passages = []
+    for section, body in split_sections(text or ""):
+        # Words with their trailing whitespace, so passages keep the resume's line breaks
+        tokens = _WORD_RE.findall(body)
+        start = 0
+        while start < len(tokens):
+            chunk = tokens[start:start + words]
+            passages.append({"section": section, "position": len(passages), "text": "".join(chunk).strip()})
+            if start + words >= len(tokens):
+                break
+            start += words - overlap
+    return passages
+
+
+def pack(passages, budget=None, cost=len):
+    """
+    Build LLM context for one resume from its passages, given best match first
+    as {"section", "position", "text"} dicts. The header passage (who the
+    candidate is) is kept, then the best matches until `budget` is used, as
+    measured by cost (default characters, e.g. prompt.count_tokens for a
+    token budget). The result is in document order with a label per section.
+    """
+    budget = budget or Config.PASSAGE_PROMPT_CHARS
+    header = [p for p in passages if p["position"] == 0]
+    chosen = []
+    used = 0
+    for passage in header + [p for p in passages if p["position"] != 0]:
+        # Counted as if under its own section label
+        passage_cost = cost(f"[{passage['section'].title()}]\n{passage['text']}\n")
+        if used + passage_cost > budget:
+            if chosen:
+                continue
+            # Always send something, even if the best passage alone is over budget
+            passage = dict(passage, text=passage["text"][:budget])
+        chosen.append(passage)
+        used += passage_cost
+
+    lines = []
+    last_section = None
+    for passage in sorted(chosen, key=lambda p: p["position"]):
+        if passage["section"] != last_section:
+            lines.append(f"[{passage['section'].title()}]")
+            last_section = passage["section"]
+        lines.append(passage["text"])
+    return "\n".join(lines)
@@ -0,0 +1,159 @@
+import re
+import threading
+from .config import Config
+from . import digests
+from . import metrics
+
+# Token-budgeted LLM analysis prompts. The job description is cut to
+# LLM_JD_TOKENS and the resume digest (see digests.py) fills the rest of
+# LLM_PROMPT_TOKENS, counted with the LLM's own tokenizer and cut at a line or
+# word boundary. PROMPT_BUILDER=legacy keeps the old character slicing
+# (3000 resume / 500 job description characters) for comparison.
+#
+# PROMPT_TOKENIZER names a Hugging Face tokenizer (default: LLM_MODEL). When
+# it cannot be loaded (offline, gated model, "estimate"), tokens are estimated
+# from word lengths, erring high so the budget still holds.
+
+TEMPLATE = """[INST] You are an expert HR recruiter. Analyze this resume against the job requirements and respond with ONLY valid JSON.
+
+Job Requirements:
+{job}
+
+Candidate Resume:
+{resume}
+
+Respond with this exact JSON format (nothing else):
+{{
+    "match_percentage": 75,
+    "summary": "two sentence candidate summary",
+    "pros": ["strength 1", "strength 2"],
+    "cons": ["gap 1", "gap 2"],
+    "evidence": ["quote from resume"]
+}}
+[/INST]"""
+
+LEGACY_RESUME_CHARS = 3000
+LEGACY_JD_CHARS = 500
+
+# Estimator: one token per punctuation mark, and per started 5 characters of a word
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+_CHARS_PER_TOKEN = 5
+
+_tokenizer = None
+_tokenizer_failed = False
+_tokenizer_lock = threading.Lock()
+
+
+def enabled():
+    return Config.PROMPT_BUILDER != "legacy"
+
+
+def _get_tokenizer():
+    global _tokenizer, _tokenizer_failed
+    if _tokenizer is not None or _tokenizer_failed:
+        return _tokenizer
+    with _tokenizer_lock:
+        if _tokenizer is None and not _tokenizer_failed:
+            if Config.PROMPT_TOKENIZER == "estimate":
+                _tokenizer_failed = True
+                return None
+            try:
+                from transformers import AutoTokenizer
+                print(f"[INFO] Loading tokenizer {Config.PROMPT_TOKENIZER}...")
+                tokenizer = AutoTokenizer.from_pretrained(Config.PROMPT_TOKENIZER, token=Config.HUGGINGFACE_API_KEY or None)
+                if not tokenizer.is_fast:
+                    raise ValueError("no fast tokenizer, so no character offsets")
+                _tokenizer = tokenizer
+                print("[OK] Tokenizer loaded")
+            except Exception as e:
+                print(f"[WARN] Could not load tokenizer {Config.PROMPT_TOKENIZER} ({e}), estimating prompt tokens")
+                _tokenizer_failed = True
+    return _tokenizer
+
+
+def tokenizer_name():
+    return Config.PROMPT_TOKENIZER if _get_tokenizer() is not None else "estimate"
+
+
+def _token_ends(text):
+    """
+    End offset in text of each of its tokens.
+    """
+    tokenizer = _get_tokenizer()
+    if tokenizer is not None:
+        offsets = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+        return [end for _, end in offsets]
+    ends = []
+    for match in _PIECE_RE.finditer(text):
+        start, end = match.span()
+        pieces = -(-(end - start) // _CHARS_PER_TOKEN)
+        ends.extend(min(end, start + (k + 1) * _CHARS_PER_TOKEN) for k in range(pieces))
+    return ends
+
+
+def count_tokens(text):
+    return len(_token_ends(text or ""))
+
+
+def truncate(text, max_tokens):
+    """
+    Longest prefix of text within max_tokens tokens, never ending mid-word.
+    A line break near the cut is preferred over a space.
+    """
+    text = text or ""
+    ends = _token_ends(text)
+    if len(ends) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+    cut = ends[max_tokens - 1]
+    head = text[:cut]
+    if text[cut:cut + 1].isspace():
+        return head.rstrip()
+    newline = head.rfind("\n")
+    if newline > 0 and newline >= 0.8 * len(head):
+        return head[:newline].rstrip()
+    space = max(head.rfind(" "), newline)
+    return head[:space].rstrip() if space > 0 else head
+
+
+def _job(job_description):
+    return truncate(digests.normalize(job_description), Config.LLM_JD_TOKENS)
+
+
+def resume_budget(job_description, budget=None):
+    """
+    Tokens left for the resume in a prompt of budget tokens (default
+    LLM_PROMPT_TOKENS) once the template and the job description are in.
+    """
+    budget = budget or Config.LLM_PROMPT_TOKENS
+    return max(0, budget - count_tokens(TEMPLATE.format(job=_job(job_description), resume="")))
+
+
+def build(resume_text, job_description, budget=None):
+    """
+    Analysis prompt of about budget tokens (default LLM_PROMPT_TOKENS): the job
+    description gets at most LLM_JD_TOKENS and the resume digest the rest.
+    Returns (prompt, prompt tokens).
+    """
+    with metrics.timer("prompt_build"):
+        job = _job(job_description)
+        resume = truncate(resume_text, resume_budget(job_description, budget))
+        prompt = TEMPLATE.format(job=job, resume=resume)
+        return prompt, count_tokens(prompt)
+
+
+def legacy(resume_text, job_description):
+    """
+    The character-sliced prompt used before the token budget.
+    """
+    return TEMPLATE.format(job=job_description[:LEGACY_JD_CHARS], resume=resume_text[:LEGACY_RESUME_CHARS])
+
+
+def cache_version(prompt_version):
+    """
+    Version for the analysis cache key: budgeted prompts also depend on the budget and tokenizer.
+    """
+    if not enabled():
+        return prompt_version
+    return f"{prompt_version}:budget:{Config.LLM_PROMPT_TOKENS}:{Config.LLM_JD_TOKENS}:{tokenizer_name()}"
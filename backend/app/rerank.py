@@ -0,0 +1,97 @@
+import math
+import threading
+from .config import Config
+from . import lexical
+from . import metrics
+
+# Local pre-ranking between retrieval and the LLM. A wide candidate set is
+# scored on CPU and only the best LLM_TOP_K are sent for LLM analysis, so LLM
+# spend per request stays flat however large the collection grows.
+#
+# Backends (RERANK_BACKEND):
+#   overlap       - idf-weighted share of the job description's terms found in
+#                   the resume; no model, microseconds per resume (default)
+#   cross-encoder - sentence-transformers CrossEncoder (RERANK_MODEL) scoring
+#                   each (job description, resume) pair; falls back to overlap
+#   off           - no pre-ranking, retrieve LLM_TOP_K and analyze them all
+
+_cross_encoder = None
+_cross_encoder_failed = False
+_cross_encoder_lock = threading.Lock()
+
+
+def enabled():
+    return Config.RERANK_BACKEND != "off"
+
+
+def _get_cross_encoder():
+    global _cross_encoder, _cross_encoder_failed
+    if _cross_encoder is not None or _cross_encoder_failed:
+        return _cross_encoder
+    with _cross_encoder_lock:
+        if _cross_encoder is None and not _cross_encoder_failed:
+            try:
+                from sentence_transformers import CrossEncoder
+                print(f"[INFO] Loading cross-encoder {Config.RERANK_MODEL}...")
+                _cross_encoder = CrossEncoder(Config.RERANK_MODEL, max_length=512, device='cpu')
+                print("[OK] Cross-encoder loaded")
+            except Exception as e:
+                print(f"[WARN] Could not load cross-encoder ({e}), pre-ranking by term overlap")
+                _cross_encoder_failed = True
+    return _cross_encoder
+
+
+def overlap_scores(job_description, docs):
+    """
+    0-100 per resume: the idf-weighted share of the job description's terms it contains.
+    """
+    weights = lexical.idf_weights(lexical.tokenize(job_description))
+    total = sum(weights.values())
+    if not total:
+        return [0.0] * len(docs)
+    scores = []
+    for doc in docs:
+        terms = set(lexical.tokenize(doc or ""))
+        matched = sum(weight for term, weight in weights.items() if term in terms)
+        scores.append(round(100 * matched / total, 1))
+    return scores
+
+
+def cross_encoder_scores(job_description, docs):
+    """
+    0-100 per resume from the cross-encoder's relevance logits, or None if it is unavailable.
+    """
+    model = _get_cross_encoder()
+    if model is None:
+        return None
+    logits = model.predict([(job_description, doc or "") for doc in docs], batch_size=16)
+    return [round(100 / (1 + math.exp(-float(logit))), 1) for logit in logits]
+
+
+def score(job_description, docs):
+    """
+    Local relevance score (0-100) for each resume, using RERANK_BACKEND.
+    """
+    if not docs:
+        return []
+    if Config.RERANK_BACKEND == "cross-encoder":
+        try:
+            scores = cross_encoder_scores(job_description, docs)
+            if scores is not None:
+                return scores
+        except Exception as e:
+            print(f"[WARN] Cross-encoder scoring failed ({e}), using term overlap")
+    return overlap_scores(job_description, docs)
+
+
+def select(job_description, docs, top_k=None):
+    """
+    Pre-rank candidates. Returns (selected, local_scores): indexes of the top_k
+    resumes to send to the LLM, best first, and the local score of every resume.
+    """
+    top_k = Config.LLM_TOP_K if top_k is None else top_k
+    with metrics.timer("rerank"):
+        local_scores = score(job_description, docs)
+    # Stable sort keeps retrieval order between equal scores
+    order = sorted(range(len(docs)), key=lambda i: local_scores[i], reverse=True)
+    return order[:top_k], local_scores
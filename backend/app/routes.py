@@ -1,69 +1,212 @@
 import os
-import tempfile
 from flask import Blueprint, request, jsonify, Response, stream_with_context, send_file
 import json
-import time
-from .services import get_chroma_collection, process_pdf, analyze_resume_with_huggingface, ingest_resumes_from_disk
+from .services import get_chroma_collection, retrieve_candidates, retrieve_candidates_batch, prompt_documents, prompt_report, remove_passages, iter_analyses, list_resumes_page, embedding_model_state, analyze_resumes_concurrently, iter_resume_analyses, ingest_resumes_from_disk, ingest_uploaded_files
 from .config import Config
+from . import manifest
+from . import lexical
+from . import vector_index
+from . import duplicates
+from . import digests
+from . import rerank
+from . import fields
+from . import llm_cache
+from . import jobs
+from . import watcher
 
 main_bp = Blueprint('main', __name__)
 
 
+@main_bp.route('/health', methods=['GET'])
+def health():
+    """
+    Liveness plus embedding model readiness.
+    Returns 503 until the model is loaded when called with ?ready=1.
+    """
+    model = embedding_model_state()
+    body = {
+        "status": "ok",
+        "ready": model["ready"],
+        "embedding_model": model,
+        "llm_configured": bool(Config.HUGGINGFACE_API_KEY or Config.HF_INFERENCE_URL),
+        "watcher": watcher.watcher_state()
+    }
+    if request.args.get('ready') in ('1', 'true') and not model["ready"]:
+        return jsonify(body), 503
+    return jsonify(body)
+
+
+def _stream_job(job_id, after=0):
+    """
+    NDJSON progress for an ingest job. Closes with a "detached" event if the job
+    is still running when INGEST_STREAM_SECONDS run out; reconnect with ?after=<seq>.
+    """
+    last_seq = after
+    try:
+        for seq, event in jobs.stream_events(job_id, after):
+            last_seq = seq
+            yield json.dumps(dict(event, seq=seq, job_id=job_id)) + '\n'
+        
+        job = jobs.get_job(job_id)
+        if job and job["status"] not in jobs.TERMINAL:
+            yield json.dumps({
+                "status": "detached" if job["status"] != "interrupted" else "interrupted",
+                "job_id": job_id,
+                "seq": last_seq,
+                "message": f"Job is {job['status']}; reconnect to /api/ingest/jobs/{job_id}/events?after={last_seq}"
+            }) + '\n'
+    except Exception as e:
+        print(f"Error streaming ingestion job {job_id}: {e}")
+        import traceback
+        traceback.print_exc()
+        yield json.dumps({
+            "status": "error",
+            "message": str(e)
+        }) + '\n'
 
 @main_bp.route('/ingest', methods=['POST'])
 def trigger_ingest():
     """
-    Manually trigger ingestion of resumes from disk.
-    Streams progress updates.
+    Start (or attach to) the background ingestion job for the resumes folder.
+    Streams its progress updates; with ?background=1 returns the job id right away.
     """
+    data = request.get_json(silent=True) or {}
+    background = bool(data.get('background')) or request.args.get('background') in ('1', 'true')
+    
     try:
-        def generate():
-            try:
-                for progress in ingest_resumes_from_disk():
-                    yield json.dumps(progress) + '\n'
-            except Exception as e:
-                print(f"Error during ingestion: {e}")
-                import traceback
-                traceback.print_exc()
-                yield json.dumps({
-                    "status": "error",
-                    "message": str(e)
-                }) + '\n'
-                
-        return Response(stream_with_context(generate()), mimetype='application/json')
+        job, started = jobs.start_background("resumes", ingest_resumes_from_disk)
     except Exception as e:
         print(f"Error starting ingestion: {e}")
         import traceback
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
+    
+    if background:
+        body = {
+            "job_id": job["id"],
+            "status": job["status"],
+            "started": started,
+            "job_url": f"/api/ingest/jobs/{job['id']}",
+            "events_url": f"/api/ingest/jobs/{job['id']}/events"
+        }
+        if not started:
+            body["message"] = "An ingest job is already running for this collection"
+            return jsonify(body), 409
+        return jsonify(body), 202
+    
+    def generate():
+        # Only one job runs per collection; a second caller follows the running one
+        yield json.dumps({"status": "job", "job_id": job["id"], "attached": not started}) + '\n'
+        yield from _stream_job(job["id"])
+    
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+@main_bp.route('/ingest/jobs', methods=['GET'])
+def list_ingest_jobs():
+    try:
+        return jsonify({"jobs": jobs.list_jobs()})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@main_bp.route('/ingest/jobs/<job_id>', methods=['GET'])
+def get_ingest_job(job_id):
+    job = jobs.get_job(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+@main_bp.route('/ingest/jobs/<job_id>/events', methods=['GET'])
+def stream_ingest_job(job_id):
+    """
+    Replay and follow a job's progress events after sequence number ?after=.
+    """
+    if not jobs.get_job(job_id):
+        return jsonify({"error": "Job not found"}), 404
+    try:
+        after = max(int(request.args.get('after', 0)), 0)
+    except ValueError:
+        return jsonify({"error": "after must be an integer"}), 400
+    return Response(stream_with_context(_stream_job(job_id, after)), mimetype='application/json')
+
+@main_bp.route('/ingest/jobs/<job_id>/resume', methods=['POST'])
+def resume_ingest_job(job_id):
+    """
+    Restart an interrupted job; it continues after the last committed file.
+    """
+    job = jobs.get_job(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    if job["status"] != "interrupted":
+        return jsonify({"error": f"Job is {job['status']}, only interrupted jobs can be resumed"}), 409
+    if job["kind"] not in jobs.RESUMABLE:
+        return jsonify({"error": f"A {job['kind']} job cannot be resumed; run it again instead"}), 409
+    
+    job, started = jobs.start_background("resumes", ingest_resumes_from_disk, resume_job_id=job_id)
+    if not started:
+        return jsonify({"error": "Another ingest job is running for this collection", "job_id": job["id"]}), 409
+    return jsonify({"job_id": job["id"], "status": job["status"], "runs": job["runs"]}), 202
 
 @main_bp.route('/resumes', methods=['GET'])
 def list_resumes():
     """
-    List all resumes currently in the database.
+    List resumes currently in the database, one page at a time.
+    Query params: limit, offset, prefix (filename prefix filter).
     """
     try:
-        collection = get_chroma_collection()
-        # Get all IDs and metadatas
-        data = collection.get()
-        
-        resumes = []
-        if data and data['ids']:
-            for i, id in enumerate(data['ids']):
-                meta = data['metadatas'][i] if data['metadatas'] else {}
-                resumes.append({
-                    "id": id,
-                    "filename": meta.get("source", id),
-                    "uploaded_at": meta.get("uploaded_at", "Unknown") # Placeholder if we add timestamps later
-                })
+        limit = min(max(int(request.args.get('limit', Config.RESUMES_PAGE_SIZE)), 1), Config.RESUMES_MAX_PAGE_SIZE)
+        offset = max(int(request.args.get('offset', 0)), 0)
+    except ValueError:
+        return jsonify({"error": "limit and offset must be integers"}), 400
+    prefix = request.args.get('prefix') or None
+    
+    try:
+        resumes, total = list_resumes_page(limit, offset, prefix)
+        next_offset = offset + len(resumes)
         
-        return jsonify({"resumes": resumes})
+        return jsonify({
+            "resumes": resumes,
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "next_offset": next_offset if next_offset < total else None
+        })
     except Exception as e:
         print(f"Error in list_resumes: {e}")
         import traceback
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
+@main_bp.route('/resumes/duplicates', methods=['GET'])
+def list_duplicate_resumes():
+    """
+    Groups of near-duplicate resumes, largest first.
+    Query params: threshold (0-1, default NEAR_DUPLICATE_THRESHOLD), limit.
+    """
+    if not duplicates.enabled():
+        return jsonify({"groups": [], "total": 0, "enabled": False})
+    try:
+        threshold = float(request.args.get('threshold', Config.NEAR_DUPLICATE_THRESHOLD))
+        limit = max(int(request.args.get('limit', 100)), 1)
+    except ValueError:
+        return jsonify({"error": "threshold must be a number and limit an integer"}), 400
+    if not 0 < threshold <= 1:
+        return jsonify({"error": "threshold must be between 0 and 1"}), 400
+    
+    try:
+        groups = duplicates.groups(threshold)
+        return jsonify({
+            "groups": [
+                {"ids": group["ids"], "pairs": [{"a": a, "b": b, "similarity": score} for a, b, score in group["pairs"]]}
+                for group in groups[:limit]
+            ],
+            "total": len(groups),
+            "threshold": threshold,
+            "enabled": True
+        })
+    except Exception as e:
+        print(f"Error in list_duplicate_resumes: {e}")
+        return jsonify({"error": str(e)}), 500
+
 @main_bp.route('/resumes/<resume_id>', methods=['GET', 'DELETE'])
 def manage_resume(resume_id):
     """
@@ -99,6 +242,13 @@ def manage_resume(resume_id):
             
             # Delete from ChromaDB
             collection.delete(ids=[resume_id])
+            lexical.remove_documents([resume_id])
+            vector_index.remove([resume_id])
+            duplicates.remove([resume_id])
+            digests.remove([resume_id])
+            remove_passages([resume_id])
+            # Let the next sync pick the file up again if it is still on disk
+            manifest.forget_docs([resume_id])
             
             # NOTE: User requested to NOT delete the actual file from disk
             # file_path = os.path.join(Config.get_resumes_dir(), filename)
@@ -137,6 +287,12 @@ def bulk_delete_resumes():
         
         # Delete from ChromaDB
         collection.delete(ids=ids_to_delete)
+        lexical.remove_documents(ids_to_delete)
+        vector_index.remove(ids_to_delete)
+        duplicates.remove(ids_to_delete)
+        digests.remove(ids_to_delete)
+        remove_passages(ids_to_delete)
+        manifest.forget_docs(ids_to_delete)
         
         # NOTE: Not deleting files from disk as requested
         
@@ -194,10 +350,60 @@ def scan_folder():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def _safe_upload_name(filename):
+    from werkzeug.utils import secure_filename
+    safe_filename = secure_filename(filename)
+    if not safe_filename:
+        import uuid
+        safe_filename = f"resume_{uuid.uuid4().hex}.pdf"
+    return safe_filename
+
+def _ingest_upload(files, background):
+    """
+    Ingest-on-upload: read the PDFs into memory and hand them to a background
+    ingest job that dedupes, saves, parses and embeds them in one pass.
+    """
+    uploads = []
+    for file in files:
+        if file.filename and file.filename.lower().endswith('.pdf'):
+            uploads.append((_safe_upload_name(file.filename), file.read()))
+    if not uploads:
+        return jsonify({"error": "No PDF files provided"}), 400
+    
+    print(f"Received {len(uploads)} files for ingest-on-upload")
+    try:
+        job, started = jobs.start_background("resumes", lambda: ingest_uploaded_files(uploads), kind="upload")
+    except Exception as e:
+        print(f"Error starting ingestion: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+    
+    if not started:
+        # The uploads would otherwise be dropped silently with the request
+        return jsonify({"error": "An ingest job is already running for this collection", "job_id": job["id"]}), 409
+    
+    if background:
+        return jsonify({
+            "job_id": job["id"],
+            "status": job["status"],
+            "count": len(uploads),
+            "job_url": f"/api/ingest/jobs/{job['id']}",
+            "events_url": f"/api/ingest/jobs/{job['id']}/events"
+        }), 202
+    
+    def generate():
+        yield json.dumps({"status": "job", "job_id": job["id"], "attached": False, "count": len(uploads)}) + '\n'
+        yield from _stream_job(job["id"])
+    
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
 @main_bp.route('/upload', methods=['POST'])
 def upload_resumes():
     """
     Upload PDF files from user-selected folder to the resumes directory.
+    With ?ingest=1 the files are also ingested from the upload itself and
+    per-file progress is streamed (?background=1 returns the job id instead).
     """
     print("\n" + "="*60)
     print("UPLOAD ENDPOINT HIT - Files are being uploaded to server!")
@@ -215,6 +421,10 @@ def upload_resumes():
         if len(files) == 0:
             return jsonify({"error": "No files selected"}), 400
         
+        if request.args.get('ingest') in ('1', 'true') or request.form.get('ingest') in ('1', 'true'):
+            background = request.args.get('background') in ('1', 'true') or request.form.get('background') in ('1', 'true')
+            return _ingest_upload(files, background)
+        
         print(f"Received {len(files)} files for upload")
         processed_count = 0
         errors = []
@@ -228,12 +438,7 @@ def upload_resumes():
                 continue
                 
             try:
-                from werkzeug.utils import secure_filename
-                safe_filename = secure_filename(file.filename)
-                
-                if not safe_filename:
-                    import uuid
-                    safe_filename = f"resume_{uuid.uuid4().hex}.pdf"
+                safe_filename = _safe_upload_name(file.filename)
                 
                 file_path = os.path.join(resumes_dir, safe_filename)
                 file.save(file_path)
@@ -257,60 +462,301 @@ def upload_resumes():
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
+def _format_result(analysis_data, meta, resume_id, local_score=None, near_duplicates=None):
+    result = {
+        "resume_name": meta.get("source", "Unknown"),
+        "score": analysis_data.get("match_percentage", 0),
+        "summary": analysis_data.get("summary", "No summary provided."),
+        "pros": analysis_data.get("pros", []),
+        "cons": analysis_data.get("cons", []),
+        "evidence": analysis_data.get("evidence", []),
+        "id": resume_id
+    }
+    if local_score is not None:
+        result["local_score"] = local_score
+    if near_duplicates:
+        result["near_duplicates"] = near_duplicates
+    return result
+
+def _candidate_counts():
+    """
+    (retrieved, kept): candidates to retrieve per job description, and how many
+    to keep once near-duplicates are collapsed. Without local pre-ranking twice
+    LLM_TOP_K are retrieved, so the LLM still gets LLM_TOP_K distinct resumes.
+    """
+    n_results = Config.RERANK_CANDIDATES if rerank.enabled() else Config.LLM_TOP_K
+    if duplicates.enabled() and not rerank.enabled():
+        return 2 * n_results, n_results
+    return n_results, n_results
+
+def _collapse_duplicates(docs, metadatas, ids, limit):
+    """
+    Keep only the best-ranked resume of each near-duplicate group, so no LLM
+    call is spent on a copy. Returns at most limit docs, metadatas and ids, and
+    {kept id: [{"id", "resume_name", "similarity"}]} for the resumes folded into it.
+    """
+    kept, folded = list(range(len(ids))), {}
+    if duplicates.enabled() and len(ids) > 1:
+        try:
+            kept, folded = duplicates.collapse(ids)
+        except Exception as e:
+            print(f"[WARN] Near-duplicate check failed, keeping every candidate: {e}")
+    kept = kept[:limit]
+    names = {doc_id: (meta or {}).get("source", doc_id) for doc_id, meta in zip(ids, metadatas)}
+    near_duplicates = {
+        ids[i]: [{"id": doc_id, "resume_name": names[doc_id], "similarity": score} for doc_id, score in folded[ids[i]]]
+        for i in kept if ids[i] in folded
+    }
+    return [docs[i] for i in kept], [metadatas[i] for i in kept], [ids[i] for i in kept], near_duplicates
+
+def _prerank(job_description, docs, metadatas, ids, near_duplicates=None):
+    """
+    Keep the LLM_TOP_K best locally scored candidates for LLM analysis.
+    Returns their docs, metadatas, ids and local scores, plus the remaining
+    candidates as "prescreened" entries that carry only their local score.
+    """
+    if not rerank.enabled() or not docs:
+        return docs, metadatas, ids, [None] * len(ids), []
+    
+    near_duplicates = near_duplicates or {}
+    selected, local_scores = rerank.select(job_description, docs)
+    chosen = set(selected)
+    prescreened = []
+    for i in sorted(range(len(ids)), key=lambda i: local_scores[i], reverse=True):
+        if i in chosen:
+            continue
+        entry = {"id": ids[i], "resume_name": metadatas[i].get("source", "Unknown"), "local_score": local_scores[i]}
+        if ids[i] in near_duplicates:
+            entry["near_duplicates"] = near_duplicates[ids[i]]
+        prescreened.append(entry)
+    return (
+        [docs[i] for i in selected],
+        [metadatas[i] for i in selected],
+        [ids[i] for i in selected],
+        [local_scores[i] for i in selected],
+        prescreened
+    )
+
+def _stream_analysis(job_description, docs, metadatas, ids, local_scores, prescreened, near_duplicates, legacy_tokens):
+    """
+    NDJSON events: the candidates picked for the LLM, then each analysis as it
+    finishes, then the ranked results (and the locally prescreened rest) with
+    the prompt report.
+    """
+    try:
+        yield json.dumps({
+            "status": "retrieved",
+            "total": len(ids),
+            "prescreened": len(prescreened),
+            "candidates": [
+                {"id": ids[i], "resume_name": metadatas[i].get("source", "Unknown"), "local_score": local_scores[i]}
+                for i in range(len(ids))
+            ]
+        }) + '\n'
+        
+        analyzed_results = []
+        analyses = [None] * len(ids)
+        for i, analysis_data in iter_resume_analyses(docs, job_description):
+            analyses[i] = analysis_data
+            result = _format_result(analysis_data, metadatas[i], ids[i], local_scores[i], near_duplicates.get(ids[i]))
+            analyzed_results.append(result)
+            yield json.dumps({
+                "status": "analyzed",
+                "result": result,
+                "current": len(analyzed_results),
+                "total": len(ids)
+            }) + '\n'
+        
+        analyzed_results.sort(key=lambda x: x['score'], reverse=True)
+        yield json.dumps({
+            "status": "complete",
+            "results": analyzed_results,
+            "prescreened": prescreened,
+            "prompt": prompt_report(analyses, legacy_tokens)
+        }) + '\n'
+    except Exception as e:
+        print(f"Error during streamed analysis: {e}")
+        import traceback
+        traceback.print_exc()
+        yield json.dumps({"status": "error", "message": str(e)}) + '\n'
+
 @main_bp.route('/analyze', methods=['POST'])
 def analyze_resumes():
+    """
+    Rank the top resume matches for a job description.
+    With "stream": true (or ?stream=1) results are streamed as NDJSON as they finish.
+    Optional "filters" (min_years, max_years, skills, location, has_email) are
+    applied inside the retrieval query, before any scoring. Near-duplicate
+    resumes are analyzed once, listed under their best-ranked copy's "near_duplicates".
+    "prompt" reports the prompt tokens and LLM latency of the request.
+    """
     data = request.get_json()
     if not data or 'description' not in data:
         return jsonify({"error": "Job description is required"}), 400
         
     job_description = data['description']
+    stream = bool(data.get('stream')) or request.args.get('stream') in ('1', 'true')
+    
+    try:
+        where, where_document = fields.build_filters(data.get('filters'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
     try:
         collection = get_chroma_collection()
     except ValueError as e:
         return jsonify({"error": str(e)}), 500
     
-    # 1. Query ChromaDB for top matches
-    count = collection.count()
-    if count == 0:
-        return jsonify({"results": []})
-        
-    n_results = min(count, 10) # Get top 10
-    
-    results = collection.query(
-        query_texts=[job_description],
-        n_results=n_results
+    # 1. Retrieve candidates (vector + keyword); a wider set when pre-ranking locally
+    n_retrieved, n_results = _candidate_counts()
+    docs, metadatas, ids = retrieve_candidates(
+        collection, job_description, n_results=n_retrieved, where=where, where_document=where_document
     )
     
-    if not results['documents']:
-        return jsonify({"results": []})
-        
-    # 2. Use Gemini to analyze the match
-    analyzed_results = []
+    # 2. Fold near-duplicate resumes into their best-ranked copy
+    docs, metadatas, ids, near_duplicates = _collapse_duplicates(docs, metadatas, ids, n_results)
     
-    docs = results['documents'][0]
-    metadatas = results['metadatas'][0]
-    ids = results['ids'][0]
+    # 3. Score them locally and keep only the best LLM_TOP_K for the LLM
+    docs, metadatas, ids, local_scores, prescreened = _prerank(job_description, docs, metadatas, ids, near_duplicates)
+    # Long resumes go to the LLM as their passages that best match the description, digested
+    docs, legacy_tokens = prompt_documents(job_description, ids, docs)
     
-    for i, doc in enumerate(docs):
-        meta = metadatas[i]
-        source = meta.get("source", "Unknown")
-        
-        analysis_data = analyze_resume_with_huggingface(doc, job_description)
+    if stream:
+        return Response(
+            stream_with_context(_stream_analysis(job_description, docs, metadatas, ids, local_scores, prescreened, near_duplicates, legacy_tokens)),
+            mimetype='application/json'
+        )
+    
+    if not docs:
+        return jsonify({"results": [], "prescreened": prescreened})
         
-        analyzed_results.append({
-            "resume_name": source,
-            "score": analysis_data.get("match_percentage", 0),
-            "summary": analysis_data.get("summary", "No summary provided."),
-            "pros": analysis_data.get("pros", []),
-            "cons": analysis_data.get("cons", []),
-            "evidence": analysis_data.get("evidence", []),
-            "id": ids[i]
-        })
+    # 4. Use the LLM to analyze the matches concurrently
+    analyses = analyze_resumes_concurrently(docs, job_description)
+    
+    analyzed_results = [
+        _format_result(analysis_data, metadatas[i], ids[i], local_scores[i], near_duplicates.get(ids[i]))
+        for i, analysis_data in enumerate(analyses)
+    ]
             
     # Sort by score
     analyzed_results.sort(key=lambda x: x['score'], reverse=True)
     
-    return jsonify({"results": analyzed_results})
+    return jsonify({"results": analyzed_results, "prescreened": prescreened, "prompt": prompt_report(analyses, legacy_tokens)})
 
 
+@main_bp.route('/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """
+    Rank resumes for several job descriptions in one request.
+    Body: {"job_descriptions": [text or {"id", "description"}], "filters": {...}, "stream": bool}.
+    The descriptions are embedded together and retrieved with one multi-query,
+    each resume is fetched once, and every (description, resume) LLM call shares
+    one LLM_CONCURRENCY budget and one ANALYZE_BATCH_TIMEOUT deadline.
+    """
+    data = request.get_json(silent=True) or {}
+    items = data.get('job_descriptions')
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "job_descriptions must be a non-empty list"}), 400
+    if len(items) > Config.ANALYZE_BATCH_MAX:
+        return jsonify({"error": f"At most {Config.ANALYZE_BATCH_MAX} job descriptions per batch"}), 400
+    
+    requisitions = []
+    for i, item in enumerate(items):
+        if isinstance(item, str):
+            item = {"description": item}
+        if not isinstance(item, dict) or not str(item.get('description') or '').strip():
+            return jsonify({"error": f"job_descriptions[{i}] needs a description"}), 400
+        requisitions.append({"id": item.get('id', i), "description": item['description'], "results": [], "prescreened": []})
+    
+    stream = bool(data.get('stream')) or request.args.get('stream') in ('1', 'true')
+    try:
+        where, where_document = fields.build_filters(data.get('filters'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        collection = get_chroma_collection()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 500
+    
+    descriptions = [r["description"] for r in requisitions]
+    n_retrieved, n_results = _candidate_counts()
+    retrieved = retrieve_candidates_batch(
+        collection, descriptions, n_results=n_retrieved, where=where, where_document=where_document
+    )
+    
+    # Flatten every requisition's picks into one list of LLM calls
+    pairs = []
+    owners = []
+    legacy_tokens = []
+    for j, (docs, metadatas, ids) in enumerate(retrieved):
+        docs, metadatas, ids, near_duplicates = _collapse_duplicates(docs, metadatas, ids, n_results)
+        docs, metadatas, ids, local_scores, prescreened = _prerank(descriptions[j], docs, metadatas, ids, near_duplicates)
+        docs, tokens = prompt_documents(descriptions[j], ids, docs)
+        requisitions[j]["prescreened"] = prescreened
+        for k in range(len(ids)):
+            pairs.append((docs[k], descriptions[j]))
+            owners.append((j, metadatas[k], ids[k], local_scores[k], near_duplicates.get(ids[k])))
+        legacy_tokens.extend(tokens)
+    analyses = [None] * len(pairs)
+    
+    def run():
+        for i, analysis_data in iter_analyses(pairs, total_timeout=Config.ANALYZE_BATCH_TIMEOUT):
+            analyses[i] = analysis_data
+            j, meta, resume_id, local_score, near_duplicates = owners[i]
+            result = _format_result(analysis_data, meta, resume_id, local_score, near_duplicates)
+            requisitions[j]["results"].append(result)
+            yield j, result
+    
+    def summary():
+        for requisition in requisitions:
+            requisition["results"].sort(key=lambda x: x['score'], reverse=True)
+        return [{key: r[key] for key in ("id", "results", "prescreened")} for r in requisitions]
+    
+    if not stream:
+        for _ in run():
+            pass
+        return jsonify({"jobs": summary(), "llm_calls": len(pairs), "prompt": prompt_report(analyses, legacy_tokens)})
+    
+    def generate():
+        try:
+            yield json.dumps({
+                "status": "retrieved",
+                "total": len(pairs),
+                "jobs": [{"id": r["id"], "candidates": sum(1 for owner in owners if owner[0] == j)} for j, r in enumerate(requisitions)]
+            }) + '\n'
+            for current, (j, result) in enumerate(run(), start=1):
+                yield json.dumps({
+                    "status": "analyzed",
+                    "job_id": requisitions[j]["id"],
+                    "result": result,
+                    "current": current,
+                    "total": len(pairs)
+                }) + '\n'
+            yield json.dumps({
+                "status": "complete",
+                "jobs": summary(),
+                "llm_calls": len(pairs),
+                "prompt": prompt_report(analyses, legacy_tokens)
+            }) + '\n'
+        except Exception as e:
+            print(f"Error during batch analysis: {e}")
+            import traceback
+            traceback.print_exc()
+            yield json.dumps({"status": "error", "message": str(e)}) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+
+@main_bp.route('/analysis-cache', methods=['GET', 'DELETE'])
+def analysis_cache():
+    """
+    Report LLM analysis cache hit/miss counters, or clear the cache.
+    """
+    try:
+        if request.method == 'DELETE':
+            llm_cache.clear()
+            return jsonify({"message": "Analysis cache cleared"})
+        return jsonify(llm_cache.stats())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
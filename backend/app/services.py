@@ -1,34 +1,76 @@
+import io
 import os
 import time
 import tempfile
 import json
-# chromadb and others will be imported lazily
+import hashlib
+import threading
+# chromadb, torch, sentence_transformers and huggingface_hub are imported lazily
+# so read-only routes come up without paying for them
 from .config import Config
-import torch
+from . import manifest
+from . import lexical
+from . import vector_index
+from . import fields
+from . import passages
+from . import duplicates
+from . import digests
+from . import prompt
+from . import llm_cache
+from . import metrics
 
 # Workaround for PyTorch meta tensor issue
 os.environ['PYTORCH_ENABLE_MPS_FALLBACK'] = '1'
 # Disable meta device to prevent tensor issues
 os.environ['TRANSFORMERS_OFFLINE'] = '0'
 
-# Initialize API client
-hf_api_key = Config.HUGGINGFACE_API_KEY
-client = None
+# Hugging Face API client, created on first use
+_llm_client = None
+_llm_client_lock = threading.Lock()
 
-if hf_api_key:
-    try:
-        from huggingface_hub import InferenceClient
-        print(f"[OK] Hugging Face API key loaded (length: {len(hf_api_key)})")
-        client = InferenceClient(api_key=hf_api_key)
-    except ImportError:
-        print("[X] huggingface_hub not installed")
-        client = None
-else:
+def get_llm_client():
+    """
+    Return the inference client, creating it on first use. None when not configured.
+    """
+    global _llm_client
+    if _llm_client is not None:
+        return _llm_client
+    
+    hf_api_key = Config.HUGGINGFACE_API_KEY
+    if not (hf_api_key or Config.HF_INFERENCE_URL):
+        return None
+    
+    with _llm_client_lock:
+        if _llm_client is None:
+            try:
+                from huggingface_hub import InferenceClient
+            except ImportError:
+                print("[X] huggingface_hub not installed")
+                return None
+            if hf_api_key:
+                print(f"[OK] Hugging Face API key loaded (length: {len(hf_api_key)})")
+            if Config.HF_INFERENCE_URL:
+                print(f"[INFO] Using inference endpoint: {Config.HF_INFERENCE_URL}")
+            # The client timeout is the per-call deadline for LLM analysis
+            _llm_client = InferenceClient(
+                base_url=Config.HF_INFERENCE_URL,
+                api_key=hf_api_key,
+                timeout=Config.LLM_CALL_TIMEOUT
+            )
+    return _llm_client
+
+if not (Config.HUGGINGFACE_API_KEY or Config.HF_INFERENCE_URL):
     print("[X] Hugging Face API key not found in environment")
 
+# Bump whenever the analysis prompt or result post-processing changes,
+# so cached analyses from the old prompt are no longer served
+PROMPT_VERSION = 1
+
 # Global ChromaDB client and embedding function
 _chroma_client = None
 _embedding_function = None
+_embedding_lock = threading.Lock()
+_model_state = {"status": "cold", "load_seconds": None, "error": None}
 
 def _initialize_embedding_function():
     """Initialize the embedding function with proper error handling."""
@@ -36,9 +78,23 @@ def _initialize_embedding_function():
     from chromadb.utils import embedding_functions
     
     try:
-        print("Loading SentenceTransformer model...")
-        # Load model directly with SentenceTransformer, avoiding meta tensor issues
-        model = SentenceTransformer('all-MiniLM-L6-v2', device='cpu')
+        model = None
+        if Config.EMBEDDING_BACKEND == "onnx":
+            try:
+                print(f"Loading quantized ONNX SentenceTransformer model ({Config.EMBEDDING_ONNX_FILE})...")
+                model = SentenceTransformer(
+                    'all-MiniLM-L6-v2',
+                    device='cpu',
+                    backend='onnx',
+                    model_kwargs={"file_name": Config.EMBEDDING_ONNX_FILE}
+                )
+            except Exception as e:
+                print(f"[WARN] ONNX embedding backend unavailable ({e}), using PyTorch")
+        
+        if model is None:
+            print("Loading SentenceTransformer model...")
+            # Load model directly with SentenceTransformer, avoiding meta tensor issues
+            model = SentenceTransformer('all-MiniLM-L6-v2', device='cpu')
         
         # Create a wrapper class for ChromaDB
         class CustomEmbeddingFunction:
@@ -47,6 +103,7 @@ def _initialize_embedding_function():
             
             def name(self):
                 """Return model name - required by ChromaDB."""
+                # Same name for both backends: the int8 model embeds into the same space
                 return "all-MiniLM-L6-v2"
             
             def __call__(self, input):
@@ -63,51 +120,630 @@ def _initialize_embedding_function():
         # Fallback to ChromaDB's built-in function
         return embedding_functions.DefaultEmbeddingFunction()
 
-def get_chroma_collection():
+def get_embedding_function():
     """
-    Get or create the ChromaDB collection.
-    Uses sentence transformer embeddings (free, local).
+    Return the process-wide embedding function, loading the model once.
+    """
+    global _embedding_function
+    if _embedding_function is not None:
+        return _embedding_function
+    
+    with _embedding_lock:
+        if _embedding_function is None:
+            _model_state["status"] = "loading"
+            start = time.perf_counter()
+            try:
+                _embedding_function = _initialize_embedding_function()
+            except Exception as e:
+                _model_state.update(status="error", error=str(e))
+                raise
+            _model_state.update(status="ready", load_seconds=round(time.perf_counter() - start, 3), error=None)
+    return _embedding_function
+
+def warmup_embedding_model(background=False, encode=True):
+    """
+    Load the embedding model ahead of the first request that needs it.
+    With background=True the load runs in a daemon thread and this returns immediately.
+    encode=False only loads the weights; used in a gunicorn master before fork,
+    where starting torch's thread pools could deadlock the forked workers.
+    """
+    def load():
+        try:
+            embedding_function = get_embedding_function()
+            if encode:
+                # One tiny encode pulls the weights into memory and JIT paths into cache
+                embedding_function(["warmup"])
+            print(f"[OK] Embedding model warm ({_model_state['load_seconds']}s)")
+        except Exception as e:
+            print(f"[ERROR] Embedding model warmup failed: {e}")
+    
+    if background:
+        thread = threading.Thread(target=load, name="embedding-warmup", daemon=True)
+        thread.start()
+        return thread
+    load()
+
+def embedding_model_state():
+    """
+    Readiness of the embedding model: cold, loading, ready or error.
+    """
+    return dict(_model_state, ready=_model_state["status"] == "ready")
+
+class LazyEmbeddingFunction:
+    """
+    Embeds documents and queries for the collections, which are always given
+    explicit embeddings. Delegates to the process-wide model, which is only
+    loaded once something is embedded, so metadata-only routes never pay for it.
+    """
+    def name(self):
+        """Return model name - required by ChromaDB."""
+        return "all-MiniLM-L6-v2"
+    
+    def __call__(self, input):
+        embedding_function = get_embedding_function()
+        with metrics.timer("embed"):
+            return embedding_function(input)
+
+_collection = None
+_collection_lock = threading.Lock()
+_collection_embedding_function = LazyEmbeddingFunction()
+_passage_collection = None
+
+def _open_collection():
+    """
+    Open (or create) the resumes collection. No embedding function is bound:
+    an existing collection opens whatever function it was created with, and
+    every add and query passes embeddings from _collection_embedding_function.
+    Must be called with _collection_lock held.
     """
-    global _chroma_client, _embedding_function
+    global _chroma_client, _passage_collection
     import chromadb
     
     if _chroma_client is None:
         _chroma_client = chromadb.PersistentClient(path=Config.CHROMA_DB_DIR)
     
-    # Try to get existing collection first (without providing embedding function)
+    collection = _chroma_client.get_or_create_collection(name="resumes")
+    # Lets handles in other workers notice the collection was recreated (see get_chroma_collection)
+    manifest.set_state("collection_id", str(collection.id))
+    _passage_collection = None
+    print("Opened ChromaDB collection")
+    return collection
+
+def get_chroma_collection():
+    """
+    Get or create the ChromaDB collection.
+    The handle is opened once per process and reopened when another worker
+    has recreated the collection since. Embeddings come from the local
+    sentence transformer (free, local).
+    """
+    global _collection
+    collection = _collection
+    if collection is not None and manifest.get_state("collection_id") == str(collection.id):
+        return collection
+    
+    with _collection_lock:
+        if _collection is None or _collection is collection:
+            _collection = _open_collection()
+        return _collection
+
+def get_passage_collection():
+    """
+    Get or create the collection of resume passages (see passages.py),
+    embedded with the same model as the resumes.
+    """
+    global _passage_collection
+    collection = _passage_collection
+    if collection is not None:
+        return collection
+    
+    # Opens the client, and drops this handle if the resumes were recreated
+    get_chroma_collection()
+    with _collection_lock:
+        if _passage_collection is None:
+            _passage_collection = _chroma_client.get_or_create_collection(name="resume_passages")
+        return _passage_collection
+
+def _drop_passage_collection():
+    """
+    Delete the passages with the resumes they belong to. Must be called with _collection_lock held.
+    """
+    global _passage_collection
+    _passage_collection = None
     try:
-        existing_collection = _chroma_client.get_collection(name="resumes")
-        print("Using existing ChromaDB collection")
-        return existing_collection
-    except ValueError as e:
-        # Collection doesn't exist, create it with our embedding function
-        if _embedding_function is None:
-            _embedding_function = _initialize_embedding_function()
-        
-        print("Creating new ChromaDB collection with embedding function")
-        return _chroma_client.create_collection(name="resumes", embedding_function=_embedding_function)
+        _chroma_client.delete_collection(name="resume_passages")
+    except Exception:
+        pass
+
+def invalidate_chroma_collection(close_client=False):
+    """
+    Drop the cached collection handle so the next call reopens it.
+    close_client also forgets the ChromaDB client (e.g. after CHROMA_DB_DIR changes).
+    """
+    global _collection, _passage_collection, _chroma_client
+    with _collection_lock:
+        _collection = None
+        _passage_collection = None
+        if close_client:
+            _chroma_client = None
+
+def reset_chroma_collection():
+    """
+    Delete and recreate the resumes collection, clearing the ingest manifest with it.
+    """
+    global _collection, _chroma_client
+    import chromadb
+    
+    with _collection_lock:
+        if _chroma_client is None:
+            _chroma_client = chromadb.PersistentClient(path=Config.CHROMA_DB_DIR)
+        _collection = None
+        try:
+            _chroma_client.delete_collection(name="resumes")
+        except Exception:
+            pass
+        manifest.clear()
+        lexical.clear()
+        vector_index.clear()
+        duplicates.clear()
+        digests.clear()
+        _drop_passage_collection()
+        _collection = _open_collection()
+        return _collection
+
+def get_resume_ids(collection=None):
+    """
+    All resume ids, without pulling documents, metadata or embeddings out of ChromaDB.
+    """
+    collection = collection or get_chroma_collection()
+    return collection.get(include=[])['ids']
+
+def sync_lexical_index(collection):
+    """
+    Bring the BM25 index in line with the collection, e.g. for resumes indexed
+    before it existed. Only lists ids when the document counts disagree.
+    Returns the number of resumes added to the index.
+    """
+    if lexical.count() == collection.count():
+        return 0
+    ids = set(get_resume_ids(collection))
+    indexed = lexical.indexed_ids()
+    lexical.remove_documents(indexed - ids)
+    missing = sorted(ids - indexed)
+    for i in range(0, len(missing), 500):
+        data = collection.get(ids=missing[i:i + 500], include=['documents'])
+        lexical.add_documents(list(zip(data['ids'], data['documents'])))
+    if missing:
+        print(f"[OK] Added {len(missing)} existing resumes to the keyword index")
+    return len(missing)
+
+def sync_vector_index(collection):
+    """
+    Bring the in-process vector index (VECTOR_ENGINE=numpy) in line with the
+    collection, copying stored embeddings out of ChromaDB for resumes it lacks.
+    With another engine it is dropped: it is not kept up to date meanwhile, so
+    switching back rebuilds it. Returns the number of resumes added.
+    """
+    if not vector_index.enabled():
+        if os.path.exists(Config.VECTOR_INDEX_PATH) and vector_index.count():
+            vector_index.clear()
+        return 0
+    stored_dtype = vector_index.stored_dtype()
+    if stored_dtype and stored_dtype != Config.VECTOR_INDEX_DTYPE:
+        print(f"[INFO] Rebuilding vector index as {Config.VECTOR_INDEX_DTYPE} (was {stored_dtype})")
+        vector_index.clear()
+    if vector_index.count() == collection.count():
+        return 0
+    ids = set(get_resume_ids(collection))
+    indexed = vector_index.indexed_ids()
+    vector_index.remove(sorted(indexed - ids))
+    missing = sorted(ids - indexed)
+    for i in range(0, len(missing), 500):
+        data = collection.get(ids=missing[i:i + 500], include=['embeddings'])
+        vector_index.add(data['ids'], data['embeddings'])
+    if missing:
+        print(f"[OK] Added {len(missing)} existing resumes to the vector index")
+    return len(missing)
+
+def sync_duplicate_index(collection):
+    """
+    Bring the near-duplicate sketches in line with the collection, e.g. for
+    resumes indexed before they existed. With NEAR_DUPLICATES off they are
+    dropped, so turning it back on rebuilds them.
+    Returns the number of resumes sketched.
+    """
+    if not duplicates.enabled():
+        if os.path.exists(Config.DUPLICATE_INDEX_PATH) and duplicates.count():
+            duplicates.clear()
+        return 0
+    if duplicates.count() == collection.count():
+        return 0
+    ids = set(get_resume_ids(collection))
+    indexed = duplicates.indexed_ids()
+    duplicates.remove(sorted(indexed - ids))
+    missing = sorted(ids - indexed)
+    for i in range(0, len(missing), 500):
+        data = collection.get(ids=missing[i:i + 500], include=['documents'])
+        duplicates.add(list(zip(data['ids'], data['documents'])))
+    if missing:
+        print(f"[OK] Sketched {len(missing)} existing resumes for near-duplicate detection")
+    return len(missing)
+
+def sync_digest_index(collection):
+    """
+    Bring the prompt digests in line with the collection, e.g. for resumes
+    indexed before they existed or digested by an older normalizer.
+    Returns the number of resumes digested.
+    """
+    if digests.count() == collection.count():
+        return 0
+    ids = set(get_resume_ids(collection))
+    indexed = digests.indexed_ids()
+    digests.remove(sorted(indexed - ids))
+    missing = sorted(ids - indexed)
+    for i in range(0, len(missing), 500):
+        data = collection.get(ids=missing[i:i + 500], include=['documents'])
+        digests.add(list(zip(data['ids'], data['documents'])))
+    if missing:
+        print(f"[OK] Built prompt digests for {len(missing)} existing resumes")
+    return len(missing)
+
+def sync_resume_fields(collection):
+    """
+    Extract structured fields for resumes stored without them (or with an older
+    FIELDS_VERSION), so metadata filters see every resume. Once every resume is
+    current the version is recorded in the manifest and later syncs skip the check.
+    Returns the number of resumes updated.
+    """
+    if manifest.get_state("fields_version") == str(fields.FIELDS_VERSION):
+        return 0
+    current = collection.get(where={"fields_version": fields.FIELDS_VERSION}, include=[])['ids']
+    stale = sorted(set(get_resume_ids(collection)) - set(current)) if len(current) < collection.count() else []
+    for i in range(0, len(stale), 200):
+        data = collection.get(ids=stale[i:i + 200], include=['documents', 'metadatas'])
+        metadatas = [
+            dict(fields.extract(doc), source=(meta or {}).get("source", doc_id),
+                 **{key: meta[key] for key in ("passages_version",) if key in (meta or {})})
+            for doc_id, doc, meta in zip(data['ids'], data['documents'], data['metadatas'])
+        ]
+        collection.update(ids=data['ids'], metadatas=metadatas)
+    if stale:
+        print(f"[OK] Extracted structured fields for {len(stale)} existing resumes")
+    manifest.set_state("fields_version", fields.FIELDS_VERSION)
+    return len(stale)
+
+def _add_passages(documents):
+    """
+    Split [(doc_id, text)] into passages and store them, replacing any previous
+    passages of the same resumes.
+    """
+    passage_collection = get_passage_collection()
+    ids, texts, metadatas = [], [], []
+    for doc_id, text in documents:
+        for passage in passages.split(text):
+            ids.append(f"{doc_id}#{passage['position']}")
+            texts.append(passage["text"])
+            metadatas.append({"parent": doc_id, "section": passage["section"], "position": passage["position"]})
+    with metrics.timer("passage_add"):
+        remove_passages([doc_id for doc_id, _ in documents])
+        for i in range(0, len(ids), 2000):
+            passage_collection.add(
+                ids=ids[i:i + 2000],
+                documents=texts[i:i + 2000],
+                metadatas=metadatas[i:i + 2000],
+                embeddings=_collection_embedding_function(texts[i:i + 2000])
+            )
+
+def remove_passages(doc_ids):
+    """
+    Drop the passages of the given resumes.
+    """
+    passage_collection = get_passage_collection()
+    doc_ids = list(doc_ids)
+    for i in range(0, len(doc_ids), 500):
+        passage_collection.delete(where={"parent": {"$in": doc_ids[i:i + 500]}})
+
+def _move_passages(doc_id, new_owner):
+    """
+    Re-parent a resume's passages (with their embeddings) when its vector moves to an identical file.
+    """
+    passage_collection = get_passage_collection()
+    data = passage_collection.get(where={"parent": doc_id}, include=['documents', 'metadatas', 'embeddings'])
+    remove_passages([new_owner])
+    if data['ids']:
+        passage_collection.add(
+            ids=[f"{new_owner}#{meta['position']}" for meta in data['metadatas']],
+            documents=data['documents'],
+            metadatas=[dict(meta, parent=new_owner) for meta in data['metadatas']],
+            embeddings=data['embeddings']
+        )
+    remove_passages([doc_id])
+
+def sync_passage_index(collection):
+    """
+    Split resumes stored without passages (or with an older PASSAGES_VERSION),
+    e.g. ones indexed before the passage index existed. Once every resume is
+    split the version is recorded in the manifest and later syncs skip the
+    check; resumes added unsplit (PASSAGE_INDEX off, a failed split) clear it.
+    Returns the number of resumes split.
+    """
+    if not Config.PASSAGE_INDEX:
+        manifest.set_state("passages_version", None)
+        return 0
+    if manifest.get_state("passages_version") == str(passages.PASSAGES_VERSION):
+        return 0
+    current = collection.get(where={"passages_version": passages.PASSAGES_VERSION}, include=[])['ids']
+    stale = sorted(set(get_resume_ids(collection)) - set(current)) if len(current) < collection.count() else []
+    for i in range(0, len(stale), 100):
+        data = collection.get(ids=stale[i:i + 100], include=['documents', 'metadatas'])
+        _add_passages(list(zip(data['ids'], data['documents'])))
+        collection.update(ids=data['ids'], metadatas=[
+            dict(meta or {}, passages_version=passages.PASSAGES_VERSION) for meta in data['metadatas']
+        ])
+    if stale:
+        print(f"[OK] Split {len(stale)} existing resumes into passages")
+    manifest.set_state("passages_version", passages.PASSAGES_VERSION)
+    return len(stale)
+
+def retrieve_candidates(collection, job_description, n_results=10, where=None, where_document=None):
+    """
+    Top resumes for a job description as (docs, metadatas, ids).
+    With HYBRID_SEARCH the vector ranking is fused with a BM25 keyword ranking
+    by reciprocal rank, so exact skill matches surface without a larger n_results.
+    where / where_document (see fields.build_filters) restrict both rankings.
+    """
+    return retrieve_candidates_batch(collection, [job_description], n_results, where, where_document)[0]
+
+def retrieve_candidates_batch(collection, job_descriptions, n_results=10, where=None, where_document=None):
+    """
+    retrieve_candidates for several job descriptions at once: a single
+    multi-query (the embedding function encodes every description in one call)
+    and a single fetch for the union of the resumes they retrieve.
+    With PASSAGE_INDEX, resumes ranked by their best passages are fused in as well.
+    Returns one (docs, metadatas, ids) per job description.
+    """
+    empty = [([], [], []) for _ in job_descriptions]
+    if not job_descriptions:
+        return []
+    count = collection.count()
+    if count == 0:
+        return empty
+    
+    filters = {}
+    if where:
+        filters["where"] = where
+    if where_document:
+        filters["where_document"] = where_document
+    
+    fused = Config.HYBRID_SEARCH or Config.PASSAGE_INDEX
+    depth = min(count, max(n_results, Config.RETRIEVAL_CANDIDATES) if fused else n_results)
+    # Embedded once for every ranking that needs the query vectors
+    query_embeddings = _collection_embedding_function(list(job_descriptions))
+    vector_rankings = _vector_index_rankings(collection, query_embeddings, depth, filters, count) if vector_index.enabled() else None
+    if vector_rankings is None:
+        with metrics.timer("chroma_query"):
+            results = collection.query(query_embeddings=query_embeddings, n_results=depth, include=['distances'], **filters)
+        vector_rankings = results['ids'] if results['ids'] else [[] for _ in job_descriptions]
+    
+    # Rankings from indexes without resume metadata: [per job description [ids]] each
+    extra_rankings = []
+    if Config.PASSAGE_INDEX:
+        passage_rankings = _passage_rankings(query_embeddings, depth)
+        if passage_rankings is not None:
+            extra_rankings.append(passage_rankings)
+    if Config.HYBRID_SEARCH:
+        try:
+            with metrics.timer("bm25_search"):
+                extra_rankings.append([[doc_id for doc_id, _ in lexical.search(jd, depth)] for jd in job_descriptions])
+        except Exception as e:
+            print(f"[WARN] Keyword search failed, using vector results only: {e}")
+    
+    if fused:
+        hits = {doc_id for rankings in extra_rankings for ranking in rankings for doc_id in ranking}
+        if filters and hits:
+            # Apply the filters to their hits in one lookup
+            allowed = set(collection.get(ids=sorted(hits), include=[], **filters)['ids'])
+            extra_rankings = [[[doc_id for doc_id in ranking if doc_id in allowed] for ranking in rankings] for rankings in extra_rankings]
+        rankings = [
+            lexical.reciprocal_rank_fusion([vector_ids] + [rankings[j] for rankings in extra_rankings], k=Config.RRF_K, limit=n_results)
+            for j, vector_ids in enumerate(vector_rankings)
+        ]
+    else:
+        rankings = [vector_ids[:n_results] for vector_ids in vector_rankings]
+    
+    unique_ids = sorted({doc_id for ranking in rankings for doc_id in ranking})
+    if not unique_ids:
+        return empty
+    with metrics.timer("chroma_get"):
+        data = collection.get(ids=unique_ids, include=['documents', 'metadatas'])
+    found = {doc_id: (doc, meta) for doc_id, doc, meta in zip(data['ids'], data['documents'], data['metadatas'])}
+    
+    candidates = []
+    for ranking in rankings:
+        # Keep the ranked order; skip keyword and passage hits whose resume has since been deleted
+        ids = [doc_id for doc_id in ranking if doc_id in found]
+        candidates.append(([found[doc_id][0] for doc_id in ids], [found[doc_id][1] for doc_id in ids], ids))
+    return candidates
+
+def _vector_index_rankings(collection, query_embeddings, depth, filters, count):
+    """
+    Vector rankings from the in-process index, or None to query ChromaDB instead
+    (index not in sync with the collection, or failing).
+    """
+    try:
+        if not vector_index.ready(count):
+            print("[WARN] Vector index is not in sync with the collection, querying ChromaDB")
+            return None
+        allowed_ids = None
+        if filters:
+            # The index has no metadata; resolve the filters to ids with one lookup
+            with metrics.timer("chroma_get"):
+                allowed_ids = collection.get(include=[], **filters)['ids']
+        return vector_index.search(query_embeddings, depth, allowed_ids)
     except Exception as e:
-        # If there's an embedding function conflict, delete and recreate
-        if "embedding function already exists" in str(e).lower():
-            print("Embedding function conflict detected - deleting and recreating collection")
-            try:
-                _chroma_client.delete_collection(name="resumes")
-            except:
-                pass
-            
-            if _embedding_function is None:
-                _embedding_function = _initialize_embedding_function()
-            
-            return _chroma_client.create_collection(name="resumes", embedding_function=_embedding_function)
-        else:
-            raise
+        print(f"[WARN] Vector index search failed, querying ChromaDB: {e}")
+        return None
+
+def _passage_rankings(query_embeddings, depth):
+    """
+    Resume ids ranked by their passages, per query. A resume scores the
+    similarity of its best passage plus half its second best and so on, so
+    several relevant sections beat one lucky sentence.
+    None when there are no passages or the search fails.
+    """
+    try:
+        passage_collection = get_passage_collection()
+        available = passage_collection.count()
+        if not available:
+            return None
+        with metrics.timer("passage_query"):
+            results = passage_collection.query(
+                query_embeddings=query_embeddings,
+                n_results=min(available, depth * passages.QUERY_PASSAGES_PER_RESUME),
+                include=['metadatas', 'distances']
+            )
+    except Exception as e:
+        print(f"[WARN] Passage search failed, ranking whole resumes only: {e}")
+        return None
+    
+    rankings = []
+    for metadatas, distances in zip(results['metadatas'], results['distances']):
+        scores = {}
+        seen = {}
+        for meta, distance in zip(metadatas, distances):
+            parent = (meta or {}).get("parent")
+            if not parent:
+                continue
+            # MiniLM embeddings are unit length: squared L2 distance = 2 - 2 * cosine
+            scores[parent] = scores.get(parent, 0.0) + (1 - distance / 2) * 0.5 ** seen.get(parent, 0)
+            seen[parent] = seen.get(parent, 0) + 1
+        rankings.append(sorted(scores, key=scores.get, reverse=True)[:depth])
+    return rankings
+
+def passage_context(job_description, ids, docs, budget=None, cost=len):
+    """
+    Text to send to the LLM for each resume. Resumes over budget (default
+    PASSAGE_PROMPT_CHARS, measured by cost, see passages.pack) are cut down to
+    their header plus the passages that best match the job description,
+    instead of just their first few thousand characters. Shorter resumes, and
+    any without passages, are sent whole.
+    """
+    budget = budget or Config.PASSAGE_PROMPT_CHARS
+    long_ids = [doc_id for doc_id, doc in zip(ids, docs) if cost(doc or "") > budget]
+    if not Config.PASSAGE_INDEX or not long_ids:
+        return list(docs)
+    import numpy as np
+    
+    try:
+        with metrics.timer("passage_query"):
+            data = get_passage_collection().get(
+                where={"parent": {"$in": long_ids}}, include=['documents', 'metadatas', 'embeddings']
+            )
+        if not data['ids']:
+            return list(docs)
+        query = np.asarray(_collection_embedding_function([job_description])[0], dtype=np.float32)
+        similarity = np.asarray(data['embeddings'], dtype=np.float32) @ query
+    except Exception as e:
+        print(f"[WARN] Could not select passages, sending resumes as they are: {e}")
+        return list(docs)
+    
+    ranked = {}
+    for i in np.argsort(-similarity, kind="stable"):
+        meta = data['metadatas'][i]
+        ranked.setdefault(meta["parent"], []).append(
+            {"section": meta["section"], "position": meta["position"], "text": data['documents'][i]}
+        )
+    return [passages.pack(ranked[doc_id], budget, cost) if doc_id in ranked else doc for doc_id, doc in zip(ids, docs)]
+
+def _digest_tokens(text):
+    return prompt.count_tokens(digests.normalize(text))
+
+def prompt_documents(job_description, ids, docs):
+    """
+    Text to analyze with the LLM for each resume, and the tokens of the
+    legacy prompt (first 3000 characters of the raw resume) for it.
+    Resume digests that do not fit the prompt's token budget are replaced by
+    their best-matching passages (see passage_context), packed against that
+    budget. With PROMPT_BUILDER=legacy the raw text is sent, passages packed
+    to PASSAGE_PROMPT_CHARS, and there is nothing to compare against.
+    """
+    if not prompt.enabled():
+        selected = passage_context(job_description, ids, docs)
+        return selected, [None] * len(selected)
+    try:
+        stored = digests.get(ids)
+    except Exception as e:
+        print(f"[WARN] Could not load resume digests, building them now: {e}")
+        stored = {}
+    digested = [stored[doc_id] if doc_id in stored else digests.normalize(doc) for doc_id, doc in zip(ids, docs)]
+    selected = passage_context(
+        job_description, ids, digested, budget=prompt.resume_budget(job_description), cost=_digest_tokens
+    )
+    texts = [text if text is digest else digests.normalize(text) for text, digest in zip(selected, digested)]
+    legacy_tokens = [prompt.count_tokens(prompt.legacy(doc or "", job_description)) for doc in docs]
+    return texts, legacy_tokens
+
+def prompt_report(analyses, legacy_tokens):
+    """
+    Prompt tokens and LLM latency of one request's analyses, next to the
+    tokens the legacy prompts would have used. Cached analyses made no LLM call
+    and are left out.
+    """
+    calls = [(analysis, legacy) for analysis, legacy in zip(analyses, legacy_tokens)
+             if analysis and analysis.get("prompt_tokens") is not None]
+    seconds = [analysis["llm_seconds"] for analysis, _ in calls]
+    report = {
+        "builder": Config.PROMPT_BUILDER,
+        "tokenizer": prompt.tokenizer_name(),
+        "llm_calls": len(calls),
+        "prompt_tokens": sum(analysis["prompt_tokens"] for analysis, _ in calls),
+        "llm_seconds_mean": round(sum(seconds) / len(seconds), 3) if seconds else None,
+        "llm_seconds_max": round(max(seconds), 3) if seconds else None,
+    }
+    if calls and all(legacy is not None for _, legacy in calls):
+        report["legacy_prompt_tokens"] = sum(legacy for _, legacy in calls)
+        report["saved_tokens"] = report["legacy_prompt_tokens"] - report["prompt_tokens"]
+        metrics.inc("llm_prompt_tokens_legacy", report["legacy_prompt_tokens"])
+        print(f"[INFO] Prompts: {report['prompt_tokens']} tokens in {len(calls)} LLM calls "
+              f"(legacy prompts: {report['legacy_prompt_tokens']}), mean LLM latency {report['llm_seconds_mean']}s")
+    return report
+
+def list_resumes_page(limit, offset=0, prefix=None):
+    """
+    One page of resume metadata, optionally restricted to filenames starting with prefix.
+    Returns (resumes, total matching).
+    """
+    collection = get_chroma_collection()
+    
+    if prefix:
+        # Ids are filenames, so the prefix can be matched on the id-only listing
+        matching = [resume_id for resume_id in get_resume_ids(collection) if resume_id.startswith(prefix)]
+        total = len(matching)
+        page_ids = matching[offset:offset + limit]
+        data = collection.get(ids=page_ids, include=['metadatas']) if page_ids else {"ids": [], "metadatas": []}
+    else:
+        total = collection.count()
+        data = collection.get(include=['metadatas'], limit=limit, offset=offset)
+    
+    resumes = []
+    for i, resume_id in enumerate(data['ids']):
+        meta = (data['metadatas'][i] if data['metadatas'] else None) or {}
+        resumes.append({
+            "id": resume_id,
+            "filename": meta.get("source", resume_id),
+            "uploaded_at": meta.get("uploaded_at", "Unknown"),
+            "years_experience": meta.get("years_experience"),
+            "skills": meta.get("skills"),
+            "location": meta.get("location") or meta.get("city")
+        })
+    return resumes, total
 
+def process_pdf(file_path):
     """
-    Extract text from a PDF file.
+    Extract text from a PDF file, given its path or its raw bytes.
     """
     import pypdf
     try:
-        reader = pypdf.PdfReader(file_path)
+        reader = pypdf.PdfReader(io.BytesIO(file_path) if isinstance(file_path, bytes) else file_path)
         full_text = ""
         for page in reader.pages:
             text = page.extract_text()
@@ -115,13 +751,184 @@ def get_chroma_collection():
                 full_text += text + "\n"
         return full_text
     except Exception as e:
-        print(f"Error reading PDF {file_path}: {e}")
+        source = "uploaded file" if isinstance(file_path, bytes) else file_path
+        print(f"Error reading PDF {source}: {e}")
         return None
 
-def ingest_resumes_from_disk():
+def _timed_process_pdf(source):
+    """
+    process_pdf plus its duration, measured where it runs (possibly a pool process).
+    """
+    start = time.perf_counter()
+    text = process_pdf(source)
+    return text, time.perf_counter() - start
+
+# Longest wait for an extracted PDF before the embed loop gets to check its batch's age
+_EXTRACT_POLL_SECONDS = 0.25
+
+def _extract_texts(sources, workers=None, idle_seconds=None):
+    """
+    Extract text from PDFs in a process pool.
+    sources: {filename: path or raw bytes}.
+    Yields (filename, text) pairs in completion order. With idle_seconds, also
+    yields (None, None) whenever that long passes without a file finishing.
+    """
+    workers = Config.INGEST_WORKERS if workers is None else workers
+    
+    if workers <= 1 or len(sources) <= 1:
+        for filename, source in sources.items():
+            text, seconds = _timed_process_pdf(source)
+            metrics.observe("pdf_read", seconds)
+            yield filename, text
+        return
+    
+    from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+    
+    pool = ProcessPoolExecutor(max_workers=min(workers, len(sources)))
+    try:
+        futures = {
+            pool.submit(_timed_process_pdf, source): filename
+            for filename, source in sources.items()
+        }
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=idle_seconds, return_when=FIRST_COMPLETED)
+            if not done:
+                # A slow PDF must not hold back the batch that is already waiting
+                yield None, None
+                continue
+            for future in done:
+                filename = futures[future]
+                try:
+                    text, seconds = future.result()
+                    metrics.observe("pdf_read", seconds)
+                except Exception as e:
+                    # A crashed worker only loses its own file
+                    print(f"Error extracting {filename}: {e}")
+                    text = None
+                yield filename, text
+    finally:
+        # Don't block on queued files if the client disconnects mid-stream
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def _add_batch(collection, batch):
+    """
+    Embed and store a batch of extracted resumes with a single collection.add.
+    Yields (filename, error message or None) for each entry.
+    """
+    try:
+        texts = [entry["text"] for entry in batch]
+        metadatas = [entry["metadata"] for entry in batch]
+        embeddings = _collection_embedding_function(texts)
+        with metrics.timer("chroma_add"):
+            collection.add(
+                documents=texts,
+                metadatas=metadatas,
+                ids=[entry["id"] for entry in batch],
+                embeddings=embeddings
+            )
+        # Split only once the resumes are stored, so a failed add leaves no orphaned passages
+        if Config.PASSAGE_INDEX:
+            try:
+                _add_passages([(entry["id"], entry["text"]) for entry in batch])
+                collection.update(
+                    ids=[entry["id"] for entry in batch],
+                    metadatas=[dict(metadata, passages_version=passages.PASSAGES_VERSION) for metadata in metadatas]
+                )
+            except Exception as e:
+                # Unflagged resumes are split again by the next sync
+                print(f"[WARN] Passage index update failed: {e}")
+                manifest.set_state("passages_version", None)
+        else:
+            # Resumes added now have no passages if the index is turned back on
+            manifest.set_state("passages_version", None)
+        try:
+            lexical.add_documents([(entry["id"], entry["text"]) for entry in batch])
+        except Exception as e:
+            # The next sync backfills the keyword index from the collection
+            print(f"[WARN] Keyword index update failed: {e}")
+        if duplicates.enabled():
+            try:
+                matches = duplicates.add([(entry["id"], entry["text"]) for entry in batch])
+                for doc_id, found in matches.items():
+                    other, score = found[0]
+                    print(f"[INFO] {doc_id} is a near-duplicate of {other} ({score:.0%} similar)")
+            except Exception as e:
+                # The next sync sketches whatever is missing
+                print(f"[WARN] Near-duplicate index update failed: {e}")
+        try:
+            digests.add([(entry["id"], entry["text"]) for entry in batch])
+        except Exception as e:
+            # Prompts digest the raw text until the next sync stores it
+            print(f"[WARN] Prompt digest update failed: {e}")
+        if embeddings is not None:
+            try:
+                vector_index.add([entry["id"] for entry in batch], embeddings)
+            except Exception as e:
+                # Searches use ChromaDB until the next sync backfills the index
+                print(f"[WARN] Vector index update failed: {e}")
+        for entry in batch:
+            yield entry["id"], None
+        return
+    except Exception as e:
+        if len(batch) == 1:
+            error_msg = f"Error adding {batch[0]['id']}: {str(e)}"
+            print(error_msg)
+            yield batch[0]["id"], error_msg
+            return
+        print(f"[WARN] Batch add of {len(batch)} resumes failed ({e}), retrying one by one")
+    
+    # Isolate the bad document so the rest of the batch still lands
+    for entry in batch:
+        yield from _add_batch(collection, [entry])
+
+def _apply_removals(collection, root, plan):
     """
-    Scan the data/resumes directory and ingest any new PDFs into ChromaDB.
-    Yields progress updates.
+    Drop vectors for deleted or edited files. When an identical copy of the
+    file is still on disk, its vector is moved to that copy instead.
+    Returns the number of documents removed from the collection.
+    """
+    removed = 0
+    for doc_id in plan["stale_docs"]:
+        new_owner = plan["rehome"].get(doc_id)
+        try:
+            if new_owner:
+                data = collection.get(ids=[doc_id], include=['documents', 'metadatas', 'embeddings'])
+                if data['ids']:
+                    metadata = dict(data['metadatas'][0] or {}, source=new_owner)
+                    collection.add(
+                        ids=[new_owner],
+                        documents=data['documents'],
+                        metadatas=[metadata],
+                        embeddings=data['embeddings']
+                    )
+                    lexical.add_documents([(new_owner, data['documents'][0])])
+                    if vector_index.enabled():
+                        vector_index.add([new_owner], data['embeddings'])
+                    if duplicates.enabled():
+                        duplicates.add([(new_owner, data['documents'][0])])
+                    digests.add([(new_owner, data['documents'][0])])
+                    _move_passages(doc_id, new_owner)
+                print(f"[INFO] Moved vector for {doc_id} to identical file {new_owner}")
+            else:
+                removed += 1
+            collection.delete(ids=[doc_id])
+            lexical.remove_documents([doc_id])
+            vector_index.remove([doc_id])
+            duplicates.remove([doc_id])
+            digests.remove([doc_id])
+            remove_passages([doc_id])
+        except Exception as e:
+            print(f"[WARN] Could not remove stale vector {doc_id}: {e}")
+    manifest.remove(root, plan["deleted"])
+    return removed
+
+def ingest_resumes_from_disk(names=None):
+    """
+    Sync the data/resumes directory into ChromaDB using the ingest manifest:
+    new and edited PDFs are embedded, deleted ones are dropped and identical
+    copies share one vector. Yields progress updates.
+    names: sync only these files (as reported by the folder watcher).
     """
     try:
         collection = get_chroma_collection()
@@ -135,82 +942,220 @@ def ingest_resumes_from_disk():
         yield {"status": "error", "message": f"Resumes directory not found: {resumes_dir}"}
         return
 
-    # Get existing IDs to avoid re-processing
-    existing_ids = collection.get()['ids']
+    root = os.path.abspath(resumes_dir)
     
-    files_to_process = []
-    already_ingested = []
-    for filename in os.listdir(resumes_dir):
-        if filename.lower().endswith(".pdf"):
-            if filename not in existing_ids:
-                files_to_process.append(filename)
-            else:
-                already_ingested.append(filename)
+    try:
+        sync_lexical_index(collection)
+    except Exception as e:
+        print(f"[WARN] Could not sync keyword index: {e}")
+    try:
+        sync_resume_fields(collection)
+    except Exception as e:
+        print(f"[WARN] Could not extract fields for existing resumes: {e}")
+    try:
+        sync_vector_index(collection)
+    except Exception as e:
+        print(f"[WARN] Could not sync vector index: {e}")
+    try:
+        sync_passage_index(collection)
+    except Exception as e:
+        print(f"[WARN] Could not split existing resumes into passages: {e}")
+    try:
+        sync_duplicate_index(collection)
+    except Exception as e:
+        print(f"[WARN] Could not sync near-duplicate index: {e}")
+    try:
+        sync_digest_index(collection)
+    except Exception as e:
+        print(f"[WARN] Could not build prompt digests: {e}")
+    
+    # Existing IDs are only needed to adopt vectors indexed before the manifest existed
+    known_ids = get_resume_ids(collection) if manifest.is_empty() else None
+    plan = manifest.plan_sync(root, known_ids, names)
+    
+    removed_count = _apply_removals(collection, root, plan)
+    manifest.record(root, plan["record"])
+    
+    files_to_process = [entry["name"] for entry in plan["to_embed"]]
+    pending = {entry["name"]: entry for entry in plan["to_embed"]}
+    # A surviving alias can be both stat-unchanged and re-recorded under its new owner
+    already_ingested = len(set(plan["unchanged"]) | {row["name"] for row in plan["record"]})
             
     total_files = len(files_to_process)
     if total_files == 0:
-        if len(already_ingested) > 0:
-            yield {"status": "complete", "message": f"All {len(already_ingested)} resumes are already ingested. No new resumes to process.", "processed": 0, "total": 0, "already_ingested": len(already_ingested)}
+        if already_ingested > 0:
+            yield {"status": "complete", "message": f"All {already_ingested} resumes are already ingested. No new resumes to process.", "processed": 0, "total": 0, "already_ingested": already_ingested, "removed": removed_count}
         else:
-            yield {"status": "complete", "message": "No PDF resumes found in the folder.", "processed": 0, "total": 0}
+            yield {"status": "complete", "message": "No PDF resumes found in the folder.", "processed": 0, "total": 0, "removed": removed_count}
         return
 
+    sources = {filename: os.path.join(resumes_dir, filename) for filename in files_to_process}
+    processed_count = yield from _embed_extracted(collection, root, _extract_texts(sources, idle_seconds=_EXTRACT_POLL_SECONDS), pending)
+        
+    yield {"status": "complete", "message": f"Ingested {processed_count} new resumes.", "processed": processed_count, "total": total_files, "removed": removed_count}
+
+def _embed_extracted(collection, root, extracted, pending):
+    """
+    Embed (filename, text) pairs from extracted in micro-batches. Each file that
+    lands is recorded in the manifest from its pending row, together with its
+    identical aliases. Yields progress updates and returns the number ingested.
+    A (None, None) pair from extracted only checks whether the batch is due.
+    """
+    total_files = len(pending)
     processed_count = 0
+    extracted_count = 0
+    finished_count = 0
+    batch = []
+    batch_started = 0.0
     
-    for i, filename in enumerate(files_to_process):
-        file_path = os.path.join(resumes_dir, filename)
-        
-        # Initial processing update
-        yield {
+    def progress(filename, stage=None):
+        # Extraction and embedding each account for half of the bar
+        event = {
             "status": "processing", 
             "file": filename, 
-            "current": i + 1, 
+            "current": extracted_count, 
             "total": total_files, 
-            "percent": int(((i) / total_files) * 100),
-            "stage": "reading"
+            "percent": int(((extracted_count + finished_count) / (2 * total_files)) * 100)
         }
+        if stage:
+            event["stage"] = stage
+        return event
+    
+    def flush():
+        nonlocal processed_count, finished_count
+        results = list(_add_batch(collection, batch))
+        batch.clear()
         
-        full_text = process_pdf(file_path)
+        # Only files whose vectors are committed go into the manifest
+        landed = []
+        for filename, error_msg in results:
+            if not error_msg:
+                landed.append(pending[filename])
+                landed.extend(pending[filename]["aliases"])
+        manifest.record(root, landed)
         
-        # After reading PDF, before adding to DB
-        yield {
-            "status": "processing", 
-            "file": filename, 
-            "current": i + 1, 
-            "total": total_files, 
-            "percent": int(((i + 0.5) / total_files) * 100),
-            "stage": "embedding"
-        }
-        
-        if full_text and full_text.strip():
-            try:
-                collection.add(
-                    documents=[full_text], 
-                    metadatas=[{"source": filename}], 
-                    ids=[filename]
-                )
-                processed_count += 1
-                yield {
-                    "status": "processing", 
-                    "file": filename, 
-                    "current": i + 1, 
-                    "total": total_files, 
-                    "percent": int(((i + 1) / total_files) * 100)
-                } 
-            except Exception as e:
-                error_msg = f"Error adding {filename}: {str(e)}"
-                print(error_msg)
+        for filename, error_msg in results:
+            finished_count += 1
+            if error_msg:
                 yield {"status": "error", "message": error_msg, "file": filename}
-        else:
+            else:
+                processed_count += 1
+                yield progress(filename)
+    
+    # PDFs are parsed in a process pool; files reach the embedding step as they finish
+    for filename, full_text in extracted:
+        if filename is None:
+            if batch and time.time() - batch_started >= Config.INGEST_BATCH_SECONDS:
+                yield from flush()
+            continue
+        extracted_count += 1
+        
+        if not (full_text and full_text.strip()):
+            finished_count += 1
             yield {"status": "error", "message": f"Could not extract text from {filename}", "file": filename}
+            continue
+        
+        # After reading PDF, before adding to DB
+        yield progress(filename, "embedding")
+        
+        if not batch:
+            batch_started = time.time()
+        # Structured fields go into metadata so analyze filters can run inside the vector query
+        batch.append({"id": filename, "text": full_text, "metadata": dict(fields.extract(full_text), source=filename)})
         
-    yield {"status": "complete", "message": f"Ingested {processed_count} new resumes.", "processed": processed_count, "total": total_files}
+        if len(batch) >= Config.INGEST_BATCH_SIZE or time.time() - batch_started >= Config.INGEST_BATCH_SECONDS:
+            yield from flush()
+    
+    if batch:
+        yield from flush()
+    
+    return processed_count
+
+def ingest_uploaded_files(uploads):
+    """
+    Ingest uploaded PDFs from memory instead of writing them and reading them
+    back in a separate sync. Content that is already indexed is skipped before
+    anything is written; new files are saved to the resumes folder, parsed from
+    their bytes and embedded in batches. Yields per-file progress updates.
+    uploads: list of (filename, bytes).
+    """
+    try:
+        collection = get_chroma_collection()
+    except ValueError as e:
+        yield {"status": "error", "message": f"Error getting collection: {e}"}
+        return
+
+    resumes_dir = Config.get_resumes_dir()
+    os.makedirs(resumes_dir, exist_ok=True)
+    root = os.path.abspath(resumes_dir)
+    
+    hashed = [(filename, data, hashlib.sha256(data).hexdigest()) for filename, data in uploads]
+    indexed = manifest.load_hash_index({digest for _, _, digest in hashed})
+    previous = manifest.load_rows(root, [filename for filename, _, _ in hashed])
+    
+    pending = {}
+    sources = {}
+    replaced = []
+    seen = {}
+    duplicate_count = 0
+    for filename, data, digest in hashed:
+        row = previous.get(filename)
+        if row and row["sha256"] == digest:
+            duplicate_count += 1
+            yield {"status": "skipped", "file": filename, "message": f"{filename} is already ingested"}
+            continue
+        if digest in indexed or digest in seen:
+            duplicate_count += 1
+            original = indexed.get(digest) or seen[digest]
+            yield {"status": "duplicate", "file": filename, "duplicate_of": original, "message": f"{filename} has the same content as {original}"}
+            continue
+        
+        seen[digest] = filename
+        file_path = os.path.join(resumes_dir, filename)
+        # Overwriting a file that may already have a vector is left to the regular sync
+        overwrite = row is not None or os.path.exists(file_path)
+        try:
+            with open(file_path, 'wb') as f:
+                f.write(data)
+            st = os.stat(file_path)
+        except OSError as e:
+            yield {"status": "error", "message": f"Failed to save {filename}: {e}", "file": filename}
+            continue
+        
+        if overwrite:
+            replaced.append(filename)
+        else:
+            pending[filename] = {"name": filename, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest, "doc_id": filename, "aliases": []}
+            sources[filename] = data
+    
+    processed_count = 0
+    if pending:
+        processed_count = yield from _embed_extracted(collection, root, _extract_texts(sources, idle_seconds=_EXTRACT_POLL_SECONDS), pending)
+    
+    removed_count = 0
+    for event in (ingest_resumes_from_disk(names=replaced) if replaced else ()):
+        if event["status"] == "complete":
+            processed_count += event.get("processed", 0)
+            removed_count = event.get("removed", 0)
+        else:
+            yield event
+    
+    yield {
+        "status": "complete",
+        "message": f"Ingested {processed_count} new resumes, skipped {duplicate_count} duplicates.",
+        "processed": processed_count,
+        "total": len(uploads),
+        "duplicates": duplicate_count,
+        "removed": removed_count
+    }
 
 def analyze_resume_with_huggingface(resume_text, job_description):
     """
     Analyze a resume against a job description using Hugging Face InferenceClient.
     """
+    client = get_llm_client()
     if not client:
+        metrics.inc("llm_fallback", reason="unconfigured")
         return {
             "match_percentage": 0,
             "summary": "Hugging Face API key not configured.",
@@ -219,42 +1164,39 @@ def analyze_resume_with_huggingface(resume_text, job_description):
             "evidence": []
         }
     
-    # Truncate if too long
-    truncated_doc = resume_text[:3000]
-    job_desc_truncated = job_description[:500]
+    cache_key = llm_cache.make_key(resume_text, job_description, Config.LLM_MODEL, prompt.cache_version(PROMPT_VERSION))
+    cached = llm_cache.get(cache_key)
+    if cached is not None:
+        print(f"[OK] Analysis cache hit - Match: {cached.get('match_percentage')}%")
+        return cached
     
-    prompt = f"""[INST] You are an expert HR recruiter. Analyze this resume against the job requirements and respond with ONLY valid JSON.
-    
-Job Requirements:
-{job_desc_truncated}
-
-Candidate Resume:
-{truncated_doc}
-
-Respond with this exact JSON format (nothing else):
-{{
-    "match_percentage": 75,
-    "summary": "two sentence candidate summary",
-    "pros": ["strength 1", "strength 2"],
-    "cons": ["gap 1", "gap 2"],
-    "evidence": ["quote from resume"]
-}}
-[/INST]"""
+    # Fill the token budget from the resume digest, or slice characters with PROMPT_BUILDER=legacy
+    if prompt.enabled():
+        prompt_text, prompt_tokens = prompt.build(resume_text, job_description)
+    else:
+        prompt_text = prompt.legacy(resume_text, job_description)
+        prompt_tokens = prompt.count_tokens(prompt_text)
+    metrics.inc("llm_prompt_tokens", prompt_tokens, builder=Config.PROMPT_BUILDER)
+    # Returned with every result of an LLM call (never cached), for prompt_report
+    stats = {"prompt_tokens": prompt_tokens}
+    started = time.perf_counter()
     
     try:
-        print(f"[INFO] Calling Hugging Face API with model: mistralai/Mistral-7B-Instruct-v0.2")
+        print(f"[INFO] Calling Hugging Face API with model: {Config.LLM_MODEL}")
         
-        completion = client.chat.completions.create(
-            model="mistralai/Mistral-7B-Instruct-v0.2",
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            max_tokens=800,
-            temperature=0.3
-        )
+        with metrics.timer("llm_call"):
+            completion = client.chat.completions.create(
+                model=Config.LLM_MODEL,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": prompt_text
+                    }
+                ],
+                max_tokens=Config.LLM_MAX_TOKENS,
+                temperature=0.3
+            )
+        stats["llm_seconds"] = round(time.perf_counter() - started, 3)
         
         text = completion.choices[0].message.content.strip()
         print(f"[INFO] Raw API Response ({len(text)} chars):")
@@ -280,10 +1222,12 @@ Respond with this exact JSON format (nothing else):
             parsed = json.loads(json_text)
         except json.JSONDecodeError as e:
             print(f"[WARN] Initial JSON parse failed: {e}")
+            metrics.inc("llm_json_repair")
             # Try to fix common issues
-            json_text = json_text.replace("'", '"')
-            json_text = json_text.replace('\n', ' ')
-            parsed = json.loads(json_text)
+            with metrics.timer("json_repair"):
+                json_text = json_text.replace("'", '"')
+                json_text = json_text.replace('\n', ' ')
+                parsed = json.loads(json_text)
         
         # Validate and build result
         result = {
@@ -295,10 +1239,13 @@ Respond with this exact JSON format (nothing else):
         }
         
         print(f"[OK] Analysis complete - Match: {result['match_percentage']}%")
-        return result
+        # Only parsed answers are cached; the fallbacks below never are
+        llm_cache.put(cache_key, result)
+        return dict(result, **stats)
         
     except json.JSONDecodeError as e:
         print(f"[ERROR] JSON Parse Error: {e}")
+        metrics.inc("llm_fallback", reason="parse")
         if 'json_text' in locals():
             print(f"   Failed to parse: {json_text[:200]}")
         if 'text' in locals():
@@ -308,16 +1255,87 @@ Respond with this exact JSON format (nothing else):
             "summary": "Resume analyzed. Skills and experience align with role requirements.",
             "pros": ["Relevant professional background", "Key competencies demonstrated"],
             "cons": ["Detailed technical review recommended"],
-            "evidence": []
+            "evidence": [],
+            **stats
         }
     except Exception as e:
         print(f"[ERROR] Hugging Face API Error: {type(e).__name__}: {str(e)}")
+        metrics.inc("llm_fallback", reason="timeout" if "timeout" in type(e).__name__.lower() else "error")
         import traceback
         traceback.print_exc()
-        return {
-            "match_percentage": 50,
-            "summary": "Initial screening complete. Manual review recommended for full assessment.",
-            "pros": ["Resume received for review"],
-            "cons": ["Automated analysis unavailable"],
-            "evidence": []
+        return dict(_unavailable_analysis(), prompt_tokens=prompt_tokens, llm_seconds=round(time.perf_counter() - started, 3))
+
+def _unavailable_analysis():
+    """
+    Result used when the LLM could not be reached or did not answer in time.
+    """
+    return {
+        "match_percentage": 50,
+        "summary": "Initial screening complete. Manual review recommended for full assessment.",
+        "pros": ["Resume received for review"],
+        "cons": ["Automated analysis unavailable"],
+        "evidence": []
+    }
+
+def iter_analyses(pairs, max_workers=None, total_timeout=None):
+    """
+    Analyze (resume_text, job_description) pairs concurrently with at most
+    max_workers LLM calls in flight. Yields (index, analysis) in completion
+    order. Each call is bounded by the client timeout; anything still
+    unfinished when total_timeout runs out gets the fallback result.
+    """
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+    
+    if not pairs:
+        return
+    
+    max_workers = max_workers or Config.LLM_CONCURRENCY
+    total_timeout = Config.ANALYZE_TIMEOUT if total_timeout is None else total_timeout
+    deadline = time.monotonic() + total_timeout
+    
+    pool = ThreadPoolExecutor(max_workers=min(max_workers, len(pairs)))
+    try:
+        futures = {
+            pool.submit(metrics.propagate(analyze_resume_with_huggingface), text, job_description): i
+            for i, (text, job_description) in enumerate(pairs)
         }
+        pending = set(futures)
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    analysis = future.result()
+                except Exception as e:
+                    print(f"[ERROR] Analysis worker failed: {e}")
+                    metrics.inc("llm_fallback", reason="error")
+                    analysis = _unavailable_analysis()
+                yield futures[future], analysis
+        
+        if pending:
+            print(f"[WARN] Analysis deadline of {total_timeout}s reached, {len(pending)} candidates get the fallback result")
+            metrics.inc("llm_fallback", len(pending), reason="deadline")
+        for future in pending:
+            yield futures[future], _unavailable_analysis()
+    finally:
+        # Calls still in flight finish in the background; queued ones are dropped
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def iter_resume_analyses(resume_texts, job_description, max_workers=None, total_timeout=None):
+    """
+    Analyze several resumes against one job description concurrently.
+    Yields (index, analysis) in completion order; see iter_analyses.
+    """
+    pairs = [(text, job_description) for text in resume_texts]
+    yield from iter_analyses(pairs, max_workers=max_workers, total_timeout=total_timeout)
+
+def analyze_resumes_concurrently(resume_texts, job_description, **kwargs):
+    """
+    Analyze several resumes concurrently. Returns analyses in input order.
+    """
+    results = [None] * len(resume_texts)
+    for i, analysis in iter_resume_analyses(resume_texts, job_description, **kwargs):
+        results[i] = analysis
+    return results
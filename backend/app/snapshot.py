@@ -0,0 +1,342 @@
+import os
+import json
+import time
+import shutil
+import sqlite3
+import hashlib
+from .config import Config
+from . import manifest
+from . import vector_index
+from . import fields
+from . import jobs
+
+# Snapshot export/import of the resume index, for bringing up a replica
+# without re-reading PDFs or loading the embedding model.
+#
+# A snapshot is a directory:
+#   snapshot.json    header: format version, counts, embedding model and dimension,
+#                    and a sha256 for every other file
+#   embeddings.npy   (N, dim) float32 or float16 matrix, np.load(mmap_mode='r')-able
+#   records.jsonl    one {"id", "metadata", "text"} per line, in matrix row order
+#   passage_embeddings.npy, passages.jsonl
+#                    the same for the passage collection (version 2, PASSAGE_INDEX on)
+#   files.jsonl      ingest manifest rows relative to the resumes folder, so the
+#                    first sync on the replica re-hashes its PDFs instead of re-embedding
+#   lexical.sqlite3  copy of the BM25 index, which is slow to rebuild from text
+#
+# Usage (from backend/):
+#   python -m app.snapshot export /backups/resumes-2024-06-01
+#   python -m app.snapshot import /backups/resumes-2024-06-01 [--replace]
+#
+# Import with the server stopped (or restart it afterwards): --replace
+# recreates the collection, and running workers keep a handle to the old one.
+
+FORMAT = "resume-index-snapshot"
+VERSION = 2
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+_BATCH = 1000
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _export_collection(collection, ids, out_dir, matrix_name, records_name, dtype, result):
+    """
+    Write ids' embeddings to matrix_name and their metadata and text to
+    records_name, in the same order. Yields progress updates and leaves the
+    row count and dimension in result (ids deleted meanwhile are skipped).
+    """
+    import numpy as np
+
+    matrix_path = os.path.join(out_dir, matrix_name)
+    matrix = None
+    written = dim = 0
+    with open(os.path.join(out_dir, records_name), "w", encoding="utf-8") as records:
+        for i in range(0, len(ids), _BATCH):
+            data = collection.get(ids=ids[i:i + _BATCH], include=['embeddings', 'documents', 'metadatas'])
+            if not data['ids']:
+                continue
+            embeddings = np.asarray(data['embeddings'], dtype=np.float32)
+            if matrix is None:
+                dim = embeddings.shape[1]
+                matrix = np.lib.format.open_memmap(matrix_path, mode="w+", dtype=dtype, shape=(len(ids), dim))
+            # Ids deleted since the listing are simply missing from the batch
+            matrix[written:written + len(data['ids'])] = embeddings
+            for doc_id, doc, meta in zip(data['ids'], data['documents'], data['metadatas']):
+                records.write(json.dumps({"id": doc_id, "metadata": meta or {}, "text": doc or ""}, ensure_ascii=False) + "\n")
+            written += len(data['ids'])
+            yield {"status": "progress", "collection": collection.name, "exported": written, "total": len(ids)}
+
+    if matrix is None:
+        np.save(matrix_path, np.empty((0, 0), dtype=dtype))
+    else:
+        matrix.flush()
+        del matrix
+        if written < len(ids):
+            trimmed_path = matrix_path[:-len(".npy")] + ".trimmed.npy"
+            full = np.load(matrix_path, mmap_mode="r")
+            np.save(trimmed_path, full[:written])
+            del full
+            os.replace(trimmed_path, matrix_path)
+    result.update(count=written, dim=int(dim))
+
+
+def export_snapshot(out_dir, dtype="float32"):
+    """
+    Write the current collection to out_dir as a snapshot. Yields progress updates.
+    """
+    from .services import get_chroma_collection, get_passage_collection, get_resume_ids, sync_lexical_index
+
+    if dtype not in vector_index.DTYPES:
+        raise ValueError(f"dtype must be one of {', '.join(vector_index.DTYPES)}")
+    if os.path.exists(out_dir) and os.listdir(out_dir):
+        raise ValueError(f"{out_dir} already exists and is not empty")
+
+    collection = get_chroma_collection()
+    # The BM25 copy must cover exactly the exported resumes
+    sync_lexical_index(collection)
+    ids = sorted(get_resume_ids(collection))
+    if not ids:
+        raise ValueError("The collection is empty, nothing to export")
+
+    tmp_dir = out_dir.rstrip("/\\") + ".partial"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    start = time.perf_counter()
+    resumes, passages = {}, {}
+    yield from _export_collection(collection, ids, tmp_dir, "embeddings.npy", "records.jsonl", dtype, resumes)
+    names = ["embeddings.npy", "records.jsonl"]
+    if Config.PASSAGE_INDEX:
+        # Passages travel with their vectors too, so the replica never re-splits or re-embeds them
+        passage_collection = get_passage_collection()
+        passage_ids = sorted(get_resume_ids(passage_collection))
+        yield from _export_collection(passage_collection, passage_ids, tmp_dir,
+                                      "passage_embeddings.npy", "passages.jsonl", dtype, passages)
+        names += ["passage_embeddings.npy", "passages.jsonl"]
+
+    root = os.path.abspath(Config.get_resumes_dir())
+    with open(os.path.join(tmp_dir, "files.jsonl"), "w", encoding="utf-8") as files:
+        for row in manifest.load_rows(root).values():
+            files.write(json.dumps(row, ensure_ascii=False) + "\n")
+    # The backup API gives a consistent, defragmented copy even while the index is in use
+    source = sqlite3.connect(Config.LEXICAL_INDEX_PATH)
+    target = sqlite3.connect(os.path.join(tmp_dir, "lexical.sqlite3"))
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+    names += ["files.jsonl", "lexical.sqlite3"]
+    header = {
+        "format": FORMAT,
+        "version": VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "count": resumes["count"],
+        "passages": passages.get("count", 0),
+        "dim": resumes["dim"],
+        "dtype": dtype,
+        "embedding_model": EMBEDDING_MODEL,
+        "fields_version": fields.FIELDS_VERSION,
+        "files": {name: {"sha256": _sha256(os.path.join(tmp_dir, name)),
+                         "bytes": os.path.getsize(os.path.join(tmp_dir, name))} for name in names},
+    }
+    with open(os.path.join(tmp_dir, "snapshot.json"), "w") as f:
+        json.dump(header, f, indent=2)
+
+    if os.path.exists(out_dir):
+        os.rmdir(out_dir)
+    os.replace(tmp_dir, out_dir)
+    size_mb = sum(entry["bytes"] for entry in header["files"].values()) / (1 << 20)
+    yield {"status": "complete",
+           "message": f"Exported {header['count']} resumes and {header['passages']} passages ({size_mb:.1f} MB) "
+                      f"in {time.perf_counter() - start:.1f}s",
+           "exported": header["count"], "path": out_dir}
+
+
+def read_header(snapshot_dir, verify=True):
+    """
+    Load and check a snapshot's header. verify also checks every file's sha256.
+    Raises ValueError if the snapshot is unusable.
+    """
+    try:
+        with open(os.path.join(snapshot_dir, "snapshot.json")) as f:
+            header = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Not a snapshot: {e}")
+    if header.get("format") != FORMAT or header.get("version") not in (1, VERSION):
+        raise ValueError(f"Unsupported snapshot format {header.get('format')} v{header.get('version')}")
+    if header.get("embedding_model") != EMBEDDING_MODEL:
+        raise ValueError(f"Snapshot was embedded with {header.get('embedding_model')}, this build queries with {EMBEDDING_MODEL}")
+    for name, entry in header["files"].items():
+        path = os.path.join(snapshot_dir, name)
+        if not os.path.exists(path) or os.path.getsize(path) != entry["bytes"]:
+            raise ValueError(f"{name} is missing or truncated")
+        if verify and _sha256(path) != entry["sha256"]:
+            raise ValueError(f"{name} does not match its checksum")
+    return header
+
+
+def _import_collection(collection, snapshot_dir, matrix_name, records_name, total, clean=None):
+    """
+    Add a snapshot's rows to collection with their stored embeddings, so
+    ChromaDB never calls the embedding model. clean(metadata) may adjust each
+    record's metadata. Yields progress updates.
+    """
+    import numpy as np
+
+    embeddings = np.load(os.path.join(snapshot_dir, matrix_name), mmap_mode="r")
+    loaded = 0
+    with open(os.path.join(snapshot_dir, records_name), encoding="utf-8") as records:
+        while loaded < total:
+            batch = [json.loads(line) for _, line in zip(range(_BATCH), records)]
+            if not batch:
+                break
+            vectors = np.asarray(embeddings[loaded:loaded + len(batch)], dtype=np.float32)
+            ids = [record["id"] for record in batch]
+            collection.add(
+                ids=ids,
+                embeddings=vectors.tolist(),
+                documents=[record["text"] for record in batch],
+                metadatas=[(clean(record["metadata"] or {}) if clean else record["metadata"]) or {"source": record["id"]}
+                           for record in batch]
+            )
+            yield ids, vectors
+            loaded += len(batch)
+
+
+def import_snapshot(snapshot_dir, replace=False, verify=True):
+    """
+    Load a snapshot into the (empty, or with replace=True wiped) collection,
+    together with its passages, keyword index, ingest manifest and vector index.
+    Yields progress updates.
+    """
+    from .passages import PASSAGES_VERSION
+    from .services import get_chroma_collection, get_passage_collection, reset_chroma_collection
+
+    header = read_header(snapshot_dir, verify)
+    collection = get_chroma_collection()
+    existing = collection.count()
+    if existing and not replace:
+        raise ValueError(f"The collection already holds {existing} resumes; import with replace to overwrite it")
+
+    with_passages = Config.PASSAGE_INDEX and "passages.jsonl" in header["files"]
+
+    def clean(meta):
+        # Resumes whose passages are not imported (v1 snapshots, PASSAGE_INDEX off
+        # on either side) lose the flag, so the next sync splits them again
+        if with_passages and meta.get("passages_version") == PASSAGES_VERSION:
+            return meta
+        return {key: value for key, value in meta.items() if key != "passages_version"}
+
+    start = time.perf_counter()
+    # Also clears the manifest, keyword index, vector index and passages
+    collection = reset_chroma_collection()
+    total = header["count"]
+    loaded = 0
+    for ids, vectors in _import_collection(collection, snapshot_dir, "embeddings.npy", "records.jsonl", total, clean):
+        if vector_index.enabled():
+            vector_index.add(ids, vectors)
+        loaded += len(ids)
+        yield {"status": "progress", "imported": loaded, "total": total}
+
+    passage_count = 0
+    if with_passages:
+        passage_total = header.get("passages", 0)
+        for ids, _ in _import_collection(get_passage_collection(), snapshot_dir,
+                                         "passage_embeddings.npy", "passages.jsonl", passage_total):
+            passage_count += len(ids)
+            yield {"status": "progress", "collection": "resume_passages", "imported": passage_count, "total": passage_total}
+
+    # Swap in the BM25 index wholesale rather than re-tokenizing every resume
+    source = sqlite3.connect(os.path.join(snapshot_dir, "lexical.sqlite3"))
+    target = sqlite3.connect(Config.LEXICAL_INDEX_PATH)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+    # Only files this node actually has: a manifest row without its file would
+    # count as a deletion on the next sync and drop the imported vector.
+    # mtimes differ on another machine, so that sync re-hashes each file once and keeps its vector.
+    root = os.path.abspath(Config.get_resumes_dir())
+    with open(os.path.join(snapshot_dir, "files.jsonl"), encoding="utf-8") as files:
+        rows = [json.loads(line) for line in files if line.strip()]
+    rows = [row for row in rows if os.path.isfile(os.path.join(root, row["name"]))]
+    manifest.record(root, rows)
+
+    message = (f"Imported {loaded} resumes and {passage_count} passages in {time.perf_counter() - start:.1f}s "
+               f"({len(rows)} files found in {root})")
+    if header.get("fields_version") != fields.FIELDS_VERSION:
+        message += "; structured fields are re-extracted on the next sync"
+    if Config.PASSAGE_INDEX and not passage_count:
+        message += "; passages are built on the next sync"
+    if Config.NEAR_DUPLICATES:
+        message += "; near-duplicate sketches are built on the next sync"
+    message += "; prompt digests are built on the next sync"
+    yield {"status": "complete", "message": message, "imported": loaded, "total": total}
+
+
+def _run(events, job_id=None):
+    status = "complete"
+    try:
+        for event in events:
+            if job_id:
+                jobs.append_event(job_id, event)
+            if event["status"] == "progress":
+                done = event.get("exported", event.get("imported"))
+                if done % (_BATCH * 10) == 0 or done == event["total"]:
+                    print(f"[INFO] {done}/{event['total']}")
+            else:
+                print(f"[OK] {event['message']}")
+    except Exception as e:
+        if isinstance(e, ValueError):
+            print(f"[ERROR] {e}")
+        else:
+            print(f"[ERROR] Snapshot failed: {e}")
+            import traceback
+            traceback.print_exc()
+        if job_id:
+            jobs.append_event(job_id, {"status": "error", "message": str(e)})
+        status = "error"
+    finally:
+        if job_id:
+            jobs.finish_job(job_id, status)
+    return 0 if status == "complete" else 1
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m app.snapshot", description="Export or import a resume index snapshot.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="write the current index to a snapshot directory")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--dtype", default="float32", choices=vector_index.DTYPES,
+                               help="embedding precision on disk (float16 halves the matrix)")
+    import_parser = commands.add_parser("import", help="load a snapshot into this node's index")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--replace", action="store_true", help="overwrite a non-empty collection")
+    import_parser.add_argument("--no-verify", action="store_true", help="skip the checksum pass")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        return _run(export_snapshot(args.path, args.dtype))
+
+    # Hold the ingest slot so no sync or upload writes to the collection mid-import
+    job, started = jobs.claim_job("resumes", kind="import")
+    if not started:
+        print(f"[ERROR] Ingest job {job['id']} is running; retry when it finishes")
+        return 1
+    return _run(import_snapshot(args.path, args.replace, not args.no_verify), job["id"])
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
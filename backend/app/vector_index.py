@@ -0,0 +1,329 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+import threading
+from .config import Config
+from . import metrics
+
+# Exact in-process vector search (VECTOR_ENGINE=numpy). Resume embeddings are
+# mirrored into one contiguous row-major matrix file next to the ChromaDB
+# collection and searched with a single matrix product plus argpartition, which
+# for up to ~100k resumes beats the round trip through ChromaDB's HNSW index and
+# never misses a neighbour.
+#
+# The matrix is memory-mapped read-only, so gunicorn workers share one copy in
+# the page cache. A small SQLite table maps ids to rows and carries a
+# generation counter; readers remap when it changes.
+#
+# Writes are append-only: a re-added id gets a new row and its old row, like a
+# deleted one, is only dropped from the table. Once dead rows outnumber a
+# quarter of the live ones the live rows are copied to a new file; processes
+# still mapping the old one keep a consistent view until they remap.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rows (
+    doc_id TEXT PRIMARY KEY,
+    row INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+"""
+
+DTYPES = ("float32", "float16")
+# Rows converted to float32 per step when the matrix is stored as float16
+_CHUNK_ROWS = 16384
+
+_lock = threading.Lock()
+# Read-side state of this process, rebuilt when the generation changes
+_view = {"key": None, "file_id": None, "rows": 0, "matrix": None, "norms": None, "ids": None, "live": None, "row_of": None}
+
+
+def enabled():
+    return Config.VECTOR_ENGINE == "numpy"
+
+
+def _matrix_path(file_id):
+    return f"{os.path.splitext(Config.VECTOR_INDEX_PATH)[0]}.{file_id}.matrix"
+
+
+def _remove_old_files(file_id):
+    # Called after commit: nobody can pick up the old file from the row table any more
+    directory = os.path.dirname(Config.VECTOR_INDEX_PATH) or "."
+    prefix = os.path.basename(os.path.splitext(Config.VECTOR_INDEX_PATH)[0]) + "."
+    current = os.path.basename(_matrix_path(file_id))
+    for name in os.listdir(directory):
+        if name.startswith(prefix) and name.endswith((".matrix", ".matrix.tmp")) and name != current:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+@contextmanager
+def _connect():
+    conn = sqlite3.connect(Config.VECTOR_INDEX_PATH, timeout=30)
+    try:
+        conn.executescript(_SCHEMA)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _meta(conn):
+    meta = dict(conn.execute("SELECT key, value FROM meta"))
+    meta.setdefault("rows", 0)
+    meta.setdefault("generation", 0)
+    meta.setdefault("file_id", 0)
+    return meta
+
+
+def _set_meta(conn, **values):
+    conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", list(values.items()))
+
+
+def _chunks(values, size=500):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _delete_rows(conn, doc_ids):
+    for chunk in _chunks(doc_ids):
+        marks = ",".join("?" * len(chunk))
+        conn.execute(f"DELETE FROM rows WHERE doc_id IN ({marks})", chunk)
+
+
+def add(doc_ids, embeddings):
+    """
+    Store [embedding] for [doc_id], replacing any previous vector for the same ids.
+    """
+    import numpy as np
+
+    if not doc_ids:
+        return
+    with _connect() as conn:
+        # Take the write lock first: the append and the row table must move together
+        conn.execute("BEGIN IMMEDIATE")
+        meta = _meta(conn)
+        dtype = meta.get("dtype") or Config.VECTOR_INDEX_DTYPE
+        vectors = np.asarray(embeddings, dtype=np.float32).astype(dtype, copy=False)
+        if vectors.ndim != 2 or len(vectors) != len(doc_ids):
+            raise ValueError(f"Expected {len(doc_ids)} embeddings, got shape {vectors.shape}")
+        dim = int(meta.get("dim") or vectors.shape[1])
+        if vectors.shape[1] != dim:
+            raise ValueError(f"Expected {dim}-dimensional embeddings, got {vectors.shape[1]}")
+
+        start = int(meta["rows"])
+        path = _matrix_path(meta["file_id"])
+        with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+            # Rows past the committed count are leftovers of an interrupted write
+            f.seek(start * dim * vectors.itemsize)
+            f.write(np.ascontiguousarray(vectors).tobytes())
+            f.truncate()
+
+        _delete_rows(conn, doc_ids)
+        conn.executemany(
+            "INSERT INTO rows (doc_id, row) VALUES (?, ?)",
+            [(doc_id, start + i) for i, doc_id in enumerate(doc_ids)]
+        )
+        _set_meta(conn, dim=dim, dtype=dtype, rows=start + len(doc_ids), generation=int(meta["generation"]) + 1)
+        compacted = _maybe_compact(conn)
+    if compacted is not None:
+        _remove_old_files(compacted)
+
+
+def remove(doc_ids):
+    if not doc_ids or not os.path.exists(Config.VECTOR_INDEX_PATH):
+        return
+    with _connect() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        _delete_rows(conn, doc_ids)
+        _set_meta(conn, generation=int(_meta(conn)["generation"]) + 1)
+        compacted = _maybe_compact(conn)
+    if compacted is not None:
+        _remove_old_files(compacted)
+
+
+def _maybe_compact(conn):
+    """
+    Copy the live rows to a new matrix file once dead rows exceed a quarter of
+    the live ones. Must be called inside a write transaction.
+    Returns the new file id, or None if nothing was done.
+    """
+    import numpy as np
+
+    meta = _meta(conn)
+    total = int(meta["rows"])
+    live = conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+    if total - live <= max(1000, live // 4):
+        return None
+
+    dim, dtype = int(meta["dim"]), meta["dtype"]
+    entries = conn.execute("SELECT doc_id, row FROM rows ORDER BY row").fetchall()
+    old = np.memmap(_matrix_path(meta["file_id"]), dtype=dtype, mode="r", shape=(total, dim))
+    file_id = int(meta["file_id"]) + 1
+    with open(_matrix_path(file_id), "wb") as f:
+        for chunk in _chunks(entries, _CHUNK_ROWS):
+            f.write(np.ascontiguousarray(old[[row for _, row in chunk]]).tobytes())
+    del old
+
+    conn.execute("DELETE FROM rows")
+    conn.executemany("INSERT INTO rows (doc_id, row) VALUES (?, ?)", [(doc_id, i) for i, (doc_id, _) in enumerate(entries)])
+    _set_meta(conn, rows=len(entries), file_id=file_id, generation=int(meta["generation"]) + 1)
+    print(f"[INFO] Compacted vector index: {total} -> {len(entries)} rows")
+    return file_id
+
+
+def clear():
+    with _connect() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        meta = _meta(conn)
+        conn.execute("DELETE FROM rows")
+        conn.execute("DELETE FROM meta")
+        file_id = int(meta["file_id"]) + 1
+        _set_meta(conn, file_id=file_id, generation=int(meta["generation"]) + 1)
+    _remove_old_files(file_id)
+
+
+def indexed_ids():
+    with _connect() as conn:
+        return {row[0] for row in conn.execute("SELECT doc_id FROM rows")}
+
+
+def count():
+    with _connect() as conn:
+        return conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+
+
+def stored_dtype():
+    """
+    dtype of the stored matrix, or None while it is empty.
+    """
+    with _connect() as conn:
+        return _meta(conn).get("dtype")
+
+
+def _refresh():
+    """
+    Current read-only view of the matrix, remapped only when a writer has bumped the generation.
+    """
+    for attempt in range(3):
+        try:
+            return _load_view()
+        except FileNotFoundError:
+            # A compaction removed the file between reading the table and mapping it
+            if attempt == 2:
+                raise
+
+
+def _load_view():
+    import numpy as np
+
+    with _connect() as conn:
+        # One read transaction, so the metadata and the row table agree
+        conn.execute("BEGIN")
+        meta = _meta(conn)
+        # The path is part of the key: generations of different stores can coincide
+        key = (Config.VECTOR_INDEX_PATH, meta["generation"])
+        if key == _view["key"]:
+            return _view
+        entries = conn.execute("SELECT doc_id, row FROM rows").fetchall()
+
+    with _lock:
+        if key == _view["key"]:
+            return _view
+        total = int(meta["rows"])
+        if not total or not entries:
+            _view.update(key=key, file_id=meta["file_id"], rows=0,
+                         matrix=None, norms=None, ids=None, live=None, row_of={})
+            return _view
+
+        dim = int(meta["dim"])
+        matrix = np.memmap(_matrix_path(meta["file_id"]), dtype=meta["dtype"], mode="r", shape=(total, dim))
+        # Appends leave existing rows untouched, so only new rows need their norms
+        norms = _view["norms"]
+        same_file = _view["key"] is not None and _view["key"][0] == key[0] and _view["file_id"] == meta["file_id"]
+        if norms is None or not same_file or _view["rows"] > total:
+            norms = np.empty(0, dtype=np.float32)
+        if len(norms) < total:
+            norms = np.concatenate([norms, _squared_norms(matrix[len(norms):])])
+
+        ids = np.full(total, None, dtype=object)
+        live = np.zeros(total, dtype=bool)
+        row_of = {}
+        for doc_id, row in entries:
+            ids[row] = doc_id
+            live[row] = True
+            row_of[doc_id] = row
+        _view.update(key=key, file_id=meta["file_id"], rows=total,
+                     matrix=matrix, norms=norms, ids=ids, live=live, row_of=row_of)
+        return _view
+
+
+def _squared_norms(matrix):
+    import numpy as np
+
+    norms = [np.einsum("ij,ij->i", block, block)
+             for block in (np.asarray(matrix[i:i + _CHUNK_ROWS], dtype=np.float32)
+                           for i in range(0, len(matrix), _CHUNK_ROWS))]
+    return np.concatenate(norms) if norms else np.empty(0, dtype=np.float32)
+
+
+def _dot(matrix, queries):
+    import numpy as np
+
+    if matrix.dtype == np.float32:
+        return matrix @ queries
+    # No BLAS for float16: widen a block at a time to bound the temporary copy
+    return np.concatenate([
+        np.asarray(matrix[i:i + _CHUNK_ROWS], dtype=np.float32) @ queries
+        for i in range(0, len(matrix), _CHUNK_ROWS)
+    ])
+
+
+def ready(expected_count):
+    """
+    Whether the index holds as many resumes as the collection (expected_count).
+    When it does not, e.g. mid-ingest or before the first sync, search ChromaDB instead.
+    """
+    return len(_refresh()["row_of"]) == expected_count
+
+
+def search(query_embeddings, limit=10, allowed_ids=None):
+    """
+    Exact nearest neighbours by squared L2 distance (ChromaDB's default space),
+    one best-first [doc_id] list per query embedding.
+    allowed_ids restricts the candidates (e.g. ids matching a metadata filter).
+    """
+    import numpy as np
+
+    view = _refresh()
+    if view["matrix"] is None:
+        return [[] for _ in query_embeddings]
+
+    with metrics.timer("vector_search"):
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        # |x - q|^2 = |x|^2 - 2 x.q + |q|^2; the last term does not change the order
+        distances = view["norms"][:, None] - 2 * _dot(view["matrix"], queries.T)
+
+        if allowed_ids is None:
+            candidates = view["live"]
+        else:
+            candidates = np.zeros(view["rows"], dtype=bool)
+            candidates[[view["row_of"][doc_id] for doc_id in allowed_ids if doc_id in view["row_of"]]] = True
+        distances[~candidates] = np.inf
+
+        available = int(candidates.sum())
+        k = min(limit, available)
+        rankings = []
+        for column in distances.T:
+            if k <= 0:
+                rankings.append([])
+                continue
+            top = np.argpartition(column, k - 1)[:k] if k < len(column) else np.arange(len(column))
+            top = top[np.argsort(column[top], kind="stable")]
+            rankings.append([view["ids"][row] for row in top if np.isfinite(column[row])])
+        return rankings
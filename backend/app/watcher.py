@@ -0,0 +1,217 @@
+import os
+import time
+import threading
+from .config import Config
+
+# Optional folder watcher (WATCH_RESUMES). Created, modified and deleted PDFs in
+# the resumes folder are collected, debounced, and synced as a background ingest
+# job for just those files. Uses watchdog's native observer (inotify on Linux)
+# when available, its polling observer if inotify can't be set up, and a plain
+# stat-polling loop if watchdog isn't installed at all. Only one process per
+# data directory runs the watcher.
+
+_state = {"mode": "off", "backend": None, "folder": None, "pending": 0, "last_sync": None}
+_started = False
+_start_lock = threading.Lock()
+_lock_file = None
+
+
+class _Debouncer:
+    """
+    Collects changed filenames and releases them once no new change has
+    arrived for `quiet` seconds, or `max_wait` seconds after the first one.
+    """
+    def __init__(self, quiet, max_wait):
+        self.quiet = quiet
+        self.max_wait = max_wait
+        self._names = set()
+        self._first = None
+        self._last = None
+        self._lock = threading.Lock()
+
+    def add(self, *names):
+        now = time.monotonic()
+        with self._lock:
+            self._names.update(names)
+            self._first = self._first or now
+            self._last = now
+            _state["pending"] = len(self._names)
+
+    def take_ready(self):
+        now = time.monotonic()
+        with self._lock:
+            if not self._names:
+                return None
+            if now - self._last < self.quiet and now - self._first < self.max_wait:
+                return None
+            names, self._names = self._names, set()
+            self._first = self._last = None
+            _state["pending"] = 0
+            return names
+
+
+def _is_resume(path, root):
+    return bool(path) and path.lower().endswith(".pdf") and os.path.dirname(os.path.abspath(path)) == root
+
+
+def _start_watchdog(root, debouncer, mode):
+    """
+    Watch root with watchdog. Returns the running observer, or None if watchdog is unavailable.
+    """
+    try:
+        from watchdog.observers import Observer
+        from watchdog.observers.polling import PollingObserver
+        from watchdog.events import FileSystemEventHandler
+    except ImportError:
+        print("[X] watchdog not installed, falling back to stat polling")
+        return None
+
+    class ResumeFolderHandler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if event.is_directory or event.event_type not in ("created", "modified", "deleted", "moved", "closed"):
+                return
+            for path in (event.src_path, getattr(event, "dest_path", None)):
+                if _is_resume(path, root):
+                    debouncer.add(os.path.basename(path))
+
+    observer_classes = [PollingObserver] if mode == "poll" else [Observer, PollingObserver]
+    for observer_class in observer_classes:
+        try:
+            observer = observer_class(timeout=Config.WATCH_POLL_SECONDS) if observer_class is PollingObserver else observer_class()
+            observer.schedule(ResumeFolderHandler(), root, recursive=False)
+            observer.start()
+            _state["backend"] = "watchdog-polling" if observer_class is PollingObserver else "watchdog-native"
+            return observer
+        except OSError as e:
+            # e.g. the inotify watch limit is exhausted, or the folder is on a network mount
+            print(f"[WARN] {observer_class.__name__} failed on {root}: {e}")
+    return None
+
+
+class _StatPoller:
+    """
+    Fallback without watchdog: diff (size, mtime) snapshots of the folder.
+    """
+    def __init__(self, root, debouncer):
+        self.root = root
+        self.debouncer = debouncer
+        self._stop = threading.Event()
+        self._snapshot = self._scan()
+        self._thread = threading.Thread(target=self._run, name="resume-folder-poller", daemon=True)
+
+    def _scan(self):
+        snapshot = {}
+        try:
+            with os.scandir(self.root) as entries:
+                for entry in entries:
+                    if entry.name.lower().endswith(".pdf") and entry.is_file():
+                        st = entry.stat()
+                        snapshot[entry.name] = (st.st_size, st.st_mtime_ns)
+        except OSError as e:
+            print(f"[WARN] Could not scan {self.root}: {e}")
+        return snapshot
+
+    def _run(self):
+        while not self._stop.wait(Config.WATCH_POLL_SECONDS):
+            current = self._scan()
+            changed = [name for name, stat in current.items() if self._snapshot.get(name) != stat]
+            changed += [name for name in self._snapshot if name not in current]
+            if changed:
+                self.debouncer.add(*changed)
+            self._snapshot = current
+
+    def start(self):
+        _state["backend"] = "stat-polling"
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+
+def _acquire_process_lock():
+    """
+    Make sure only one process per data directory watches the folder.
+    """
+    global _lock_file
+    try:
+        import fcntl
+    except ImportError:
+        # No flock (Windows): the dev server is a single process anyway
+        return True
+    _lock_file = open(os.path.join(Config.CHROMA_DB_DIR, "watcher.lock"), "w")
+    try:
+        fcntl.flock(_lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        _lock_file.close()
+        _lock_file = None
+        return False
+
+
+def _run(mode):
+    from . import jobs
+    from .services import ingest_resumes_from_disk
+
+    debouncer = _Debouncer(Config.WATCH_DEBOUNCE_SECONDS, Config.WATCH_MAX_WAIT_SECONDS)
+    observer = None
+    root = None
+
+    while True:
+        try:
+            # Follow runtime changes of the resumes folder
+            current_root = os.path.abspath(Config.get_resumes_dir())
+            if current_root != root:
+                if observer:
+                    observer.stop()
+                    observer.join(5)
+                root = current_root
+                observer = None
+                if os.path.isdir(root):
+                    observer = _start_watchdog(root, debouncer, mode) or _StatPoller(root, debouncer)
+                    if isinstance(observer, _StatPoller):
+                        observer.start()
+                    print(f"[OK] Watching {root} for resume changes ({_state['backend']})")
+                _state["folder"] = root
+
+            names = debouncer.take_ready()
+            if names:
+                job, started = jobs.start_background(
+                    "resumes", lambda names=sorted(names): ingest_resumes_from_disk(names=names), kind="watch"
+                )
+                if started:
+                    print(f"[INFO] Watcher syncing {len(names)} changed resumes (job {job['id']})")
+                    _state["last_sync"] = {"job_id": job["id"], "files": len(names), "at": time.time()}
+                else:
+                    # Another ingest holds the slot; try these files again shortly
+                    debouncer.add(*names)
+        except Exception as e:
+            print(f"[ERROR] Resume folder watcher: {e}")
+        time.sleep(0.5)
+
+
+def start_watcher():
+    """
+    Start the folder watcher if WATCH_RESUMES is enabled and no other process runs it.
+    Safe to call more than once.
+    """
+    global _started
+    mode = Config.WATCH_RESUMES
+    if mode == "off":
+        return False
+    with _start_lock:
+        if _started:
+            return True
+        if not _acquire_process_lock():
+            _state["mode"] = "standby"
+            return False
+        _started = True
+        _state["mode"] = mode
+    threading.Thread(target=_run, args=(mode,), name="resume-folder-watcher", daemon=True).start()
+    return True
+
+
+def watcher_state():
+    return dict(_state)
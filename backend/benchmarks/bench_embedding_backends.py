@@ -0,0 +1,127 @@
+"""
+Embedding backend comparison: PyTorch MiniLM vs the int8 ONNX export.
+
+The corpus is the text of every PDF in --resumes, split into ~500 character
+passages so there are enough items for a meaningful top-10. For each backend
+it reports:
+    load_seconds      - model load time
+    docs_per_sec      - batch encode throughput over the corpus
+    query_p50/p95_ms  - single-query encode latency
+and for the ONNX backend the mean top-10 overlap with the PyTorch results
+over a set of job-description queries (1.0 = identical neighbours).
+
+Usage (from backend/):
+    python benchmarks/bench_embedding_backends.py --resumes ../data/resumes --out embed.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import services
+from app.config import Config
+
+QUERIES = [
+    "Senior software engineer with Python, Flask and PostgreSQL experience",
+    "DevOps engineer: Kubernetes, Terraform, AWS, CI/CD pipelines",
+    "Data scientist with PySpark, machine learning and statistics background",
+    "Product manager who has shipped B2B SaaS products and led roadmaps",
+    "UX designer with Figma, user research and design systems portfolio",
+    "Personal trainer certified in strength and conditioning",
+    "Full stack developer React Node.js TypeScript",
+    "Frontend engineer focused on accessibility and performance",
+]
+
+
+def load_passages(resumes_dir, size=500):
+    passages = []
+    for filename in sorted(os.listdir(resumes_dir)):
+        if not filename.lower().endswith(".pdf"):
+            continue
+        text = services.process_pdf(os.path.join(resumes_dir, filename)) or ""
+        text = " ".join(text.split())
+        passages.extend(text[i:i + size] for i in range(0, len(text), size) if text[i:i + size].strip())
+    return passages
+
+
+def load_backend(backend):
+    Config.EMBEDDING_BACKEND = backend
+    start = time.perf_counter()
+    embedding_function = services._initialize_embedding_function()
+    return embedding_function, time.perf_counter() - start
+
+
+def loaded_backend(embedding_function):
+    return getattr(embedding_function.model, "backend", "torch")
+
+
+def top_k(embedding_function, corpus_vectors, query, k=10):
+    import numpy as np
+    q = np.asarray(embedding_function([query])[0], dtype=np.float32)
+    scores = corpus_vectors @ (q / np.linalg.norm(q))
+    return set(np.argsort(-scores)[:k].tolist())
+
+
+def bench(backend, passages):
+    import numpy as np
+    embedding_function, load_seconds = load_backend(backend)
+    embedding_function(["warmup"])
+    
+    start = time.perf_counter()
+    vectors = np.asarray(embedding_function(passages), dtype=np.float32)
+    encode_seconds = time.perf_counter() - start
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    
+    latencies = []
+    for _ in range(5):
+        for query in QUERIES:
+            t = time.perf_counter()
+            embedding_function([query])
+            latencies.append((time.perf_counter() - t) * 1000)
+    latencies.sort()
+    
+    return embedding_function, vectors, {
+        "backend": backend,
+        "load_seconds": round(load_seconds, 3),
+        "docs_per_sec": round(len(passages) / encode_seconds, 1),
+        "query_p50_ms": round(statistics.median(latencies), 2),
+        "query_p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resumes", default=os.path.join(Config.DATA_DIR, 'resumes'))
+    parser.add_argument("--out", help="write results to this JSON file")
+    args = parser.parse_args()
+    
+    passages = load_passages(args.resumes)
+    print(f"Corpus: {len(passages)} passages from {args.resumes}")
+    
+    torch_fn, torch_vectors, torch_stats = bench("torch", passages)
+    onnx_fn, onnx_vectors, onnx_stats = bench("onnx", passages)
+    if loaded_backend(onnx_fn) != "onnx":
+        # _initialize_embedding_function fell back to PyTorch; comparing it with itself means nothing
+        print("[ERROR] The ONNX backend did not load (see the warning above), no comparison to report")
+        sys.exit(1)
+    
+    overlaps = []
+    for query in QUERIES:
+        reference = top_k(torch_fn, torch_vectors, query)
+        candidate = top_k(onnx_fn, onnx_vectors, query)
+        overlaps.append(len(reference & candidate) / len(reference))
+    onnx_stats["top10_overlap"] = round(statistics.mean(overlaps), 3)
+    
+    results = {"passages": len(passages), "backends": [torch_stats, onnx_stats]}
+    print(json.dumps(results, indent=2))
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
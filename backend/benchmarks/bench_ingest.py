@@ -0,0 +1,67 @@
+"""
+Ingestion throughput benchmark.
+
+Runs ingest_resumes_from_disk over a folder of PDFs once with per-file adds
+(INGEST_BATCH_SIZE=1) and once with micro-batching, each into a fresh ChromaDB
+directory, and prints docs/sec for both runs.
+
+Usage (from backend/):
+    python benchmarks/bench_ingest.py --resumes ../data/resumes --batch-size 32
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import services
+from app.config import Config
+from bench_suite import use_data_dir
+
+
+def run_ingest(resumes_dir, batch_size):
+    """Ingest resumes_dir into a throwaway ChromaDB and return (processed, seconds)."""
+    db_dir = tempfile.mkdtemp(prefix="bench_chroma_")
+    use_data_dir(db_dir)
+    Config.INGEST_BATCH_SIZE = batch_size
+    Config.set_resumes_dir(resumes_dir)
+    services.invalidate_chroma_collection(close_client=True)
+    
+    try:
+        start = time.perf_counter()
+        processed = 0
+        for event in services.ingest_resumes_from_disk():
+            if event["status"] == "complete":
+                processed = event.get("processed", 0)
+            elif event["status"] == "error":
+                print(f"   [WARN] {event.get('message')}")
+        return processed, time.perf_counter() - start
+    finally:
+        services.invalidate_chroma_collection(close_client=True)
+        shutil.rmtree(db_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resumes", default=os.path.join(Config.DATA_DIR, 'resumes'))
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=Config.INGEST_WORKERS)
+    args = parser.parse_args()
+    
+    Config.INGEST_WORKERS = args.workers
+    
+    # Load the embedding model up front so neither run pays for it
+    services.get_embedding_function()
+    
+    print(f"Corpus: {args.resumes} | workers: {args.workers}")
+    for label, batch_size in (("per-file", 1), ("batched", args.batch_size)):
+        processed, seconds = run_ingest(args.resumes, batch_size)
+        rate = processed / seconds if seconds else 0.0
+        print(f"{label:>9} (batch={batch_size:>3}): {processed} docs in {seconds:.2f}s -> {rate:.1f} docs/sec")
+
+
+if __name__ == "__main__":
+    main()
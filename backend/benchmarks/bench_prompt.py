@@ -0,0 +1,167 @@
+"""
+Analysis prompt benchmark: legacy character slicing vs the token budget.
+
+Builds the prompt for the same (resume, job description) pairs both ways and
+prints prompt tokens, how much of the resume each prompt carries and the time
+to build it. Resumes are synthetic by default, rendered one to three pages
+long with the layout noise pypdf leaves in template PDFs (repeated page
+headers, page numbers, separator rules, alignment spaces, ligatures, words
+hyphenated across lines); --corpus extracts a folder of PDFs with the app's
+reader instead.
+
+With --llm N and an endpoint configured (HUGGINGFACE_API_KEY or
+HF_INFERENCE_URL), the first N pairs are also analyzed with both prompts,
+alternating which goes first, and the LLM latency of each builder and the
+per-request change are printed. The analysis cache is off for the run.
+benchmarks/stub_llm_server.py ignores prompt length, so only a real model
+gives a meaningful latency change.
+
+Usage (from backend/):
+    python benchmarks/bench_prompt.py --pairs 500 --tokenizer estimate
+    python benchmarks/bench_prompt.py --corpus benchmarks/corpus/10k --pairs 200 --llm 20
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config import Config
+from bench_suite import percentiles
+from synthetic_corpus import job_descriptions, resume_lines
+
+
+def noisy_resume(rng, index):
+    """Resume text as extracted from a multi-page template PDF."""
+    lines = resume_lines(rng, index)
+    skills = lines.index("Skills")
+    for _ in range(rng.randint(0, 2)):
+        more = resume_lines(rng, index)
+        lines[skills - 1:skills - 1] = more[more.index("Experience") + 1:more.index("Skills") - 1]
+        skills = lines.index("Skills")
+
+    header, contact = lines[0], lines[1]
+    pages = [lines[i:i + 40] for i in range(0, len(lines), 40)]
+    out = []
+    for number, page in enumerate(pages, start=1):
+        if number > 1:
+            out += [header.upper(), contact]
+        for line in page:
+            if rng.random() < 0.08:
+                out.append("_" * rng.randint(20, 60))
+            line = line.replace("fi", "\ufb01") if rng.random() < 0.3 else line
+            if line.startswith("- "):
+                line = "\u2022    " + line[2:]
+            words = line.split(" ")
+            if len(line) > 70 and rng.random() < 0.4:
+                # Wrapped mid-word at the end of the text column
+                cut = rng.randint(len(words) // 2, len(words) - 1)
+                word = words[cut]
+                if len(word) > 5 and word.isalpha() and word.islower():
+                    out.append(" ".join(words[:cut] + [word[:3] + "-"]))
+                    out.append("  " + " ".join([word[3:]] + words[cut + 1:]))
+                    continue
+            out.append(" ".join(w + " " * rng.choice((0, 0, 0, 2, 5)) for w in words).rstrip())
+        out += ["", f"Page {number} of {len(pages)}", ""]
+    return "\n".join(out)
+
+
+def corpus_texts(folder, count):
+    from app import services
+
+    names = sorted(name for name in os.listdir(folder) if name.lower().endswith(".pdf"))[:count]
+    return [services.process_pdf(os.path.join(folder, name)) for name in names]
+
+
+def coverage(prompt_text, text):
+    """Share of the resume's lines that made it into the prompt."""
+    lines = [line for line in text.split("\n") if line.strip()]
+    return sum(1 for line in lines if line in prompt_text) / max(1, len(lines))
+
+
+def bench_builders(resumes, descriptions):
+    from app import digests, prompt
+
+    rows = {"legacy": [], "budget": []}
+    for raw, description in zip(resumes, descriptions):
+        start = time.perf_counter()
+        text = prompt.legacy(raw, description)
+        rows["legacy"].append((prompt.count_tokens(text), coverage(text, raw), time.perf_counter() - start))
+
+        start = time.perf_counter()
+        digest = digests.normalize(raw)
+        text, tokens = prompt.build(digest, description)
+        rows["budget"].append((tokens, coverage(text, digest), time.perf_counter() - start))
+    return rows
+
+
+def bench_llm(resumes, descriptions, count):
+    from app import digests, services
+
+    Config.LLM_CACHE_ENABLED = False
+    seconds = {"legacy": [], "budget": []}
+    for i, (raw, description) in enumerate(zip(resumes[:count], descriptions[:count])):
+        order = ("legacy", "budget") if i % 2 == 0 else ("budget", "legacy")
+        for builder in order:
+            Config.PROMPT_BUILDER = builder
+            text = raw if builder == "legacy" else digests.normalize(raw)
+            analysis = services.analyze_resume_with_huggingface(text, description)
+            seconds[builder].append(analysis.get("llm_seconds"))
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pairs", type=int, default=500, help="resume/job description pairs")
+    parser.add_argument("--corpus", default=None, help="extract the PDFs in this folder instead of synthetic resumes")
+    parser.add_argument("--tokenizer", default=None, help="PROMPT_TOKENIZER to count with (\"estimate\" for no download)")
+    parser.add_argument("--budget", type=int, default=None, help="LLM_PROMPT_TOKENS")
+    parser.add_argument("--llm", type=int, default=0, help="also analyze this many pairs with each builder")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.tokenizer:
+        Config.PROMPT_TOKENIZER = args.tokenizer
+    if args.budget:
+        Config.LLM_PROMPT_TOKENS = args.budget
+
+    if args.corpus:
+        resumes = corpus_texts(args.corpus, args.pairs)
+    else:
+        rng = random.Random(args.seed)
+        resumes = [noisy_resume(rng, i) for i in range(args.pairs)]
+    descriptions = job_descriptions(len(resumes))
+
+    from app import prompt
+    print(f"{len(resumes)} pairs, tokenizer {prompt.tokenizer_name()}, budget {Config.LLM_PROMPT_TOKENS} "
+          f"(job description {Config.LLM_JD_TOKENS})")
+    rows = bench_builders(resumes, descriptions)
+    for builder, values in rows.items():
+        tokens = sorted(value[0] for value in values)
+        build = percentiles([value[2] for value in values])
+        print(f"  {builder:<7} tokens mean {sum(tokens) / len(tokens):7.1f}  p50 {tokens[len(tokens) // 2]:5d}  "
+              f"max {tokens[-1]:5d}  resume lines kept {sum(value[1] for value in values) / len(values):6.1%}  "
+              f"build p50 {build['p50_ms']:6.2f}ms p99 {build['p99_ms']:6.2f}ms")
+    legacy = sum(value[0] for value in rows["legacy"])
+    budget = sum(value[0] for value in rows["budget"])
+    print(f"  saved {legacy - budget} prompt tokens ({(legacy - budget) / max(1, legacy):.1%})")
+
+    if args.llm:
+        if not (Config.HUGGINGFACE_API_KEY or Config.HF_INFERENCE_URL):
+            print("No LLM endpoint configured (HUGGINGFACE_API_KEY or HF_INFERENCE_URL), skipping --llm")
+            return
+        seconds = bench_llm(resumes, descriptions, args.llm)
+        for builder, samples in seconds.items():
+            stats = percentiles([s for s in samples if s is not None])
+            if stats:
+                print(f"  {builder:<7} LLM p50 {stats['p50_ms']:8.1f}ms  p90 {stats['p90_ms']:8.1f}ms  mean {stats['mean_ms']:8.1f}ms")
+        deltas = [b - a for a, b in zip(seconds["legacy"], seconds["budget"]) if a is not None and b is not None]
+        if deltas:
+            print(f"  LLM latency change per request: mean {sum(deltas) / len(deltas) * 1000:+.1f}ms, "
+                  f"median {sorted(deltas)[len(deltas) // 2] * 1000:+.1f}ms over {len(deltas)} pairs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Cold start benchmark.
+
+Starts fresh interpreters and measures, for each run:
+    import_seconds        - importing app and building the Flask app
+    first_request_seconds - the first GET /api/resumes after that
+    ready_seconds         - until the embedding model reports ready (warmup mode only)
+    heavy_modules         - which of torch/transformers/sentence_transformers got imported
+                            before the first request was answered
+
+Prints medians and writes the raw runs as JSON so regressions show up
+between commits.
+
+Usage (from backend/):
+    python benchmarks/bench_startup.py --runs 5 --warmup background --out startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Runs inside the child interpreter
+CHILD = r'''
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+app = create_app()
+imported = time.perf_counter()
+client = app.test_client()
+response = client.get('/api/resumes?limit=1')
+answered = time.perf_counter()
+heavy = [m for m in ('torch', 'transformers', 'sentence_transformers') if m in sys.modules]
+ready = None
+if WAIT_READY:
+    from app.services import embedding_model_state
+    while embedding_model_state()["status"] in ("cold", "loading") and time.perf_counter() - start < 600:
+        time.sleep(0.05)
+    ready = round(time.perf_counter() - start, 3)
+print(json.dumps({
+    "import_seconds": round(imported - start, 3),
+    "first_request_seconds": round(answered - imported, 3),
+    "status_code": response.status_code,
+    "ready_seconds": ready,
+    "heavy_modules": heavy,
+}))
+'''
+
+
+def run_once(warmup):
+    env = dict(os.environ, EMBEDDING_WARMUP=warmup)
+    code = CHILD.replace("WAIT_READY", "True" if warmup != "off" else "False")
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    # The app prints its own log lines; the result is the last line
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warmup", choices=["off", "background", "sync"], default="background")
+    parser.add_argument("--out", help="write raw results to this JSON file")
+    args = parser.parse_args()
+    
+    runs = [run_once(args.warmup) for _ in range(args.runs)]
+    summary = {
+        key: statistics.median(r[key] for r in runs)
+        for key in ("import_seconds", "first_request_seconds")
+    }
+    if args.warmup != "off":
+        summary["ready_seconds"] = statistics.median(r["ready_seconds"] for r in runs)
+    summary["heavy_modules_before_first_request"] = sorted({m for r in runs for m in r["heavy_modules"]})
+    
+    print(json.dumps({"warmup": args.warmup, "runs": args.runs, "median": summary}, indent=2))
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({"warmup": args.warmup, "median": summary, "runs": runs}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
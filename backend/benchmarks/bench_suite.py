@@ -0,0 +1,247 @@
+"""
+End-to-end benchmark suite on a synthetic corpus.
+
+For each requested scale it generates (or reuses) a deterministic synthetic
+corpus, then measures against a throwaway data directory:
+    ingest   - ingest_resumes_from_disk throughput, plus a no-op resync
+    resumes  - GET /api/resumes latency percentiles over random pages
+    analyze  - POST /api/analyze latency percentiles, with the LLM replaced
+               by the local stub server (stub_llm_server.py) in a thread
+    memory   - peak RSS of this process and of its extraction workers
+
+Results are written as JSON (one file per run) so runs can be diffed across
+commits with --compare.
+
+Usage (from backend/):
+    python benchmarks/bench_suite.py --sizes 1k,10k --queries 20 --llm-delay 0.2
+    python benchmarks/bench_suite.py --compare results/a.json results/b.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(BENCH_DIR, '..')))
+
+from app.config import Config
+import synthetic_corpus
+from stub_llm_server import make_handler
+
+
+def percentiles(samples):
+    """Latency summary in milliseconds."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+        "p50_ms": pick(0.50),
+        "p90_ms": pick(0.90),
+        "p99_ms": pick(0.99),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, text=True).strip()
+    except Exception:
+        return None
+
+
+def start_stub_llm(delay, jitter):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(delay, jitter, 0.0))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def use_data_dir(db_dir):
+    """Point every on-disk store at a throwaway directory."""
+    Config.CHROMA_DB_DIR = db_dir
+    Config.MANIFEST_PATH = os.path.join(db_dir, 'ingest_manifest.sqlite3')
+    Config.LEXICAL_INDEX_PATH = os.path.join(db_dir, 'lexical_index.sqlite3')
+    Config.DUPLICATE_INDEX_PATH = os.path.join(db_dir, 'duplicate_index.sqlite3')
+    Config.DIGEST_INDEX_PATH = os.path.join(db_dir, 'resume_digests.sqlite3')
+    Config.LLM_CACHE_PATH = os.path.join(db_dir, 'llm_cache.sqlite3')
+    Config.JOBS_PATH = os.path.join(db_dir, 'ingest_jobs.sqlite3')
+    Config.VECTOR_INDEX_PATH = os.path.join(db_dir, 'vector_index.sqlite3')
+
+
+def bench_ingest(services):
+    start = time.perf_counter()
+    processed = errors = 0
+    for event in services.ingest_resumes_from_disk():
+        if event["status"] == "complete":
+            processed = event.get("processed", 0)
+        elif event["status"] == "error":
+            errors += 1
+    seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in services.ingest_resumes_from_disk():
+        pass
+    resync = time.perf_counter() - start
+
+    return {
+        "processed": processed,
+        "errors": errors,
+        "seconds": round(seconds, 2),
+        "docs_per_sec": round(processed / seconds, 1) if seconds else 0.0,
+        "noop_resync_seconds": round(resync, 3),
+    }
+
+
+def bench_resumes(client, total, requests, page_size):
+    rng = random.Random(1)
+    samples = []
+    for _ in range(requests):
+        offset = rng.randrange(max(1, total - page_size))
+        start = time.perf_counter()
+        response = client.get(f"/api/resumes?limit={page_size}&offset={offset}")
+        samples.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.data[:200]
+    return dict(percentiles(samples), page_size=page_size)
+
+
+def bench_analyze(client, queries):
+    samples = []
+    for description in synthetic_corpus.job_descriptions(queries):
+        start = time.perf_counter()
+        response = client.post("/api/analyze", json={"description": description})
+        samples.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.data[:200]
+    return percentiles(samples)
+
+
+def run_scale(size_label, args, services, app):
+    size = synthetic_corpus.parse_size(size_label)
+    corpus_dir = os.path.join(args.corpus_root, size_label)
+    print(f"[INFO] Corpus {size_label}: {corpus_dir}")
+    synthetic_corpus.generate(corpus_dir, size, args.seed)
+
+    db_dir = tempfile.mkdtemp(prefix="bench_suite_")
+    use_data_dir(db_dir)
+    Config.set_resumes_dir(corpus_dir)
+    services.invalidate_chroma_collection(close_client=True)
+    try:
+        result = {"size": size}
+        print(f"[INFO] Ingesting {size} resumes...")
+        result["ingest"] = bench_ingest(services)
+        print(f"[OK] {result['ingest']}")
+
+        client = app.test_client()
+        result["resumes"] = bench_resumes(client, size, args.requests, args.page_size)
+        print(f"[OK] /api/resumes {result['resumes']}")
+        result["analyze"] = bench_analyze(client, args.queries)
+        print(f"[OK] /api/analyze {result['analyze']}")
+        result["peak_rss_mb"] = peak_rss_mb()
+        return result
+    finally:
+        services.invalidate_chroma_collection(close_client=True)
+        shutil.rmtree(db_dir, ignore_errors=True)
+
+
+def compare(old_path, new_path):
+    """Print metric deltas between two result files, scale by scale."""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{old['meta'].get('commit')} -> {new['meta'].get('commit')}")
+    old_runs = {run["size"]: run for run in old["runs"]}
+    for run in new["runs"]:
+        base = old_runs.get(run["size"])
+        if not base:
+            continue
+        print(f"\nsize {run['size']}")
+        for section, metric in (("ingest", "docs_per_sec"), ("ingest", "noop_resync_seconds"),
+                                ("resumes", "p50_ms"), ("resumes", "p99_ms"),
+                                ("analyze", "p50_ms"), ("analyze", "p99_ms"),
+                                ("peak_rss_mb", "self")):
+            before = base.get(section, {}).get(metric)
+            after = run.get(section, {}).get(metric)
+            if before is None or after is None:
+                continue
+            change = f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+            print(f"  {section + '.' + metric:<28} {before:>10} -> {after:>10}  {change}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1k", help="comma-separated corpus sizes, e.g. 1k,10k,50k")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--corpus-root", default=os.path.join(BENCH_DIR, "corpus"))
+    parser.add_argument("--requests", type=int, default=200, help="/api/resumes requests per scale")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=20, help="/api/analyze requests per scale")
+    parser.add_argument("--llm-delay", type=float, default=0.2, help="stub LLM seconds per call")
+    parser.add_argument("--llm-jitter", type=float, default=0.05)
+    parser.add_argument("--out", default=None, help="result file (default benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="diff two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    # Stub LLM, no analysis cache (every query should reach the "LLM"), no background work
+    server, url = start_stub_llm(args.llm_delay, args.llm_jitter)
+    Config.HF_INFERENCE_URL = url
+    Config.LLM_CACHE_ENABLED = False
+    Config.EMBEDDING_WARMUP = "off"
+    Config.WATCH_RESUMES = "off"
+
+    from app import create_app, services
+    app = create_app()
+    # Load the model before timing anything
+    services.get_embedding_function()
+
+    meta = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": args.seed,
+        "llm_delay": args.llm_delay,
+        "config": {key: getattr(Config, key, None) for key in (
+            "INGEST_WORKERS", "INGEST_BATCH_SIZE", "EMBEDDING_BACKEND", "HYBRID_SEARCH",
+            "RERANK_BACKEND", "RERANK_CANDIDATES", "LLM_TOP_K", "LLM_CONCURRENCY",
+        )},
+    }
+    runs = [run_scale(label.strip(), args, services, app) for label in args.sizes.split(",") if label.strip()]
+    server.shutdown()
+
+    out = args.out or os.path.join(BENCH_DIR, "results", f"{time.strftime('%Y%m%d-%H%M%S')}-{meta['commit'] or 'nogit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump({"meta": meta, "runs": runs}, f, indent=2)
+    print(f"[OK] Results written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Vector search benchmark: ChromaDB query vs the in-process NumPy index.
+
+Loads the same N vectors into a throwaway ChromaDB collection and into
+app/vector_index.py (float32 and float16), then runs the same queries
+against each and prints latency percentiles and recall@k. Ground truth is
+brute force, so the NumPy engine should report recall 1.0 (float16 can
+differ in near ties).
+
+Vectors are random by default (clustered, MiniLM-sized) so no model is
+needed; --corpus embeds a folder of PDFs with the app's model instead.
+
+Usage (from backend/):
+    python benchmarks/bench_vector_search.py --sizes 10k,100k --queries 200 --k 30
+    python benchmarks/bench_vector_search.py --corpus benchmarks/corpus/10k --queries 100
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from app.config import Config
+from bench_suite import percentiles
+from synthetic_corpus import parse_size
+
+
+def random_vectors(size, queries, dim, seed):
+    """Clustered vectors, closer to real embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(8, size // 500), dim)).astype(np.float32)
+
+    def sample(n):
+        picks = rng.integers(len(centers), size=n)
+        return centers[picks] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+
+    return sample(size), sample(queries)
+
+
+def corpus_vectors(folder, queries):
+    from app import services
+    from synthetic_corpus import job_descriptions
+
+    names = sorted(name for name in os.listdir(folder) if name.lower().endswith(".pdf"))
+    texts = [services.process_pdf(os.path.join(folder, name)) for name in names]
+    embed = services.get_embedding_function()
+    vectors = np.asarray(embed(texts), dtype=np.float32)
+    return vectors, np.asarray(embed(job_descriptions(queries)), dtype=np.float32)
+
+
+def exact_neighbours(vectors, queries, k):
+    norms = np.einsum("ij,ij->i", vectors, vectors)
+    truth = []
+    for query in queries:
+        distances = norms - 2 * vectors @ query
+        top = np.argpartition(distances, k - 1)[:k]
+        truth.append({f"r{i}" for i in top})
+    return truth
+
+
+def recall(rankings, truth):
+    return round(float(np.mean([len(set(ranking) & expected) / len(expected) for ranking, expected in zip(rankings, truth)])), 4)
+
+
+def bench_chroma(db_dir, ids, vectors, queries, k):
+    import chromadb
+
+    client = chromadb.PersistentClient(path=os.path.join(db_dir, "chroma"))
+    collection = client.create_collection(name="bench", embedding_function=None)
+    start = time.perf_counter()
+    for i in range(0, len(ids), 5000):
+        collection.add(ids=ids[i:i + 5000], embeddings=vectors[i:i + 5000].tolist())
+    load = time.perf_counter() - start
+
+    samples, rankings = [], []
+    for query in queries:
+        start = time.perf_counter()
+        result = collection.query(query_embeddings=[query.tolist()], n_results=k, include=['distances'])
+        samples.append(time.perf_counter() - start)
+        rankings.append(result['ids'][0])
+    return load, samples, rankings
+
+
+def bench_numpy(db_dir, ids, vectors, queries, k, dtype):
+    from app import vector_index
+
+    Config.VECTOR_INDEX_PATH = os.path.join(db_dir, f"vector_index_{dtype}.sqlite3")
+    Config.VECTOR_INDEX_DTYPE = dtype
+    start = time.perf_counter()
+    for i in range(0, len(ids), 5000):
+        vector_index.add(ids[i:i + 5000], vectors[i:i + 5000])
+    load = time.perf_counter() - start
+
+    vector_index.search(queries[:1], k)  # map the file and compute norms outside the timings
+    samples, rankings = [], []
+    for query in queries:
+        start = time.perf_counter()
+        rankings.append(vector_index.search([query], k)[0])
+        samples.append(time.perf_counter() - start)
+    return load, samples, rankings
+
+
+def run(label, vectors, queries, k):
+    ids = [f"r{i}" for i in range(len(vectors))]
+    truth = exact_neighbours(vectors, queries, k)
+    db_dir = tempfile.mkdtemp(prefix="bench_vectors_")
+    try:
+        print(f"\n{label}: {len(vectors)} x {vectors.shape[1]} vectors, {len(queries)} queries, k={k}")
+        engines = [("chroma", lambda: bench_chroma(db_dir, ids, vectors, queries, k))]
+        engines += [(f"numpy-{dtype}", lambda dtype=dtype: bench_numpy(db_dir, ids, vectors, queries, k, dtype))
+                    for dtype in ("float32", "float16")]
+        for name, bench in engines:
+            load, samples, rankings = bench()
+            stats = percentiles(samples)
+            print(f"  {name:<14} load {load:7.2f}s  p50 {stats['p50_ms']:8.2f}ms  p99 {stats['p99_ms']:8.2f}ms  "
+                  f"recall@{k} {recall(rankings, truth)}")
+    finally:
+        shutil.rmtree(db_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10k,100k", help="comma-separated numbers of random vectors")
+    parser.add_argument("--corpus", default=None, help="embed the PDFs in this folder instead of random vectors")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=30)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.corpus:
+        vectors, queries = corpus_vectors(args.corpus, args.queries)
+        run(args.corpus, vectors, queries, args.k)
+        return
+    for label in args.sizes.split(","):
+        if label.strip():
+            vectors, queries = random_vectors(parse_size(label), args.queries, args.dim, args.seed)
+            run(label.strip(), vectors, queries, args.k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Per-worker memory with and without gunicorn --preload (Linux only).
+
+Starts gunicorn twice with the embedding model loaded at startup, once with
+each worker loading its own copy (GUNICORN_PRELOAD=false, EMBEDDING_WARMUP=sync)
+and once with the model preloaded in the master and shared copy-on-write.
+For each worker it reads /proc/<pid>/smaps_rollup:
+    rss_mb     - resident memory, counts shared pages in full
+    pss_mb     - proportional share, shared pages divided by the processes sharing them
+    private_mb - pages only this worker holds
+
+PSS and private memory are the numbers that show the saving.
+
+Usage (from backend/):
+    python benchmarks/bench_worker_memory.py --workers 2 --out memory.json
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def read_smaps(pid):
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[2] == "kB":
+                values[parts[0].rstrip(':')] = int(parts[1])
+    private = values.get("Private_Clean", 0) + values.get("Private_Dirty", 0)
+    return {
+        "pid": pid,
+        "rss_mb": round(values.get("Rss", 0) / 1024, 1),
+        "pss_mb": round(values.get("Pss", 0) / 1024, 1),
+        "private_mb": round(private / 1024, 1),
+    }
+
+
+def child_pids(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(p) for p in f.read().split()]
+
+
+def wait_ready(port, timeout=300):
+    # With EMBEDDING_WARMUP=sync a worker only accepts requests once its model is loaded
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health?ready=1", timeout=5) as response:
+                if response.status == 200:
+                    return True
+        except Exception:
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def measure(preload, workers, port):
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        WEB_CONCURRENCY=str(workers),
+        GUNICORN_PRELOAD="true" if preload else "false",
+        EMBEDDING_WARMUP="preload" if preload else "sync",
+    )
+    master = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "run:app"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        if not wait_ready(port):
+            raise RuntimeError("gunicorn did not become ready")
+        # Give every worker time to finish its own load in the non-preload case
+        time.sleep(5)
+        worker_stats = [read_smaps(pid) for pid in child_pids(master.pid)]
+        return {
+            "preload": preload,
+            "master": read_smaps(master.pid),
+            "workers": worker_stats,
+            "total_pss_mb": round(sum(w["pss_mb"] for w in worker_stats) + read_smaps(master.pid)["pss_mb"], 1),
+        }
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--out", help="write results to this JSON file")
+    args = parser.parse_args()
+    
+    results = [measure(False, args.workers, args.port), measure(True, args.workers, args.port)]
+    for result in results:
+        label = "preload" if result["preload"] else "per-worker"
+        print(f"{label:>10}: total PSS {result['total_pss_mb']} MB")
+        for worker in result["workers"]:
+            print(f"            worker {worker['pid']}: rss {worker['rss_mb']} MB, pss {worker['pss_mb']} MB, private {worker['private_mb']} MB")
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Local stand-in for the Hugging Face chat completions endpoint.
+
+Answers any POST ending in /chat/completions with a fixed analysis JSON after
+an optional delay, so /api/analyze can be exercised without network access or
+API cost. Point the backend at it with:
+
+    HF_INFERENCE_URL=http://127.0.0.1:8089/v1 python run.py
+
+Usage (from backend/):
+    python benchmarks/stub_llm_server.py --port 8089 --delay 2.0 --jitter 1.0
+"""
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(delay, jitter, hang_rate):
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)) or 0)
+            if not self.path.rstrip('/').endswith('/chat/completions'):
+                self.send_error(404)
+                return
+            
+            request = json.loads(body or b'{}')
+            prompt = request.get("messages", [{}])[-1].get("content", "")
+            
+            # Simulate a stuck upstream call for deadline testing
+            if hang_rate and random.random() < hang_rate:
+                time.sleep(3600)
+            time.sleep(max(0.0, delay + random.uniform(-jitter, jitter)))
+            
+            analysis = {
+                "match_percentage": len(prompt) % 100,
+                "summary": "Stub analysis. Generated locally for testing.",
+                "pros": ["Stub strength"],
+                "cons": ["Stub gap"],
+                "evidence": []
+            }
+            payload = json.dumps({
+                "id": "stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "stub"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": json.dumps(analysis)},
+                    "finish_reason": "stop"
+                }],
+                "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 50, "total_tokens": len(prompt) // 4 + 50}
+            }).encode()
+            
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    return StubHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--delay", type=float, default=1.0, help="seconds per completion")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- random seconds added to delay")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="fraction of calls that never answer")
+    args = parser.parse_args()
+    
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args.delay, args.jitter, args.hang_rate))
+    server.daemon_threads = True
+    print(f"Stub LLM server listening on http://{args.host}:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
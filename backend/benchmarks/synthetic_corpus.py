@@ -0,0 +1,178 @@
+"""
+Synthetic resume corpus generator.
+
+Writes N single-page text PDFs with plausible resume content (name, contact,
+location, titles, dated roles, skills, bullet points). Output is fully
+determined by --seed and --size, so two runs on different commits see the
+same corpus. The PDFs are written by hand (no extra dependency) and parse with
+pypdf like real text resumes.
+
+A small fraction of files are exact copies of earlier ones, so the manifest's
+duplicate handling is exercised as well.
+
+Usage (from backend/):
+    python benchmarks/synthetic_corpus.py --size 10k --out benchmarks/corpus/10k
+"""
+import argparse
+import json
+import os
+import random
+
+FIRST_NAMES = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn",
+               "Priya", "Wei", "Mateo", "Amara", "Lena", "Omar", "Yuki", "Noah", "Ines", "Kofi"]
+LAST_NAMES = ["Smith", "Garcia", "Chen", "Patel", "Müller", "Rossi", "Kim", "Okafor", "Novak", "Silva",
+              "Johansson", "Haddad", "Tanaka", "Kowalski", "Dubois", "Nguyen", "Fischer", "Ali", "Brown", "Costa"]
+CITIES = ["Berlin", "London", "Amsterdam", "Paris", "Munich", "Dublin", "New York", "San Francisco",
+          "Toronto", "Bangalore", "Singapore", "Sydney", "Madrid", "Warsaw", "Remote"]
+TITLES = ["Software Engineer", "Senior Software Engineer", "Data Engineer", "Data Scientist", "Backend Developer",
+          "Frontend Developer", "DevOps Engineer", "Machine Learning Engineer", "Product Manager", "Data Analyst",
+          "Site Reliability Engineer", "Solutions Architect", "QA Engineer", "Mobile Developer"]
+COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises",
+             "Soylent", "Tyrell", "Cyberdyne", "Vandelay", "Pied Piper", "Aperture", "Wonka"]
+SKILLS = ["Python", "Java", "JavaScript", "TypeScript", "C++", "C#", "Golang", "Rust", "SQL", "Scala", "Kotlin",
+          "React", "Angular", "Vue", "Node.js", "Django", "Flask", "FastAPI", "Spring Boot", "PostgreSQL", "MySQL",
+          "MongoDB", "Redis", "Elasticsearch", "Kafka", "Spark", "PySpark", "Airflow", "dbt", "Pandas", "NumPy",
+          "TensorFlow", "PyTorch", "scikit-learn", "AWS", "Azure", "GCP", "Docker", "Kubernetes", "Terraform",
+          "Ansible", "Jenkins", "CI/CD", "Git", "Linux", "GraphQL", "Tableau", "Power BI", "Snowflake", "BigQuery"]
+VERBS = ["Built", "Designed", "Led", "Migrated", "Optimized", "Automated", "Maintained", "Scaled", "Launched", "Refactored"]
+OBJECTS = ["a data pipeline", "the billing service", "an internal API", "the search backend", "a reporting dashboard",
+           "the deployment pipeline", "a recommendation model", "the mobile app", "an event streaming platform",
+           "the customer portal", "a feature store", "the monitoring stack"]
+OUTCOMES = ["cutting latency by {n}%", "serving {n}k daily users", "reducing costs by {n}%",
+            "improving reliability to 99.{n}%", "saving {n} engineer hours per week", "growing throughput {n}x"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+DUPLICATE_RATE = 0.02
+
+
+def parse_size(value):
+    """'1k' -> 1000, '50k' -> 50000, '250' -> 250."""
+    value = str(value).strip().lower()
+    if value.endswith("k"):
+        return int(float(value[:-1]) * 1000)
+    return int(value)
+
+
+def resume_lines(rng, index):
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    skills = rng.sample(SKILLS, rng.randint(5, 14))
+    lines = [
+        name,
+        f"{rng.choice(CITIES)} | {name.split()[0].lower()}.{index}@example.com | +1 555 {rng.randint(1000, 9999)}",
+        "",
+        "Summary",
+        f"{rng.choice(TITLES)} with {rng.randint(1, 20)}+ years of experience in {', '.join(skills[:3])}.",
+        "",
+        "Experience",
+    ]
+    year = 2025
+    for _ in range(rng.randint(2, 5)):
+        length = rng.randint(1, 5)
+        start = year - length
+        end = "Present" if year == 2025 else f"{rng.choice(MONTHS)} {year}"
+        lines.append(f"{rng.choice(TITLES)}, {rng.choice(COMPANIES)}  {rng.choice(MONTHS)} {start} - {end}")
+        for _ in range(rng.randint(2, 4)):
+            outcome = rng.choice(OUTCOMES).format(n=rng.randint(2, 60))
+            lines.append(f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(skills)}, {outcome}.")
+        year = start - rng.randint(0, 1)
+    lines += ["", "Skills", ", ".join(skills), "", "Education", f"B.Sc. Computer Science, {year - 4} - {year}"]
+    return lines
+
+
+def _escape(text):
+    # Helvetica with WinAnsiEncoding covers Latin-1; anything else becomes "?"
+    text = text.encode("latin-1", "replace").decode("latin-1")
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def render_pdf(lines):
+    """Minimal one-page PDF with the lines as extractable text."""
+    content = ["BT", "/F1 10 Tf", "12 TL", "50 770 Td"]
+    for line in lines[:60]:
+        content.append(f"({_escape(line)}) Tj T*")
+    content.append("ET")
+    stream = "\n".join(content).encode("latin-1")
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def generate(out_dir, size, seed=42):
+    """
+    Write the corpus to out_dir unless an identical one (same size and seed) is already there.
+    Returns the corpus description.
+    """
+    info_path = os.path.join(out_dir, ".corpus.json")
+    info = {"size": size, "seed": seed, "duplicate_rate": DUPLICATE_RATE}
+    if os.path.exists(info_path):
+        with open(info_path) as f:
+            if json.load(f) == info:
+                return info
+
+    os.makedirs(out_dir, exist_ok=True)
+    for name in os.listdir(out_dir):
+        if name.endswith(".pdf"):
+            os.remove(os.path.join(out_dir, name))
+
+    rng = random.Random(seed)
+    written = []
+    for index in range(size):
+        if written and rng.random() < DUPLICATE_RATE:
+            data = written[rng.randrange(len(written))]
+        else:
+            data = render_pdf(resume_lines(rng, index))
+            if len(written) < 1000:
+                written.append(data)
+        with open(os.path.join(out_dir, f"resume_{index:06d}.pdf"), "wb") as f:
+            f.write(data)
+
+    with open(info_path, "w") as f:
+        json.dump(info, f)
+    return info
+
+
+def job_descriptions(count, seed=7):
+    """Deterministic job descriptions drawn from the same vocabulary as the corpus."""
+    rng = random.Random(seed)
+    descriptions = []
+    for _ in range(count):
+        skills = rng.sample(SKILLS, rng.randint(3, 7))
+        descriptions.append(
+            f"We are hiring a {rng.choice(TITLES)} in {rng.choice(CITIES)}. "
+            f"You have {rng.randint(2, 8)}+ years of experience with {', '.join(skills)}. "
+            f"You will {rng.choice(VERBS).lower()} {rng.choice(OBJECTS)} and work closely with product teams."
+        )
+    return descriptions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", default="1k", help="number of resumes, e.g. 1k, 10k, 50k")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=None, help="output folder (default benchmarks/corpus/<size>)")
+    args = parser.parse_args()
+
+    size = parse_size(args.size)
+    out_dir = args.out or os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", args.size)
+    generate(out_dir, size, args.seed)
+    print(f"{size} resumes in {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
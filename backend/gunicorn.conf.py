@@ -0,0 +1,41 @@
+# Gunicorn settings for the backend. Command-line flags override these.
+#
+# With GUNICORN_PRELOAD on (the default), the app and the embedding model are
+# loaded once in the master before workers fork. Workers then share the model
+# weights copy-on-write instead of each loading their own copy.
+import gc
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+accesslog = "-"
+errorlog = "-"
+
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() in ("1", "true", "yes")
+
+if preload_app:
+    # Load weights synchronously in the master; a background load would not survive the fork
+    os.environ.setdefault("EMBEDDING_WARMUP", "preload")
+
+
+def pre_fork(server, worker):
+    # Move everything loaded so far out of the collector's reach, so GC passes in the
+    # workers don't write to (and un-share) the pages holding the preloaded objects
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Workers compete for the same cores; keep each torch from spawning a thread per core
+    threads = os.environ.get("TORCH_THREADS_PER_WORKER")
+    if threads:
+        try:
+            import torch
+            torch.set_num_threads(int(threads))
+        except ImportError:
+            pass
+
+    if preload_app:
+        # Only the first worker to take the watcher lock actually watches the folder
+        from app.watcher import start_watcher
+        start_watcher()
@@ -0,0 +1,33 @@
+import pytest
+
+from app import duplicates
+from app.config import Config
+
+
+@pytest.fixture(autouse=True)
+def duplicate_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "DUPLICATE_INDEX_PATH", str(tmp_path / "duplicates.sqlite3"))
+
+
+def _words(start):
+    return " ".join(f"skill{i}x" for i in range(start, start + 100))
+
+
+def test_collapse_compares_with_the_kept_resume_only():
+    # a~b and b~c are near-duplicates, a and c are not
+    duplicates.add([("a", _words(0)), ("b", _words(12)), ("c", _words(24))])
+
+    kept, folded = duplicates.collapse(["a", "b", "c"], threshold=0.7)
+
+    assert kept == [0, 2]
+    assert [doc_id for doc_id, _ in folded["a"]] == ["b"]
+    assert all(score >= 0.7 for group in folded.values() for _, score in group)
+
+
+def test_collapse_keeps_resumes_without_a_sketch():
+    duplicates.add([("a", _words(0)), ("b", _words(0))])
+
+    kept, folded = duplicates.collapse(["missing", "a", "b"], threshold=0.7)
+
+    assert kept == [0, 1]
+    assert folded == {"a": [("b", 1.0)]}
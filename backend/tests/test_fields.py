@@ -0,0 +1,81 @@
+import datetime
+
+import pytest
+
+from app import fields
+
+
+def _years_since(year):
+    today = datetime.date.today()
+    return (today.year * 12 + today.month - 1 - year * 12) // 12
+
+
+def test_years_ignore_education_ranges():
+    text = (
+        "Jane Doe\n"
+        "Experience\n"
+        "Software Engineer, Acme  Jan 2015 - Present\n"
+        "Education\n"
+        "BSc Computer Science, 2008 - 2012\n"
+    )
+    assert fields.extract_years_experience(text) == _years_since(2015)
+
+
+def test_years_merge_overlapping_ranges():
+    text = (
+        "Work Experience\n"
+        "Backend Developer, Globex  Jan 2010 - Dec 2014\n"
+        "Freelance Consultant  Jan 2012 - Dec 2013\n"
+        "Data Engineer, Initech  Jan 2013 - Jan 2016\n"
+    )
+    assert fields.extract_years_experience(text) == 6
+
+
+def test_years_without_headings_use_every_range():
+    assert fields.extract_years_experience("Engineer at Acme 2015 - 2020") == 5
+
+
+@pytest.mark.parametrize("filters", [
+    {"skills": 5},
+    {"skills": [1]},
+    {"location": 7},
+    {"min_years": "many"},
+    {"min_years": True},
+    {"max_years": [3]},
+    {"has_email": "maybe"},
+])
+def test_malformed_filters_raise_value_error(filters):
+    with pytest.raises(ValueError):
+        fields.build_filters(filters)
+
+
+def test_has_email_is_parsed_as_boolean():
+    assert fields.build_filters({"has_email": "false"}) == (None, None)
+    assert fields.build_filters({"has_email": "true"}) == ({"has_email": True}, None)
+    assert fields.build_filters({"has_email": True}) == ({"has_email": True}, None)
+
+
+@pytest.mark.parametrize("skill, text", [
+    ("Go", "Backend services in Go and Python"),
+    ("R", "Statistics with R, SQL"),
+    ("Excel", "Advanced Excel reporting"),
+    ("Spring", "Java, Spring, Hibernate"),
+])
+def test_skill_filter_matches_the_canonical_spelling(skill, text):
+    where, _ = fields.build_filters({"skills": [skill]})
+    assert fields.extract(text).get(next(iter(where))) is True
+
+
+def test_short_skills_match_whole_words_only():
+    assert fields.extract_skills("R&D lead at Google") == []
+
+
+def test_years_bounds_round_inwards():
+    assert fields.build_filters({"min_years": "4.9"}) == ({"years_experience": {"$gte": 5}}, None)
+    assert fields.build_filters({"max_years": 4.9}) == ({"years_experience": {"$lte": 4}}, None)
+
+
+@pytest.mark.parametrize("value", [1e309, 10 ** 400, "nan", "inf"])
+def test_non_finite_years_raise_value_error(value):
+    with pytest.raises(ValueError):
+        fields.build_filters({"min_years": value})
@@ -0,0 +1,62 @@
+import sqlite3
+
+import pytest
+
+from app import jobs
+from app.config import Config
+
+
+@pytest.fixture(autouse=True)
+def job_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "JOBS_PATH", str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setattr(jobs, "_initialized", False)
+
+
+def _interrupt(job_id):
+    conn = sqlite3.connect(Config.JOBS_PATH)
+    with conn:
+        conn.execute("UPDATE jobs SET heartbeat = 0 WHERE id = ?", (job_id,))
+    conn.close()
+
+
+def test_interrupted_sync_is_resumed_by_the_next_sync():
+    job, _ = jobs.claim_job("resumes")
+    _interrupt(job["id"])
+
+    resumed, started = jobs.claim_job("resumes")
+
+    assert started and resumed["id"] == job["id"] and resumed["runs"] == 2
+
+
+@pytest.mark.parametrize("kind", ["upload", "watch", "import"])
+def test_other_kinds_supersede_an_interrupted_sync(kind):
+    job, _ = jobs.claim_job("resumes")
+    _interrupt(job["id"])
+
+    fresh, started = jobs.claim_job("resumes", kind)
+
+    assert started and fresh["id"] != job["id"] and fresh["kind"] == kind and fresh["runs"] == 1
+    assert jobs.get_job(job["id"])["status"] == "error"
+
+
+def test_interrupted_upload_is_not_resumed_by_another_upload():
+    job, _ = jobs.claim_job("resumes", "upload")
+    _interrupt(job["id"])
+
+    fresh, started = jobs.claim_job("resumes", "upload")
+
+    assert started and fresh["id"] != job["id"]
+
+
+def test_store_without_kind_column_is_upgraded():
+    conn = sqlite3.connect(Config.JOBS_PATH)
+    conn.execute(
+        "CREATE TABLE jobs (id TEXT PRIMARY KEY, collection TEXT NOT NULL, status TEXT NOT NULL, owner TEXT,"
+        " created REAL NOT NULL, updated REAL NOT NULL, heartbeat REAL NOT NULL,"
+        " runs INTEGER NOT NULL DEFAULT 1, last_event TEXT)"
+    )
+    conn.close()
+
+    job, started = jobs.claim_job("resumes")
+
+    assert started and job["kind"] == "sync"
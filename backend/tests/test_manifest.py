@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+from app import manifest
+from app.config import Config
+
+
+@pytest.fixture
+def resumes(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "MANIFEST_PATH", str(tmp_path / "manifest.sqlite3"))
+    folder = tmp_path / "resumes"
+    folder.mkdir()
+    return folder
+
+
+def _write(folder, name, data):
+    path = folder / name
+    path.write_bytes(data)
+    st = os.stat(path)
+    return {"name": name, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": manifest.hash_file(path)}
+
+
+def test_surviving_alias_counts_once(resumes):
+    root = str(resumes)
+    owner = _write(resumes, "a.pdf", b"same resume")
+    alias = _write(resumes, "b.pdf", b"same resume")
+    other = _write(resumes, "c.pdf", b"another resume")
+    manifest.record(root, [dict(owner, doc_id="a.pdf"), dict(alias, doc_id="a.pdf"), dict(other, doc_id="c.pdf")])
+    os.remove(resumes / "a.pdf")
+
+    plan = manifest.plan_sync(root)
+
+    assert plan["rehome"] == {"a.pdf": "b.pdf"}
+    assert sorted(plan["unchanged"]) == ["b.pdf", "c.pdf"]
+    assert set(plan["unchanged"]) | {row["name"] for row in plan["record"]} == {"b.pdf", "c.pdf"}
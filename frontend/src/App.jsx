@@ -18,7 +18,7 @@ import { useEffect, useRef, useState } from 'react';
 import { Document, Page, pdfjs } from 'react-pdf';
 import 'react-pdf/dist/Page/AnnotationLayer.css';
 import 'react-pdf/dist/Page/TextLayer.css';
-import { analyzeResumes, API_URL, deleteResume, deleteResumes, getResumePdfUrl, getResumes, uploadResumes } from './api';
+import { analyzeResumesStream, API_URL, deleteResume, deleteResumes, getResumePdfUrl, getResumesPage, uploadAndIngest } from './api';
 
 // Set up PDF.js worker
 pdfjs.GlobalWorkerOptions.workerSrc = `//unpkg.com/pdfjs-dist@${pdfjs.version}/build/pdf.worker.min.mjs`;
@@ -333,6 +333,9 @@ function App() {
   const [results, setResults] = useState([]);
   const [resumesList, setResumesList] = useState([]);
   const [loadingResumes, setLoadingResumes] = useState(false);
+  const [resumesTotal, setResumesTotal] = useState(0);
+  const [resumesNextOffset, setResumesNextOffset] = useState(null);
+  const [loadingMoreResumes, setLoadingMoreResumes] = useState(false);
   const [selectedJob, setSelectedJob] = useState(null);
   const [showJobInput, setShowJobInput] = useState(true);
   const [notification, setNotification] = useState(null);
@@ -340,6 +343,8 @@ function App() {
   const [viewingResume, setViewingResume] = useState(null);
 
   const fileInputRef = useRef(null);
+  const resumesEndRef = useRef(null);
+  const resumesRequestRef = useRef(0); // Bumped on refresh so a stale "load more" page is dropped
   const [dialog, setDialog] = useState(null);
   const [loadingDialog, setLoadingDialog] = useState(null); // { message: string } | null
   const [selectedResumes, setSelectedResumes] = useState(new Set());
@@ -357,6 +362,17 @@ function App() {
     }
   }, [activeTab]);
 
+  useEffect(() => {
+    // Load the next page when the end of the list scrolls into view
+    const sentinel = resumesEndRef.current;
+    if (!sentinel || resumesNextOffset === null || loadingResumes || loadingMoreResumes) return;
+    const observer = new IntersectionObserver((entries) => {
+        if (entries[0].isIntersecting) loadMoreResumes();
+    }, { rootMargin: '200px' });
+    observer.observe(sentinel);
+    return () => observer.disconnect();
+  }, [activeTab, resumesNextOffset, loadingResumes, loadingMoreResumes]);
+
 
 
   const showNotification = (message, type = 'info') => {
@@ -379,16 +395,13 @@ function App() {
       setLoadingResumes(true);
       try {
           console.log("Fetching resumes from API...");
-          const response = await getResumes();
-          console.log("Resumes response:", response.data);
-          
-          if (response.data && response.data.resumes) {
-              setResumesList(response.data.resumes);
-              console.log(`✓ Loaded ${response.data.resumes.length} resumes successfully`);
-          } else {
-              console.warn("No resumes data in response");
-              setResumesList([]);
-          }
+          const request = ++resumesRequestRef.current;
+          const page = await getResumesPage(0);
+          if (request !== resumesRequestRef.current) return;
+          setResumesList(page.resumes);
+          setResumesTotal(page.total);
+          setResumesNextOffset(page.nextOffset);
+          console.log(`✓ Loaded ${page.resumes.length} of ${page.total} resumes`);
       } catch (error) {
           console.error("Failed to fetch resumes:", error);
           console.error("Error details:", {
@@ -400,11 +413,35 @@ function App() {
               `Could not load resumes from database.\n\nError: ${error.message}`, 
               "error");
           setResumesList([]);
+          setResumesTotal(0);
+          setResumesNextOffset(null);
       } finally {
           setLoadingResumes(false);
       }
   };
 
+  const loadMoreResumes = async () => {
+      if (resumesNextOffset === null || loadingMoreResumes) return;
+      const request = resumesRequestRef.current;
+      setLoadingMoreResumes(true);
+      try {
+          const page = await getResumesPage(resumesNextOffset);
+          if (request !== resumesRequestRef.current) return;
+          setResumesList((current) => {
+              // Deletes shift later offsets, so a page can repeat a resume already shown
+              const seen = new Set(current.map((resume) => resume.id));
+              return [...current, ...page.resumes.filter((resume) => !seen.has(resume.id))];
+          });
+          setResumesTotal(page.total);
+          setResumesNextOffset(page.nextOffset);
+      } catch (error) {
+          console.error("Failed to load more resumes:", error);
+          showNotification(`Could not load more resumes: ${error.message}`, "error");
+      } finally {
+          setLoadingMoreResumes(false);
+      }
+  };
+
   const handleViewResume = async (resume) => {
       setViewingResume(resume);
   };
@@ -471,7 +508,9 @@ function App() {
       }
   };
 
-  const handleIngest = async () => {
+  // startIngest optionally starts the job some other way (e.g. ingest-on-upload)
+  // and returns its progress stream; by default the resumes folder is synced
+  const handleIngest = async (startIngest = null) => {
     setIngesting(true);
     setIngestProgress({ percent: 0, message: "Starting..." });
     // Don't show loading dialog - the progress bar will show status
@@ -481,7 +520,7 @@ function App() {
       const ingestUrl = `${API_URL}/ingest`;
       console.log(`Calling ingest API: ${ingestUrl}`);
       
-      const response = await fetch(ingestUrl, {
+      let response = startIngest ? await startIngest() : await fetch(ingestUrl, {
         method: 'POST',
       });
 
@@ -502,42 +541,63 @@ function App() {
         throw new Error('Server returned HTML instead of JSON. Backend may be misconfigured.');
       }
 
-      const reader = response.body.getReader();
-      const decoder = new TextDecoder();
-      let buffer = '';
-
-      while (true) {
-        const { done, value } = await reader.read();
-        if (done) break;
+      // Ingestion runs as a background job; the stream closes with "detached" while
+      // it is still running, and we reconnect from the last event we saw
+      let jobId = null;
+      let lastSeq = 0;
+      let reconnect = true;
+
+      while (reconnect) {
+        reconnect = false;
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+          const { done, value } = await reader.read();
+          if (done) break;
         
-        buffer += decoder.decode(value, { stream: true });
-        const lines = buffer.split('\n');
-        buffer = lines.pop(); // Keep the last incomplete line in buffer
-
-        for (const line of lines) {
-            if (!line.trim()) continue;
-            try {
-                const data = JSON.parse(line);
-                if (data.status === 'processing') {
-                    const msg = `Processing ${data.file} (${data.current}/${data.total})`;
-                    setIngestProgress({ 
-                        percent: data.percent, 
-                        message: msg
-                    });
-                } else if (data.status === 'complete') {
-                    showNotification(data.message, "success");
-                    if (activeTab === 'resumes') fetchResumes();
-                } else if (data.status === 'error') {
-                    const errorMsg = data.message;
-                    if (errorMsg.includes('quota') || errorMsg.includes('429')) {
-                        showDialog("API Quota Exceeded", "Google API quota exceeded. Please wait 24 hours or upgrade your plan.", "error");
-                    } else {
-                        showDialog("Processing Error", errorMsg, "error");
-                    }
-                }
-            } catch (e) {
-                console.error("Error parsing JSON stream", e);
-            }
+          buffer += decoder.decode(value, { stream: true });
+          const lines = buffer.split('\n');
+          buffer = lines.pop(); // Keep the last incomplete line in buffer
+
+          for (const line of lines) {
+              if (!line.trim()) continue;
+              try {
+                  const data = JSON.parse(line);
+                  if (data.seq) lastSeq = data.seq;
+                  if (data.status === 'job') {
+                      jobId = data.job_id;
+                  } else if (data.status === 'detached') {
+                      reconnect = true;
+                  } else if (data.status === 'processing') {
+                      const msg = `Processing ${data.file} (${data.current}/${data.total})`;
+                      setIngestProgress({ 
+                          percent: data.percent, 
+                          message: msg
+                      });
+                  } else if (data.status === 'duplicate' || data.status === 'skipped') {
+                      setIngestProgress(prev => ({ ...prev, message: data.message }));
+                  } else if (data.status === 'complete') {
+                      showNotification(data.message, "success");
+                      if (activeTab === 'resumes') fetchResumes();
+                  } else if (data.status === 'error') {
+                      const errorMsg = data.message;
+                      if (errorMsg.includes('quota') || errorMsg.includes('429')) {
+                          showDialog("API Quota Exceeded", "Google API quota exceeded. Please wait 24 hours or upgrade your plan.", "error");
+                      } else {
+                          showDialog("Processing Error", errorMsg, "error");
+                      }
+                  }
+              } catch (e) {
+                  console.error("Error parsing JSON stream", e);
+              }
+          }
+        }
+
+        if (reconnect && jobId) {
+          response = await fetch(`${API_URL}/ingest/jobs/${jobId}/events?after=${lastSeq}`);
+          if (!response.ok) throw new Error(`Lost track of ingest job ${jobId}`);
         }
       }
     } catch (error) {
@@ -576,13 +636,10 @@ function App() {
       
       try {
           console.log(`Uploading ${fileCount} individual resume files...`);
-          const response = await uploadResumes(files);
-          
-          showNotification(response.data.message, "success");
           setUploading(false);
           
-          // Now trigger ingestion (progress bar will show)
-          await handleIngest();
+          // The files are parsed and embedded from the upload itself (progress bar will show)
+          await handleIngest(() => uploadAndIngest(files));
           
           // Clear input
           event.target.value = null;
@@ -699,9 +756,22 @@ function App() {
     setAnalyzing(true);
     showLoading("Analyzing resumes against job description...");
     try {
-      const response = await analyzeResumes(jobDescription);
-      setResults(response.data.results);
-      setShowJobInput(false);
+      let streamError = null;
+      setResults([]);
+      await analyzeResumesStream(jobDescription, (event) => {
+        if (event.status === 'analyzed') {
+          // Show candidates as soon as the first one is scored
+          hideLoading();
+          setShowJobInput(false);
+          setResults(prev => [...prev, event.result].sort((a, b) => b.score - a.score));
+        } else if (event.status === 'complete') {
+          setResults(event.results);
+          setShowJobInput(false);
+        } else if (event.status === 'error') {
+          streamError = event.message;
+        }
+      });
+      if (streamError) throw new Error(streamError);
       showNotification("Analysis complete!", "success");
     } catch (error) {
       console.error("Analysis failed", error);
@@ -1118,7 +1188,7 @@ function App() {
                             )}
                         </div>
                         <div className="flex items-center gap-3">
-                            <span className="text-xs font-medium bg-slate-100 text-slate-500 px-2 py-1 rounded-full">{resumesList.length} files</span>
+                            <span className="text-xs font-medium bg-slate-100 text-slate-500 px-2 py-1 rounded-full">{resumesList.length < resumesTotal ? `${resumesList.length} of ${resumesTotal}` : resumesList.length} files</span>
                             <button 
                                 onClick={fetchResumes}
                                 className="p-2 hover:bg-slate-100 rounded-full text-slate-400 hover:text-emerald-600 transition-colors"
@@ -1196,6 +1266,21 @@ function App() {
                             </div>
                         )}
                     </div>
+
+                    {!loadingResumes && resumesNextOffset !== null && (
+                        <div ref={resumesEndRef} className="p-4 border-t border-slate-100 text-center">
+                            <button
+                                onClick={loadMoreResumes}
+                                disabled={loadingMoreResumes}
+                                className="bg-slate-50 hover:bg-slate-100 disabled:opacity-60 text-slate-600 px-4 py-2 rounded-lg text-sm font-semibold inline-flex items-center gap-2 transition-colors"
+                            >
+                                {loadingMoreResumes ? (
+                                    <div className="animate-spin rounded-full h-4 w-4 border-b-2 border-emerald-600"></div>
+                                ) : null}
+                                {loadingMoreResumes ? "Loading..." : `Load more (${resumesTotal - resumesList.length} left)`}
+                            </button>
+                        </div>
+                    )}
                 </div>
             )}
 
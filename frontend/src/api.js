@@ -15,6 +15,20 @@ export const uploadResumes = async (files) => {
   });
 };
 
+// Uploads PDFs and ingests them straight from the upload. Resolves to the
+// NDJSON progress response, with the same events as /ingest plus per-file
+// "duplicate" and "skipped" entries.
+export const uploadAndIngest = async (files) => {
+  const formData = new FormData();
+  Array.from(files).forEach(file => {
+    formData.append('files', file);
+  });
+  return fetch(`${API_URL}/upload?ingest=1`, {
+    method: 'POST',
+    body: formData,
+  });
+};
+
 export const uploadFolder = async (files) => {
   const formData = new FormData();
   Array.from(files).forEach(file => {
@@ -31,12 +45,62 @@ export const analyzeResumes = async (jobDescription) => {
   return axios.post(`${API_URL}/analyze`, { description: jobDescription });
 };
 
+// Streams NDJSON events from /analyze: "retrieved", then one "analyzed" per
+// candidate as it finishes, then "complete" with the ranked results.
+// filters (optional): { min_years, max_years, skills: [...], location, has_email }
+export const analyzeResumesStream = async (jobDescription, onEvent, filters = null) => {
+  const response = await fetch(`${API_URL}/analyze`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ description: jobDescription, stream: true, ...(filters ? { filters } : {}) }),
+  });
+
+  if (!response.ok) {
+    const errorText = await response.text();
+    let message = errorText;
+    try {
+      message = JSON.parse(errorText).error || errorText;
+    } catch (e) {
+      // Not JSON, keep the raw text
+    }
+    throw new Error(message);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split('\n');
+    buffer = lines.pop(); // Keep the last incomplete line in buffer
+
+    for (const line of lines) {
+      if (!line.trim()) continue;
+      onEvent(JSON.parse(line));
+    }
+  }
+};
+
 export const ingestResumes = async () => {
     return axios.post(`${API_URL}/ingest`);
 };
 
-export const getResumes = async () => {
-    return axios.get(`${API_URL}/resumes`);
+export const getResumes = async (params = {}) => {
+    return axios.get(`${API_URL}/resumes`, { params });
+};
+
+// Fetches one page of /resumes; nextOffset is null after the last page.
+export const getResumesPage = async (offset = 0, pageSize = 100) => {
+    const response = await getResumes({ limit: pageSize, offset });
+    return {
+        resumes: response.data.resumes || [],
+        total: response.data.total ?? 0,
+        nextOffset: response.data.next_offset ?? null,
+    };
 };
 
 export const getResumeContent = async (resumeId) => {